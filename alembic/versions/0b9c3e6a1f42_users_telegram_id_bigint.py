@@ -0,0 +1,46 @@
+"""users.telegram_id -> BIGINT (Telegram user ids exceed int4)
+
+Revision ID: 0b9c3e6a1f42
+Revises: f58b2d9e4c17
+Create Date: 2026-10-17 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b9c3e6a1f42'
+down_revision: Union[str, Sequence[str], None] = 'f58b2d9e4c17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# В SQLite INTEGER и так 64-битный, а batch_alter_table пересоздал бы таблицу users и потерял
+# индексы по выражениям (ix_users_name_lower, ix_users_login_lower) — меняем тип только в Postgres.
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column(
+        'users',
+        'telegram_id',
+        existing_type=sa.Integer(),
+        type_=sa.BigInteger(),
+        existing_nullable=True,
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column(
+        'users',
+        'telegram_id',
+        existing_type=sa.BigInteger(),
+        type_=sa.Integer(),
+        existing_nullable=True,
+    )
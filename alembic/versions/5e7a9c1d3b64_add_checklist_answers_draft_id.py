@@ -0,0 +1,30 @@
+"""Add checklist_answers.draft_id (source draft of a submitted attempt)
+
+Revision ID: 5e7a9c1d3b64
+Revises: a4c81f0e5d26
+Create Date: 2026-10-17 21:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7a9c1d3b64'
+down_revision: Union[str, Sequence[str], None] = 'a4c81f0e5d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # у попыток, отправленных раньше, draft_id остаётся NULL
+    op.add_column('checklist_answers', sa.Column('draft_id', sa.Integer(), nullable=True))
+    op.create_index('uq_ca_draft_id', 'checklist_answers', ['draft_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_ca_draft_id', table_name='checklist_answers')
+    with op.batch_alter_table('checklist_answers') as batch_op:
+        batch_op.drop_column('draft_id')
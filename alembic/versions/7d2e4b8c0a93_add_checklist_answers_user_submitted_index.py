@@ -0,0 +1,25 @@
+"""Add ix_ca_user_submitted (user_id, submitted_at, id) for completed-attempts paging
+
+Revision ID: 7d2e4b8c0a93
+Revises: 0b9c3e6a1f42
+Create Date: 2026-10-17 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e4b8c0a93'
+down_revision: Union[str, Sequence[str], None] = '0b9c3e6a1f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_ca_user_submitted', 'checklist_answers', ['user_id', 'submitted_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ca_user_submitted', table_name='checklist_answers')
@@ -0,0 +1,33 @@
+"""Add cache_versions (change counters for data the bot caches in memory)
+
+Revision ID: 9f3d2b7c6e15
+Revises: 5e7a9c1d3b64
+Create Date: 2026-10-17 21:30:00
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f3d2b7c6e15'
+down_revision: Union[str, Sequence[str], None] = '5e7a9c1d3b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.bulk_insert(table, [{'name': 'checklist_catalog', 'version': 0, 'updated_at': datetime.utcnow()}])
+
+
+def downgrade() -> None:
+    op.drop_table('cache_versions')
@@ -0,0 +1,37 @@
+"""Add stored score summary to checklist_answers
+
+Revision ID: a4c81f0e5d26
+Revises: 7d2e4b8c0a93
+Create Date: 2026-10-17 19:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c81f0e5d26'
+down_revision: Union[str, Sequence[str], None] = '7d2e4b8c0a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # уже отправленные попытки досчитываются скриптом backfill_scores.py
+    with op.batch_alter_table('checklist_answers') as batch_op:
+        batch_op.add_column(sa.Column('total_score', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('total_max', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('percent', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('score_details', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('scored_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('checklist_answers') as batch_op:
+        batch_op.drop_column('scored_at')
+        batch_op.drop_column('score_details')
+        batch_op.drop_column('percent')
+        batch_op.drop_column('total_max')
+        batch_op.drop_column('total_score')
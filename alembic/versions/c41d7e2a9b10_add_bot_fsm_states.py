@@ -0,0 +1,35 @@
+"""Add bot_fsm_states table (persistent FSM storage for the bot)
+
+Revision ID: c41d7e2a9b10
+Revises: 9a2a8c9f17c2, repair_sections_safe
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+# заодно сводим две головы (drafts.department и repair_sections_safe) в одну
+revision: str = 'c41d7e2a9b10'
+down_revision: Union[str, Sequence[str], None] = ('9a2a8c9f17c2', 'repair_sections_safe')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bot_fsm_states',
+        sa.Column('key', sa.String(), primary_key=True),
+        sa.Column('state', sa.String(), nullable=True),
+        sa.Column('data', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_bfs_updated_at', 'bot_fsm_states', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bfs_updated_at', table_name='bot_fsm_states')
+    op.drop_table('bot_fsm_states')
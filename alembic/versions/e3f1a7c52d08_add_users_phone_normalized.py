@@ -0,0 +1,66 @@
+"""Add users.phone_normalized + indexes for name/phone lookup
+
+Revision ID: e3f1a7c52d08
+Revises: c41d7e2a9b10
+Create Date: 2026-10-17 12:00:00
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f1a7c52d08'
+down_revision: Union[str, Sequence[str], None] = 'c41d7e2a9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 1000
+
+
+def _backfill() -> None:
+    """Последние 10 цифр users.phone — считаем в Python, чтобы одинаково работало на Postgres и SQLite."""
+    bind = op.get_bind()
+    users = sa.table(
+        'users',
+        sa.column('id', sa.Integer),
+        sa.column('phone', sa.String),
+        sa.column('phone_normalized', sa.String),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(users.c.id, users.c.phone)
+            .where(users.c.id > last_id, users.c.phone.isnot(None))
+            .order_by(users.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        params = [
+            {"uid": r.id, "norm": re.sub(r"\D", "", r.phone)[-10:] or None}
+            for r in rows
+        ]
+        bind.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam("uid"))
+            .values(phone_normalized=sa.bindparam("norm")),
+            params,
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('phone_normalized', sa.String(length=10), nullable=True))
+    _backfill()
+    op.create_index('ix_users_company_phone_norm', 'users', ['company_id', 'phone_normalized'])
+    op.create_index('ix_users_name_lower', 'users', [sa.text('lower(name)')])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_name_lower', table_name='users')
+    op.drop_index('ix_users_company_phone_norm', table_name='users')
+    op.drop_column('users', 'phone_normalized')
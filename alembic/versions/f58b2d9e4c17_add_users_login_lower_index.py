@@ -0,0 +1,27 @@
+"""Add functional index on lower(users.login)
+
+Revision ID: f58b2d9e4c17
+Revises: e3f1a7c52d08
+Create Date: 2026-10-17 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f58b2d9e4c17'
+down_revision: Union[str, Sequence[str], None] = 'e3f1a7c52d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # не unique: существующие логины могут различаться только регистром
+    op.create_index('ix_users_login_lower', 'users', [sa.text('lower(login)')])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_login_lower', table_name='users')
@@ -1,5 +1,6 @@
 import os
 import csv
+import math
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -8,8 +9,8 @@ from checklist.db.models import User, Position, Role
 from checklist.admcompany.main import company_admin_dashboard
 from checklist.superadmintab import main_superadmin
 
-import bcrypt
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select, update
+from checklist.passwords import LoginThrottled, login_limits, login_throttle, verify_and_upgrade
 
 # ——— cookies
 from streamlit_cookies_manager import EncryptedCookieManager
@@ -51,6 +52,18 @@ if not COOKIE_PASSWORD:
     st.stop()
 init_db()
 
+
+def _auth_query():
+    """Пользователь + название роли одним запросом (вход и восстановление роли)."""
+    return (
+        select(User.id, User.name, User.company_id, User.hashed_password, Role.name.label("role_name"))
+        .select_from(User)
+        .outerjoin(Position, Position.id == User.position_id)
+        .outerjoin(Role, Role.id == Position.role_id)
+        .limit(1)
+    )
+
+
 # ——— Настройка cookies
 cookies = EncryptedCookieManager(prefix="checklist_", password=COOKIE_PASSWORD)
 if not cookies.ready():
@@ -79,14 +92,8 @@ if st.session_state.get("auth") and not st.session_state.get("user_role"):
         if uid:
             db = SessionLocal()
             try:
-                u = (
-                    db.query(User)
-                    .options(joinedload(User.position).joinedload(Position.role))
-                    .get(uid)
-                )
-                st.session_state.user_role = (
-                    u.position.role.name if u and u.position and u.position.role else "employee"
-                )
+                row = db.execute(_auth_query().where(User.id == uid)).first()
+                st.session_state.user_role = (row.role_name if row else None) or "employee"
                 # подстрахуем cookies
                 cookies["user_role"] = st.session_state.user_role or ""
                 cookies.save()
@@ -124,16 +131,26 @@ if not st.session_state.auth:
             st.rerun()
         else:
             # Обычный пользователь
+            limits = login_limits(login)
             db = SessionLocal()
             try:
-                user = (
-                    db.query(User)
-                    .options(joinedload(User.position).joinedload(Position.role))
-                    .filter_by(login=login)
-                    .first()
-                )
-                if user and user.hashed_password and bcrypt.checkpw(pwd.encode(), user.hashed_password.encode()):
-                    role_name = user.position.role.name if (user.position and user.position.role) else "employee"
+                login_throttle.check(limits)
+                # lower(login) — функциональный индекс ix_users_login_lower, как и у бота
+                user = db.execute(
+                    _auth_query().where(func.lower(User.login) == login.strip().lower())
+                ).first()
+                ok, new_hash = verify_and_upgrade(pwd, user.hashed_password) if user else (False, None)
+                if ok and new_hash:
+                    # BCRYPT_ROUNDS поменяли — пересохраняем хеш, пока пароль на руках
+                    db.execute(
+                        update(User)
+                        .where(User.id == user.id, User.hashed_password == user.hashed_password)
+                        .values(hashed_password=new_hash)
+                    )
+                    db.commit()
+                if ok:
+                    login_throttle.success(limits[0][0])
+                    role_name = user.role_name or "employee"
                     is_main_admin = role_name == "Главный администратор"
 
                     st.session_state.auth = True
@@ -154,7 +171,12 @@ if not st.session_state.auth:
                     cookies.save()
                     st.rerun()
                 else:
+                    login_throttle.failure(key for key, _ in limits)
                     st.sidebar.error("Неверный логин или пароль")
+            except LoginThrottled as exc:
+                st.sidebar.error(
+                    f"Слишком много неудачных попыток. Попробуйте через {max(1, math.ceil(exc.retry_after / 60))} мин."
+                )
             finally:
                 db.close()
 else:
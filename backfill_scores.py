@@ -0,0 +1,24 @@
+# backfill_scores.py
+# Досчитывает сохранённый итог (checklist_answers.total_score/…/scored_at) для попыток,
+# отправленных до миграции a4c81f0e5d26. Можно запускать повторно и на живой базе:
+# обрабатываются только строки с scored_at IS NULL, пачками по одной транзакции.
+# --rescore пересчитывает все попытки (после изменения правил в checklist/scoring.py).
+#
+#   python backfill_scores.py [--rescore] [batch_size] [limit]
+import logging
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import checklist.db.models  # noqa: E402,F401  — регистрируем все модели до первого запроса
+from bot.report_data import backfill_attempt_summaries  # noqa: E402
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    args = [arg for arg in sys.argv[1:] if arg != "--rescore"]
+    rescore = len(args) != len(sys.argv) - 1
+    batch_size = int(args[0]) if args else 500
+    limit = int(args[1]) if len(args) > 1 else None
+    print(f"backfilled: {backfill_attempt_summaries(batch_size, limit, rescore=rescore)}")
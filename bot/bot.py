@@ -6,11 +6,18 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 
 # Роутеры
 from .handlers import start, fsm_auth, checklist, fsm_completed, fallback
+from .storage import create_storage
+from .webhook import run_webhook
+from .outbound import install_outbound_scheduler
+from .utils.messages import install_render_tracker
+from .services.executor import db_executor
+from .services.passwords import password_verifier
+from .services.write_buffer import flush_all as flush_draft_writes
+from checklist.db.async_db import dispose_async_engine
 
 # Пытаемся взять токен из config.py, иначе — из .env / окружения
 BOT_TOKEN = None
@@ -38,7 +45,11 @@ def setup_logging() -> None:
 
 
 def build_dispatcher() -> Dispatcher:
-    dp = Dispatcher(storage=MemoryStorage())
+    # FSM-хранилище выбирается через FSM_STORAGE (sql/redis/memory), см. bot/storage
+    storage, events_isolation = create_storage()
+    dp = Dispatcher(storage=storage, events_isolation=events_isolation)
+    # несохранённые правки черновиков (DRAFT_WRITE_BEHIND_MS) пишем до остановки пула БД
+    dp.shutdown.register(flush_draft_writes)
     dp.include_router(start.router)
     dp.include_router(fsm_auth.router)
     dp.include_router(checklist.router)
@@ -54,22 +65,34 @@ async def main() -> None:
         token=BOT_TOKEN,
         default=DefaultBotProperties(parse_mode="HTML"),
     )
+    # лимиты Telegram на исходящие запросы (per-chat и общий), см. bot/outbound.py
+    install_outbound_scheduler(bot)
+    # кэш отрисовки сообщений для edit_message (пропуск правок без изменений)
+    install_render_tracker(bot)
     dp = build_dispatcher()
 
-    # Сбрасываем вебхук и висячие апдейты на старте
-    await bot.delete_webhook(drop_pending_updates=True)
-
     # Разрешаем только те апдейты, которые реально используются роутерами
     allowed = dp.resolve_used_update_types()
 
-    logging.info("🚀 Бот запускается...")
+    # BOT_MODE=webhook — приём через встроенный aiohttp-сервер, см. bot/webhook.py
+    mode = (os.getenv("BOT_MODE") or "polling").strip().lower()
+
+    logging.info("🚀 Бот запускается (%s)...", mode)
     try:
-        await dp.start_polling(bot, allowed_updates=allowed)
+        if mode == "webhook":
+            await run_webhook(bot, dp, allowed_updates=allowed)
+        else:
+            # Сбрасываем вебхук и висячие апдейты на старте
+            await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot, allowed_updates=allowed)
     except Exception as e:
         logging.exception(f"❌ Критическая ошибка бота: {e}")
         raise
     finally:
-        logging.info("🧹 Остановка бота. До встречи!")
+        await dispose_async_engine()
+        db_executor.shutdown(wait=True)
+        password_verifier.shutdown(wait=False)
+        logging.info("🧹 Остановка бота. До встречи! DB: %s", db_executor.stats())
 
 
 if __name__ == "__main__":
@@ -15,6 +15,7 @@ from checklist.db.models.user import User
 
 # Берём SessionLocal из новой структуры
 from checklist.db.db import SessionLocal
+from checklist.db.loaders import CHECKLIST_HEADER
 
 # Модели лежат в checklist/db/models
 from checklist.db.models import (
@@ -56,7 +57,7 @@ def find_user_by_name_phone_company(name: str, phone: str, company_name: Optiona
             )
             .filter(
                 func.lower(User.name) == (name or "").strip().lower(),
-                func.right(User.phone, len(clean)) == clean,
+                User.phone_normalized == clean,
             )
         )
         if company_name:
@@ -202,51 +203,16 @@ def get_answer_report_data(answer_id: int):
         "checklist_name", "date", "time", "department", "result" (или None)
       }
     department берём из департаментов пользователя.
-    result рассчитываем через get_attempt_data, чтобы совпадало с PDF/Excel.
+    result — итог, сохранённый при отправке (тот же подсчёт, что в PDF/Excel).
     """
-    with SessionLocal() as db:
-        ans = db.get(ChecklistAnswer, answer_id)
-        if not ans:
-            return None
-
-        checklist = db.get(Checklist, ans.checklist_id)
-        user = db.get(User, ans.user_id)
-
-        # департаменты пользователя
-        departments = [d.name for d in (user.departments or [])] if user else []
-        department = ", ".join(departments) if departments else "—"
-
-        # базовые поля
-        local_dt = to_moscow(ans.submitted_at)
-        date_str = format_moscow(local_dt, "%d.%m.%Y")
-        time_str = format_moscow(local_dt, "%H:%M")
-        checklist_name = checklist.name if checklist else "—"
-
-        # расчёт результата (используем новую логику из report_data, чтобы совпадало с PDF/Excel)
-        result = None
-        try:
-            attempt_data = get_attempt_data(answer_id)
-        except Exception as exc:
-            logger.warning("[REPORT] get_attempt_data failed for answer_id=%s: %s", answer_id, exc)
-            attempt_data = None
-
-        if attempt_data and attempt_data.is_scored:
-            result = format_attempt_result(attempt_data)
-
-        return {
-            "checklist_name": checklist_name,
-            "date": date_str,
-            "time": time_str,
-            "department": department,
-            "result": result,
-        }
+    return format_attempt_preview(get_attempt_summary(answer_id))
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Служебные методы
 # ──────────────────────────────────────────────────────────────────────────────
 def get_checklist_by_id(checklist_id: int) -> Optional[Checklist]:
     with SessionLocal() as db:
-        return db.get(Checklist, checklist_id)
+        return db.get(Checklist, checklist_id, options=CHECKLIST_HEADER)
 
 
 def get_completed_checklists_for_user(user_id: int) -> List[Dict]:
@@ -266,8 +232,9 @@ def get_completed_checklists_for_user(user_id: int) -> List[Dict]:
         return [{"name": k, "completed_at": v} for k, v in seen.items()]
 
 
+# итог попытки для превью (get_answer_report_data) — сохранённый при отправке, см. report_data
+from .report_data import format_attempt_preview, get_attempt_summary
 # Для обратной совместимости переиспользуем актуальную реализацию из report_data
-from .report_data import AnswerRow, AttemptData, get_attempt_data, format_attempt_result
-from .utils.timezone import format_moscow, to_moscow
+from .report_data import AnswerRow, AttemptData
 
 logger = logging.getLogger(__name__)
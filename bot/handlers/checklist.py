@@ -1,4 +1,3 @@
-import asyncio
 import html
 import logging
 import os
@@ -14,11 +13,13 @@ from aiogram.fsm.context import FSMContext
 from ..states import Form
 from ..services.auth import AuthService
 from ..services.checklists import ChecklistsService
+from ..services.checklist_cache import ChecklistStructure
+from ..services.completed import CompletedService
+from ..utils.messages import delete_messages, edit_message
 from ..keyboards.inline import get_checklists_keyboard
 from ..keyboards.reply import authorized_keyboard
-from .start import send_main_menu
-from ..utils.checklist_mode import group_questions_by_section
-from ..report_data import get_attempt_data, format_attempt_result, AttemptData, AnswerRow
+from .start import restore_session, send_main_menu
+from ..report_data import format_attempt_result, AttemptSummary
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardRemove
 
@@ -26,10 +27,14 @@ router = Router()
 
 auth_service = AuthService()
 checklists_service = ChecklistsService()
+completed_service = CompletedService()
 
 MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", "media"))
 MEDIA_ROOT.mkdir(parents=True, exist_ok=True)
 
+# компактный режим блоков: сколько вопросов показывать на одной странице сообщения
+BLOCK_COMPACT_PAGE_SIZE = max(1, int(os.getenv("BLOCK_COMPACT_PAGE_SIZE", "5")))
+
 logger = logging.getLogger(__name__)
 
 _RESERVED_TEXT_COMMANDS = {
@@ -44,8 +49,6 @@ _RESERVED_TEXT_COMMANDS = {
     "ℹ️ обо мне",
 }
 
-_YESNO_TYPES = {"yesno", "yes_no", "boolean", "bool", "yn"}
-_SCALE_TYPES = {"scale", "rating"}
 
 
 def _escape(text: str | None) -> str:
@@ -148,6 +151,22 @@ async def _store_photo_locally(bot: Bot, file_id: str, attempt_id: int | None, q
     rel_path = MEDIA_ROOT / filename
     return str(rel_path)
 
+
+async def _get_structure(checklist_id: int | None, version: str | None = None) -> ChecklistStructure | None:
+    """Структура чек-листа из общего кэша; в БД идём только при промахе."""
+    if not checklist_id:
+        return None
+    structure = checklists_service.structures.get_cached(checklist_id, version)
+    if structure is None:
+        structure = await checklists_service.get_structure(checklist_id)
+    return structure
+
+
+async def _state_structure(data: dict) -> ChecklistStructure | None:
+    """Структура текущего прохождения: в FSM лежат только checklist_id и checklist_version."""
+    checklist_id = data.get("pending_checklist_id") or data.get("checklist_id")
+    return await _get_structure(checklist_id, data.get("checklist_version"))
+
 @router.message(F.text.startswith("Добро пожаловать"), Form.entering_login)
 async def show_checklists(message: types.Message, state: FSMContext):
     data = await state.get_data()
@@ -156,32 +175,46 @@ async def show_checklists(message: types.Message, state: FSMContext):
         await message.answer("Сначала пройдите авторизацию через /start.")
         return
 
-    checklists = await asyncio.to_thread(auth_service.get_user_checklists, user_id)
+    checklists = await auth_service.get_user_checklists(user_id)
     if not checklists:
         await message.answer("Нет доступных чек-листов.")
         return
-    await state.update_data(checklists_map={str(c["id"]): c["name"] for c in checklists})
     await message.answer("Выберите чек-лист для прохождения:", reply_markup=get_checklists_keyboard(checklists))
     await state.set_state(Form.show_checklists)
 
 
 @router.message(F.text.in_({"✅ Доступные чек-листы", "✅ доступные чек-листы"}))
 async def show_checklists_on_command(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    user_id = data.get("user_id")
-    if not user_id:
+    user = await restore_session(state, message.from_user.id)
+    if not user:
         await message.answer("⚠️ Сначала авторизуйтесь через /start.")
         return
 
-    checklists = await asyncio.to_thread(auth_service.get_user_checklists, user_id)
+    checklists = await auth_service.get_user_checklists(user["id"])
     if not checklists:
         await message.answer("🙁 У вас пока нет доступных чек-листов.")
         return
 
-    await state.update_data(checklists_map={str(c["id"]): c["name"] for c in checklists})
     await message.answer("📋 Доступные чек-листы:", reply_markup=get_checklists_keyboard(checklists))
     await state.set_state(Form.show_checklists)
 
+@router.callback_query(F.data.startswith("checklists_page:"))
+async def handle_checklists_page(callback: types.CallbackQuery, state: FSMContext):
+    raw = callback.data.split(":", 1)[1]
+    data = await state.get_data()
+    user_id = data.get("user_id")
+    if raw == "noop" or not user_id:
+        await callback.answer()
+        return
+
+    checklists = await auth_service.get_user_checklists(user_id)
+    try:
+        await callback.message.edit_reply_markup(reply_markup=get_checklists_keyboard(checklists, page=int(raw)))
+    except (TelegramBadRequest, ValueError):
+        pass
+    await callback.answer()
+
+
 @router.callback_query(F.data.startswith("checklist:"), Form.show_checklists)
 async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
     checklist_id = int(callback.data.split(":")[1])
@@ -191,17 +224,16 @@ async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
         await callback.answer("Авторизуйтесь заново", show_alert=True)
         return
 
-    questions = await asyncio.to_thread(
-        checklists_service.get_questions_for_checklist,
-        checklist_id,
-    )
-    if not questions:
+    structure = await _get_structure(checklist_id)
+    if not structure or not structure.questions:
         await callback.message.answer("У этого чек-листа нет вопросов.")
         await callback.answer()
         return
 
-    checklists_map = data.get("checklists_map", {})
-    checklist_name = checklists_map.get(str(checklist_id)) or f"Чек-лист #{checklist_id}"
+    # имя берём из каталога должности (кэш); checklists_map — из FSM старых сессий
+    catalog = await auth_service.get_user_checklists(user_id)
+    checklist_name = next((c["name"] for c in catalog if c["id"] == checklist_id), None)
+    checklist_name = checklist_name or data.get("checklists_map", {}).get(str(checklist_id)) or f"Чек-лист #{checklist_id}"
 
     draft_attempt_id = None
     existing_attempt_id = data.get("attempt_id")
@@ -209,8 +241,7 @@ async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
     if existing_attempt_id and existing_checklist_id == checklist_id:
         draft_attempt_id = existing_attempt_id
     else:
-        draft_attempt_id = await asyncio.to_thread(
-            checklists_service.find_draft_attempt,
+        draft_attempt_id = await checklists_service.find_draft_attempt(
             user_id,
             checklist_id,
         )
@@ -218,14 +249,12 @@ async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
     answers_from_draft: dict[int, dict[str, Any]] = {}
     draft_department = None
     if draft_attempt_id:
-        draft_answers = await asyncio.to_thread(
-            checklists_service.get_attempt_answers,
+        draft_answers = await checklists_service.get_attempt_answers(
             draft_attempt_id,
         )
         answers_from_draft = _normalize_answers_map(draft_answers)
         answered_count = _count_answered(answers_from_draft)
-        draft_department = await asyncio.to_thread(
-            checklists_service.get_draft_department,
+        draft_department = await checklists_service.get_draft_department(
             draft_attempt_id,
         )
 
@@ -237,9 +266,8 @@ async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
 
     await state.update_data(
         pending_checklist_id=checklist_id,
+        checklist_version=structure.version,
         checklist_name=checklist_name,
-        questions=questions,
-        question_map={q.get("id"): q for q in questions if q.get("id") is not None},
         answers_map=answers_from_draft if answers_from_draft else {},
         current=0,
         attempt_id=None,
@@ -248,7 +276,6 @@ async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
         q_msg_id=None,
         next_actions_msg_id=None,
         exit_confirm_message_id=None,
-        block_sections=None,
         block_question_messages={},
         block_header_message_id=None,
         block_nav_message_id=None,
@@ -263,7 +290,7 @@ async def start_checklist(callback: types.CallbackQuery, state: FSMContext):
         pass
 
     if draft_attempt_id:
-        total_questions = len(questions)
+        total_questions = len(structure.questions)
         resume_lines = [
             f"⏸ У вас уже есть незавершённое прохождение «{_escape(checklist_name)}»."
         ]
@@ -314,7 +341,7 @@ async def handle_resume_new(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     attempt_id = data.get("resume_attempt_id")
     if attempt_id:
-        await asyncio.to_thread(checklists_service.discard, attempt_id)
+        await checklists_service.discard(attempt_id)
 
     try:
         await callback.message.edit_reply_markup(reply_markup=None)
@@ -335,76 +362,20 @@ async def handle_resume_new(callback: types.CallbackQuery, state: FSMContext):
     await callback.answer("Начинаем заново.")
 
 
-def _question_text(question: dict, draft: dict) -> str:
-    """Текст вопроса + индикаторы введённых данных."""
-    base = _escape(str(question.get("text", "")))
-    parts = [base]
-
-    comment_required = bool(question.get("require_comment"))
-    photo_required = bool(question.get("require_photo"))
-    comment_present = bool(draft.get("comment"))
-    photo_present = bool(draft.get("photo_path"))
-
-    req_lines: list[str] = []
-    if comment_required:
-        if comment_present:
-            req_lines.append("✅ Комментарий добавлен")
-        else:
-            req_lines.append("💬 Требуется комментарий")
-    if photo_required:
-        if photo_present:
-            req_lines.append("✅ Фото добавлено")
-        else:
-            req_lines.append("📷 Требуется фото")
-    if req_lines:
-        parts.append("\n".join(req_lines))
-
-    extra = []
-    answer = draft.get("answer")
-    qtype = (question.get("type") or "").lower().strip()
-    if answer is not None:
-        answer_str = str(answer).strip()
-        if answer_str == "":
-            extra.append("🟦 Ответ: <b>—</b>")
-        else:
-            lower = answer_str.lower()
-            yes_values = {"yes", "да", "true", "1"}
-            no_values = {"no", "нет", "false", "0"}
-
-            if qtype in {"yesno", "yes_no", "boolean", "bool", "yn"}:
-                if lower in yes_values:
-                    emoji = "🟩"
-                elif lower in no_values:
-                    emoji = "🟥"
-                else:
-                    emoji = "🟪"
-            elif qtype in {"scale", "rating"}:
-                emoji = "🟨"
-            else:
-                emoji = "🟪"
-
-            extra.append(f"{emoji} Ответ: <b>{_escape(answer_str)}</b>")
-    if comment_present and not comment_required:
-        extra.append("💬 Комментарий добавлен")
-    if photo_present and not photo_required:
-        extra.append("📷 Фото добавлено")
-    if extra:
-        parts.append("\n".join(extra))
-
-    return "\n\n".join(parts)
-
-
-def _resolve_question(data: dict, qid: int | None = None) -> tuple[int | None, dict | None]:
+def _resolve_question(
+    structure: ChecklistStructure | None,
+    data: dict,
+    qid: int | None = None,
+) -> tuple[int | None, dict | None]:
     """Находит вопрос по id или по текущему индексу."""
-    questions = data.get("questions") or []
-    question_map: dict | None = data.get("question_map")
+    if structure is None:
+        return None, None
+    questions = structure.questions
 
     if qid is not None:
-        if question_map and qid in question_map:
-            return qid, question_map[qid]
-        for item in questions:
-            if item.get("id") == qid:
-                return qid, item
+        question = structure.question(qid)
+        if question is not None:
+            return qid, question
         return None, None
 
     current = data.get("current")
@@ -417,25 +388,23 @@ def _resolve_question(data: dict, qid: int | None = None) -> tuple[int | None, d
 def _answers_summary_text(
     questions: list[dict],
     answers_map: dict,
-    attempt_data: AttemptData | None = None,
+    attempt_data: AttemptSummary | None = None,
 ) -> str:
     lines = ["🗂 <b>Ваши ответы:</b>"]
     yes_total = yes_cnt = 0
     scale_vals = []
 
-    rows_by_index: dict[int, AnswerRow] = {}
-    if attempt_data and attempt_data.answers:
-        rows_by_index = {row.number - 1: row for row in attempt_data.answers}
+    question_scores = (attempt_data.question_scores or {}) if attempt_data else {}
 
     for idx, q in enumerate(questions):
         d = answers_map.get(q["id"], {})
         a = d.get("answer")
         answer_text = "—" if a is None else _escape(str(a))
         suffix = ""
-        row = rows_by_index.get(idx)
-        if attempt_data and attempt_data.is_scored and row and row.weight is not None:
-            score_value = row.score if row.score is not None else 0.0
-            suffix = f" ({_fmt_points(score_value)}/{_fmt_points(row.weight)})"
+        score, weight = question_scores.get(str(q["id"]), (None, None))
+        if attempt_data and attempt_data.is_scored and weight is not None:
+            score_value = score if score is not None else 0.0
+            suffix = f" ({_fmt_points(score_value)}/{_fmt_points(weight)})"
         lines.append(f"— {_escape(str(q['text']))}: <b>{answer_text}</b>{suffix}")
         if not attempt_data or not attempt_data.is_scored:
             if q["type"] == "yesno":
@@ -465,35 +434,6 @@ def _answers_summary_text(
 
     return "\n".join(lines)
 
-def build_question_keyboard(question_type: str, current: int, selected: str | None = None) -> InlineKeyboardMarkup:
-    """Обычный режим вопроса (ответ/коммент/фото/далее + назад к предыдущему)."""
-    def mark(label: str, key: str) -> str:
-        # нейтральная метка при выборе
-        return f"• {label}" if selected == key else label
-
-    rows = []
-    if question_type == "yesno":
-        rows.append([
-            InlineKeyboardButton(text=mark("✅ Да",  "yes"), callback_data="answer:yes"),
-            InlineKeyboardButton(text=mark("❌ Нет", "no"),  callback_data="answer:no"),
-        ])
-    elif question_type == "scale":
-        rows.append([InlineKeyboardButton(text=mark(str(i), str(i)), callback_data=f"answer:{i}") for i in range(1, 6)])
-    else:
-        rows.append([InlineKeyboardButton(text=mark("✍️ Ввести текст", "text"), callback_data="answer:text")])
-
-    rows.append([
-        InlineKeyboardButton(text="💬 Комментарий", callback_data=f"comment:{current}"),
-        InlineKeyboardButton(text="📷 Фото",        callback_data=f"photo:{current}"),
-    ])
-    rows.append([
-        InlineKeyboardButton(text="➡️ Далее", callback_data="continue_after_extra"),
-    ])
-    rows.append([
-        InlineKeyboardButton(text="⬅️ Назад к предыдущему", callback_data="prev_question"),
-    ])
-    return InlineKeyboardMarkup(inline_keyboard=rows)
-
 def build_submode_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для подрежимов (ввод комментария/фото)."""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -513,6 +453,7 @@ def _build_mode_keyboard() -> InlineKeyboardMarkup:
         [InlineKeyboardButton(text="👀 Показать весь чек-лист", callback_data="mode:full")],
         [InlineKeyboardButton(text="▶️ Пройти по порядку", callback_data="mode:start")],
         [InlineKeyboardButton(text="🔠 Пройти по блокам", callback_data="mode:blocks")],
+        [InlineKeyboardButton(text="🧾 Блоки одним сообщением", callback_data="mode:blocks_compact")],
         [InlineKeyboardButton(text="⬅️ Выбрать другой объект", callback_data="mode:back")],
     ])
 
@@ -572,53 +513,6 @@ def _build_full_preview_keyboard(index: int, total: int) -> InlineKeyboardMarkup
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def _build_block_question_keyboard(question: dict, qid: int, draft: dict) -> InlineKeyboardMarkup:
-    """Клавиатура для режима прохождения по блокам."""
-    answer = draft.get("answer")
-    answer_str = str(answer).lower() if answer is not None else None
-    comment = draft.get("comment")
-    photo = draft.get("photo_path")
-    qtype = (question.get("type") or "").lower().strip()
-
-    def mark(label: str, match: str) -> str:
-        if answer_str is None:
-            return label
-        if match in {"yes", "no"}:
-            return f"{label}✔" if answer_str == match else label
-        return f"{label}✔" if str(answer) == match else label
-
-    comment_label = "💬✔" if comment else "💬"
-    photo_label = "📷✔" if photo else "📷"
-
-    rows: list[list[InlineKeyboardButton]] = []
-
-    if qtype in _YESNO_TYPES:
-        rows.append([
-            InlineKeyboardButton(text=mark("✅", "yes"), callback_data=f"block_answer:{qid}:yes"),
-            InlineKeyboardButton(text=mark("❌", "no"), callback_data=f"block_answer:{qid}:no"),
-            InlineKeyboardButton(text=comment_label, callback_data=f"block_comment:{qid}"),
-            InlineKeyboardButton(text=photo_label, callback_data=f"block_photo:{qid}"),
-        ])
-    elif qtype in _SCALE_TYPES:
-        rows.append([
-            InlineKeyboardButton(text=mark(str(i), str(i)), callback_data=f"block_answer:{qid}:{i}")
-            for i in range(1, 6)
-        ])
-        rows.append([
-            InlineKeyboardButton(text=comment_label, callback_data=f"block_comment:{qid}"),
-            InlineKeyboardButton(text=photo_label, callback_data=f"block_photo:{qid}"),
-        ])
-    else:
-        answer_label = "✍️✔" if answer not in (None, "") else "✍️"
-        rows.append([
-            InlineKeyboardButton(text=answer_label, callback_data=f"block_answer:{qid}:text"),
-            InlineKeyboardButton(text=comment_label, callback_data=f"block_comment:{qid}"),
-            InlineKeyboardButton(text=photo_label, callback_data=f"block_photo:{qid}"),
-        ])
-
-    return InlineKeyboardMarkup(inline_keyboard=rows)
-
-
 def _build_block_nav_keyboard(index: int, total: int) -> InlineKeyboardMarkup:
     prev_cb = "block_nav:prev" if index > 0 else "block_nav:noop_prev"
     next_cb = "block_nav:next" if index < total - 1 else "block_nav:noop_next"
@@ -635,38 +529,79 @@ def _build_block_nav_keyboard(index: int, total: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-async def _delete_block_question_messages(bot: Bot, chat_id: int, data: dict) -> None:
-    raw = data.get("block_question_messages") or {}
-    if isinstance(raw, dict):
-        message_ids = list(raw.values())
-    elif isinstance(raw, list):
-        message_ids = raw
-    else:
-        message_ids = []
+def _compact_page_count(section: dict) -> int:
+    count = len(section.get("items") or [])
+    return max(1, -(-count // BLOCK_COMPACT_PAGE_SIZE))
 
-    for msg_id in message_ids:
-        if not msg_id:
+
+def _build_block_compact_text(
+    structure: ChecklistStructure, section: dict, index: int, total: int, page: int, answers_map: dict[int, dict]
+) -> str:
+    """Текст компактного блока: заголовок, прогресс и вопросы текущей страницы."""
+    items = section.get("items") or []
+    answered = sum(
+        1 for q in items
+        if q.get("id") is not None and _is_answer_filled((answers_map.get(q["id"]) or {}).get("answer"))
+    )
+    header = "\n".join([
+        f"📂 Блок {index + 1} из {total}",
+        f"<b>{_escape(section.get('title') or 'Без раздела')}</b>",
+        f"Отвечено: {answered} из {len(items)}",
+    ])
+    lines = [header]
+    start = page * BLOCK_COMPACT_PAGE_SIZE
+    for number, question in enumerate(items[start:start + BLOCK_COMPACT_PAGE_SIZE], start=start + 1):
+        rendering = structure.rendering(question.get("id"))
+        if rendering is None:
             continue
-        try:
-            await bot.delete_message(chat_id, msg_id)
-        except Exception:
-            pass
+        draft = answers_map.get(rendering.qid) or {}
+        lines.append(f"<b>{number}.</b> {rendering.text(draft)}")
+    return "\n\n".join(lines)
+
+
+def _build_block_compact_keyboard(
+    structure: ChecklistStructure, section: dict, index: int, total: int, page: int, answers_map: dict[int, dict]
+) -> InlineKeyboardMarkup:
+    """Общая клавиатура блока: строка «номер вопроса × ответы» на каждый вопрос страницы."""
+    items = section.get("items") or []
+    pages = _compact_page_count(section)
+    start = page * BLOCK_COMPACT_PAGE_SIZE
+    rows: list[list[InlineKeyboardButton]] = []
 
+    for number, question in enumerate(items[start:start + BLOCK_COMPACT_PAGE_SIZE], start=start + 1):
+        rendering = structure.rendering(question.get("id"))
+        if rendering is None:
+            continue
+        draft = answers_map.get(rendering.qid) or {}
+        question_rows = rendering.block_keyboard(draft).inline_keyboard
+        label = InlineKeyboardButton(text=f"{number}.", callback_data="block_page:noop")
+        rows.append([label, *question_rows[0]])
+        rows.extend(question_rows[1:])
 
-async def _delete_block_nav_message(bot: Bot, chat_id: int, data: dict) -> None:
-    msg_id = data.get("block_nav_message_id")
-    if not msg_id:
-        return
+    if pages > 1:
+        rows.append([
+            InlineKeyboardButton(text="◀️", callback_data=f"block_page:{page - 1}" if page > 0 else "block_page:noop"),
+            InlineKeyboardButton(text=f"стр. {page + 1}/{pages}", callback_data="block_page:noop"),
+            InlineKeyboardButton(text="▶️", callback_data=f"block_page:{page + 1}" if page < pages - 1 else "block_page:noop"),
+        ])
 
-    try:
-        await bot.delete_message(chat_id, msg_id)
-    except Exception:
-        pass
+    rows.extend(_build_block_nav_keyboard(index, total).inline_keyboard)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _block_question_message_ids(data: dict) -> list[int]:
+    raw = data.get("block_question_messages") or {}
+    if isinstance(raw, dict):
+        return list(raw.values())
+    if isinstance(raw, list):
+        return raw
+    return []
 
 
 async def _render_block(base_message: types.Message, state: FSMContext, target_index: int) -> None:
     data = await state.get_data()
-    sections = data.get("block_sections") or []
+    structure = await _state_structure(data)
+    sections = structure.sections if structure else []
     if not sections:
         await base_message.answer("Нет доступных блоков для этого чек-листа.")
         return
@@ -675,11 +610,15 @@ async def _render_block(base_message: types.Message, state: FSMContext, target_i
     index = max(0, min(target_index, total - 1))
     section = sections[index]
 
+    if data.get("block_layout") == "compact":
+        await _render_block_compact(base_message, state, index, 0)
+        return
+
     bot = base_message.bot
     chat_id = base_message.chat.id
 
-    await _delete_block_nav_message(bot, chat_id, data)
-    await _delete_block_question_messages(bot, chat_id, data)
+    # навигация и вопросы прошлого блока — одним deleteMessages
+    await delete_messages(bot, chat_id, [data.get("block_nav_message_id"), *_block_question_message_ids(data)])
 
     header_lines = [
         f"📂 Блок {index + 1} из {total}",
@@ -744,13 +683,12 @@ async def _render_block(base_message: types.Message, state: FSMContext, target_i
     question_messages: dict[str, int] = {}
 
     for question in section.get("items", []):
-        qid = question.get("id")
-        if qid is None:
+        rendering = structure.rendering(question.get("id"))
+        if rendering is None:
             continue
+        qid = rendering.qid
         draft = answers_map.setdefault(qid, {"answer": None, "comment": None, "photo_path": None})
-        text = _question_text(question, draft)
-        kb = _build_block_question_keyboard(question, qid, draft)
-        sent = await header_msg.answer(text, reply_markup=kb, parse_mode="HTML")
+        sent = await header_msg.answer(rendering.text(draft), reply_markup=rendering.block_keyboard(draft), parse_mode="HTML")
         question_messages[str(qid)] = sent.message_id
 
     try:
@@ -773,10 +711,58 @@ async def _render_block(base_message: types.Message, state: FSMContext, target_i
     )
 
 
+async def _render_block_compact(base_message: types.Message, state: FSMContext, index: int, page: int) -> None:
+    """
+    Компактный режим: весь блок — одно сообщение, которое только редактируется
+    (смена блока, страницы и каждый ответ — один editMessageText).
+    """
+    data = await state.get_data()
+    structure = await _state_structure(data)
+    sections = structure.sections if structure else []
+    if not sections:
+        await base_message.answer("Нет доступных блоков для этого чек-листа.")
+        return
+
+    total = len(sections)
+    index = max(0, min(index, total - 1))
+    section = sections[index]
+    page = max(0, min(page, _compact_page_count(section) - 1))
+
+    answers_map = _normalize_answers_map(data.get("answers_map"))
+    text = _build_block_compact_text(structure, section, index, total, page, answers_map)
+    keyboard = _build_block_compact_keyboard(structure, section, index, total, page, answers_map)
+
+    bot = base_message.bot
+    chat_id = base_message.chat.id
+    msg_id = data.get("block_header_message_id") or base_message.message_id
+
+    try:
+        await edit_message(bot, chat_id, msg_id, text, keyboard, parse_mode="HTML")
+    except TelegramBadRequest:
+        sent = await base_message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+        await delete_messages(bot, chat_id, [msg_id])
+        msg_id = sent.message_id
+
+    await state.update_data(
+        block_index=index,
+        block_page=page,
+        block_header_message_id=msg_id,
+        block_nav_message_id=None,
+        block_question_messages={},
+        answers_map=answers_map,
+        active_question_id=None,
+        return_state=None,
+    )
+
+
 async def _refresh_block_question(message: types.Message, state: FSMContext, qid: int) -> None:
     data = await state.get_data()
-    _, question = _resolve_question(data, qid)
-    if not question:
+    if data.get("block_layout") == "compact":
+        await _render_block_compact(message, state, data.get("block_index") or 0, data.get("block_page") or 0)
+        return
+    structure = await _state_structure(data)
+    rendering = structure.rendering(qid) if structure else None
+    if rendering is None:
         return
 
     answers_map = _normalize_answers_map(data.get("answers_map"))
@@ -794,26 +780,13 @@ async def _refresh_block_question(message: types.Message, state: FSMContext, qid
     if not msg_id:
         return
 
-    kb = _build_block_question_keyboard(question, qid, draft)
-    text = _question_text(question, draft)
+    kb = rendering.block_keyboard(draft)
+    text = rendering.text(draft)
 
     try:
-        await message.bot.edit_message_text(
-            chat_id=message.chat.id,
-            message_id=msg_id,
-            text=text,
-            reply_markup=kb,
-            parse_mode="HTML",
-        )
+        await edit_message(message.bot, message.chat.id, msg_id, text, kb, parse_mode="HTML")
     except TelegramBadRequest:
-        try:
-            await message.bot.edit_message_reply_markup(
-                chat_id=message.chat.id,
-                message_id=msg_id,
-                reply_markup=kb,
-            )
-        except TelegramBadRequest:
-            pass
+        pass
 
     await state.update_data(answers_map=answers_map, active_question_id=None, return_state=None)
 
@@ -821,34 +794,35 @@ async def _refresh_block_question(message: types.Message, state: FSMContext, qid
 async def _finalize_attempt(message: types.Message, state: FSMContext) -> None:
     data = await state.get_data()
     await _clear_exit_confirmation(message.bot, message.chat.id, data, state)
-    questions = data.get("questions") or []
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     answers_map = _normalize_answers_map(data.get("answers_map"))
     attempt_id = data.get("attempt_id")
     selected_department = data.get("selected_department")
 
     attempt_data = None
     if attempt_id:
-        final_attempt_id = await asyncio.to_thread(checklists_service.finish, attempt_id)
+        final_attempt_id = await checklists_service.finish(attempt_id)
         if final_attempt_id:
             attempt_id = final_attempt_id
             try:
-                attempt_data = await asyncio.to_thread(get_attempt_data, final_attempt_id)
+                # итог посчитан и сохранён в finish_attempt — здесь только чтение
+                attempt_data = await completed_service.get_summary(final_attempt_id)
             except Exception as exc:
-                logger.warning("[CHECKLIST] get_attempt_data failed for attempt_id=%s: %s", final_attempt_id, exc)
+                logger.warning("[CHECKLIST] get_summary failed for attempt_id=%s: %s", final_attempt_id, exc)
         else:
             attempt_id = None
 
     await message.answer("✅ Чек-лист завершён. Спасибо!")
 
-    if attempt_data and selected_department:
-        attempt_data.department = selected_department
-
     info_lines = []
     if attempt_data:
+        department = selected_department or attempt_data.department
         info_lines.append(f"📋 <b>{_escape(attempt_data.checklist_name)}</b>")
-        info_lines.append(f"Дата: {attempt_data.submitted_at:%d.%m.%Y %H:%M}")
-        if attempt_data.department:
-            info_lines.append(f"Подразделение: {_escape(attempt_data.department)}")
+        if attempt_data.submitted_at:
+            info_lines.append(f"Дата: {attempt_data.submitted_at:%d.%m.%Y %H:%M}")
+        if department:
+            info_lines.append(f"Подразделение: {_escape(department)}")
         result_line = format_attempt_result(attempt_data)
         if attempt_data.is_scored and result_line:
             info_lines.append(f"Результат: {_escape(result_line)}")
@@ -884,11 +858,12 @@ async def _finalize_attempt(message: types.Message, state: FSMContext) -> None:
         pending_text=None,
         pending_text_msg_id=None,
         q_msg_id=None,
-        block_sections=None,
         block_question_messages={},
         block_header_message_id=None,
         block_nav_message_id=None,
         block_index=None,
+        block_page=None,
+        block_layout=None,
         mode=None,
         active_question_id=None,
         return_state=None,
@@ -962,7 +937,7 @@ async def handle_block_answer(callback: types.CallbackQuery, state: FSMContext):
         return
 
     data = await state.get_data()
-    _, question = _resolve_question(data, qid)
+    _, question = _resolve_question(await _state_structure(data), data, qid)
     if not question:
         await callback.answer("Вопрос не найден", show_alert=True)
         return
@@ -992,7 +967,7 @@ async def handle_block_answer(callback: types.CallbackQuery, state: FSMContext):
 
     attempt_id = data.get("attempt_id")
     if attempt_id:
-        await asyncio.to_thread(checklists_service.save_answer, attempt_id, qid, value)
+        await checklists_service.save_answer(attempt_id, qid, value)
 
     await _refresh_block_question(callback.message, state, qid)
     await state.set_state(Form.answering_block)
@@ -1078,7 +1053,8 @@ async def handle_block_navigation(callback: types.CallbackQuery, state: FSMConte
 
     data = await state.get_data()
     current = data.get("block_index") or 0
-    sections = data.get("block_sections") or []
+    structure = await _state_structure(data)
+    sections = structure.sections if structure else []
 
     if action == "prev":
         target = current - 1
@@ -1098,10 +1074,28 @@ async def handle_block_navigation(callback: types.CallbackQuery, state: FSMConte
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("block_page:"), Form.answering_block)
+async def handle_block_page(callback: types.CallbackQuery, state: FSMContext):
+    raw = callback.data.split(":", 1)[1]
+    try:
+        page = int(raw)
+    except ValueError:
+        await callback.answer()
+        return
+
+    data = await state.get_data()
+    await _render_block_compact(callback.message, state, data.get("block_index") or 0, page)
+    await callback.answer()
+
+
 @router.callback_query(F.data == "block_finish", Form.answering_block)
 async def handle_block_finish(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    questions = data.get("questions") or []
+    structure = await _state_structure(data)
+    if structure is None:
+        await callback.answer("Не удалось загрузить чек-лист", show_alert=True)
+        return
+    questions = structure.questions
     answers_map = _normalize_answers_map(data.get("answers_map"))
 
     for idx, question in enumerate(questions, start=1):
@@ -1129,14 +1123,11 @@ async def handle_block_finish(callback: types.CallbackQuery, state: FSMContext):
             await callback.answer(f"Добавьте обязательное фото к вопросу: {title}", show_alert=True)
             return
 
-    await _delete_block_question_messages(callback.message.bot, callback.message.chat.id, data)
-
-    header_msg_id = data.get("block_header_message_id")
-    if header_msg_id:
-        try:
-            await callback.message.bot.delete_message(callback.message.chat.id, header_msg_id)
-        except Exception:
-            pass
+    await delete_messages(
+        callback.message.bot,
+        callback.message.chat.id,
+        [*_block_question_message_ids(data), data.get("block_header_message_id")],
+    )
 
     try:
         await callback.message.edit_reply_markup(reply_markup=None)
@@ -1192,38 +1183,17 @@ async def _abort_attempt(message: types.Message, state: FSMContext) -> None:
 
     attempt_id = data.get("attempt_id")
     if attempt_id:
-        await asyncio.to_thread(checklists_service.discard, attempt_id)
-
-    q_msg_id = data.get("q_msg_id")
-    if q_msg_id:
-        try:
-            await bot.delete_message(chat_id, q_msg_id)
-        except Exception:
-            pass
-
-    pending_text_msg_id = data.get("pending_text_msg_id")
-    if pending_text_msg_id:
-        try:
-            await bot.delete_message(chat_id, pending_text_msg_id)
-        except Exception:
-            pass
-
-    next_actions_msg_id = data.get("next_actions_msg_id")
-    if next_actions_msg_id:
-        try:
-            await bot.delete_message(chat_id, next_actions_msg_id)
-        except Exception:
-            pass
-
-    await _delete_block_question_messages(bot, chat_id, data)
-    await _delete_block_nav_message(bot, chat_id, data)
-
-    header_id = data.get("block_header_message_id")
-    if header_id:
-        try:
-            await bot.delete_message(chat_id, header_id)
-        except Exception:
-            pass
+        await checklists_service.discard(attempt_id)
+
+    # все служебные сообщения прохождения удаляем пачкой
+    await delete_messages(bot, chat_id, [
+        data.get("q_msg_id"),
+        data.get("pending_text_msg_id"),
+        data.get("next_actions_msg_id"),
+        *_block_question_message_ids(data),
+        data.get("block_nav_message_id"),
+        data.get("block_header_message_id"),
+    ])
 
     await state.update_data(
         attempt_id=None,
@@ -1234,18 +1204,18 @@ async def _abort_attempt(message: types.Message, state: FSMContext) -> None:
         pending_text_msg_id=None,
         next_actions_msg_id=None,
         q_msg_id=None,
-        block_sections=None,
         block_question_messages={},
         block_header_message_id=None,
         block_nav_message_id=None,
         block_index=None,
+        block_page=None,
+        block_layout=None,
         mode=None,
         active_question_id=None,
         return_state=None,
         exit_confirm_message_id=None,
         checklist_id=None,
-        questions=None,
-        question_map=None,
+        checklist_version=None,
         pending_checklist_id=None,
         selected_department=None,
         resume_attempt_id=None,
@@ -1259,11 +1229,8 @@ async def _abort_attempt(message: types.Message, state: FSMContext) -> None:
 
     user_id = data.get("user_id")
     if user_id:
-        checklists = await asyncio.to_thread(auth_service.get_user_checklists, user_id)
+        checklists = await auth_service.get_user_checklists(user_id)
         if checklists:
-            await state.update_data(
-                checklists_map={str(c["id"]): c["name"] for c in checklists},
-            )
             await message.answer("Выберите чек-лист:", reply_markup=get_checklists_keyboard(checklists))
         else:
             await message.answer("У вас пока нет доступных чек-листов.")
@@ -1429,32 +1396,13 @@ async def handle_mode_back(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "mode:full", Form.choosing_checklist_mode)
 async def handle_mode_show_full(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    questions = data.get("questions") or []
-    if not questions:
-        await callback.answer("Нет вопросов для отображения", show_alert=True)
-        return
-
-    sections_payload = []
-    for section in group_questions_by_section(questions):
-        questions_texts = []
-        for q in section["items"]:
-            text = (q.get("text") or q.get("question_text") or "").strip()
-            if not text:
-                text = f"Вопрос #{len(questions_texts) + 1}"
-            questions_texts.append(text)
-        sections_payload.append({
-            "title": section["title"],
-            "questions": questions_texts,
-        })
-
+    structure = await _state_structure(data)
+    sections_payload = structure.preview_sections if structure else []
     if not sections_payload:
         await callback.answer("Нет вопросов для отображения", show_alert=True)
         return
 
-    await state.update_data(
-        full_preview_sections=sections_payload,
-        full_preview_index=0,
-    )
+    await state.update_data(full_preview_index=0)
 
     text = _format_full_preview_page(sections_payload, 0)
     keyboard = _build_full_preview_keyboard(0, len(sections_payload))
@@ -1482,7 +1430,8 @@ async def handle_mode_full_page(callback: types.CallbackQuery, state: FSMContext
         return
 
     data = await state.get_data()
-    sections = data.get("full_preview_sections") or []
+    structure = await _state_structure(data)
+    sections = structure.preview_sections if structure else []
     if not sections:
         await callback.answer("Нет данных для предпросмотра", show_alert=True)
         return
@@ -1507,7 +1456,7 @@ async def handle_mode_full_back(callback: types.CallbackQuery, state: FSMContext
     data = await state.get_data()
     department = data.get("selected_department")
 
-    await state.update_data(full_preview_sections=None, full_preview_index=None)
+    await state.update_data(full_preview_index=None)
     await _safe_delete(callback.message)
 
     if department:
@@ -1519,32 +1468,28 @@ async def handle_mode_full_back(callback: types.CallbackQuery, state: FSMContext
 
 
 @router.callback_query(F.data == "mode:blocks", Form.choosing_checklist_mode)
+@router.callback_query(F.data == "mode:blocks_compact", Form.choosing_checklist_mode)
 async def handle_mode_blocks(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     user_id = data.get("user_id")
     checklist_id = data.get("pending_checklist_id")
-    questions = data.get("questions") or []
+    structure = await _state_structure(data)
     selected_department = data.get("selected_department")
 
-    if not (user_id and checklist_id and questions):
+    if not (user_id and checklist_id and structure and structure.questions):
         await callback.answer("Не удалось подготовить прохождение по блокам", show_alert=True)
         return
 
-    attempt_id = await asyncio.to_thread(
-        checklists_service.start_attempt,
+    attempt_id = await checklists_service.start_attempt(
         user_id,
         checklist_id,
     )
-    answers_map = await asyncio.to_thread(
-        checklists_service.get_attempt_answers,
+    answers_map = await checklists_service.get_attempt_answers(
         attempt_id,
     ) or {}
     answers_map = _normalize_answers_map(answers_map)
 
-    sections = group_questions_by_section(questions)
-    question_map = data.get("question_map") or {
-        q.get("id"): q for q in questions if q.get("id") is not None
-    }
+    sections = structure.sections
 
     try:
         await callback.message.edit_reply_markup(reply_markup=None)
@@ -1560,14 +1505,14 @@ async def handle_mode_blocks(callback: types.CallbackQuery, state: FSMContext):
         selected_department=selected_department,
         attempt_data=None,
         mode="blocks",
-        block_sections=sections,
+        block_layout="compact" if callback.data == "mode:blocks_compact" else "messages",
         block_index=block_start_index,
+        block_page=0,
         block_question_messages={},
         block_header_message_id=None,
         block_nav_message_id=None,
         active_question_id=None,
         return_state=None,
-        question_map=question_map,
         recent_departments=data.get("recent_departments", {}),
         exit_confirm_message_id=None,
         resume_attempt_id=None,
@@ -1576,8 +1521,7 @@ async def handle_mode_blocks(callback: types.CallbackQuery, state: FSMContext):
     )
 
     if selected_department:
-        await asyncio.to_thread(
-            checklists_service.set_draft_department,
+        await checklists_service.set_draft_department(
             attempt_id,
             selected_department,
         )
@@ -1592,25 +1536,23 @@ async def handle_mode_start(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     user_id = data.get("user_id")
     checklist_id = data.get("pending_checklist_id")
-    questions = data.get("questions")
+    structure = await _state_structure(data)
     selected_department = data.get("selected_department")
 
-    if not (user_id and checklist_id and questions):
+    if not (user_id and checklist_id and structure and structure.questions):
         await callback.answer("Не удалось начать прохождение", show_alert=True)
         return
 
-    attempt_id = await asyncio.to_thread(
-        checklists_service.start_attempt,
+    attempt_id = await checklists_service.start_attempt(
         user_id,
         checklist_id,
     )
-    answers_map = await asyncio.to_thread(
-        checklists_service.get_attempt_answers,
+    answers_map = await checklists_service.get_attempt_answers(
         attempt_id,
     ) or {}
     answers_map = _normalize_answers_map(answers_map)
 
-    first_unanswered = _first_unanswered_index(questions, answers_map)
+    first_unanswered = _first_unanswered_index(structure.questions, answers_map)
 
     await state.update_data(
         checklist_id=checklist_id,
@@ -1620,7 +1562,6 @@ async def handle_mode_start(callback: types.CallbackQuery, state: FSMContext):
         selected_department=selected_department,
         attempt_data=None,
         recent_departments=data.get("recent_departments", {}),
-        full_preview_sections=None,
         full_preview_index=None,
         mode="sequence",
         active_question_id=None,
@@ -1632,8 +1573,7 @@ async def handle_mode_start(callback: types.CallbackQuery, state: FSMContext):
     )
 
     if selected_department:
-        await asyncio.to_thread(
-            checklists_service.set_draft_department,
+        await checklists_service.set_draft_department(
             attempt_id,
             selected_department,
         )
@@ -1651,7 +1591,11 @@ async def handle_mode_start(callback: types.CallbackQuery, state: FSMContext):
 
 async def ask_next_question(message: types.Message, state: FSMContext):
     data = await state.get_data()
-    questions = data["questions"]
+    structure = await _state_structure(data)
+    if structure is None:
+        await message.answer("Не удалось загрузить чек-лист. Выберите его заново.")
+        return
+    questions = structure.questions
     current = data["current"]
     answers_map = _normalize_answers_map(data.get("answers_map"))
     q_msg_id = data.get("q_msg_id")
@@ -1668,7 +1612,8 @@ async def ask_next_question(message: types.Message, state: FSMContext):
     draft = answers_map.setdefault(qid, {"answer": None, "comment": None, "photo_path": None})
     await state.update_data(answers_map=answers_map, active_question_id=None, return_state=None)
 
-    text = _question_text(question, draft)
+    rendering = structure.rendering(qid)
+    text = rendering.text(draft)
 
     # какой вариант подсветить точкой
     qtype = question["type"]
@@ -1677,20 +1622,10 @@ async def ask_next_question(message: types.Message, state: FSMContext):
     else:
         selected_key = "text" if draft.get("answer") is not None else None
 
-    kb = build_question_keyboard(qtype, current, selected=selected_key)
+    kb = rendering.keyboard(selected_key)
 
     if q_msg_id:
-        await message.bot.edit_message_text(
-            chat_id=message.chat.id,
-            message_id=q_msg_id,
-            text=text,
-            parse_mode="HTML"
-        )
-        await message.bot.edit_message_reply_markup(
-            chat_id=message.chat.id,
-            message_id=q_msg_id,
-            reply_markup=kb
-        )
+        await edit_message(message.bot, message.chat.id, q_msg_id, text, kb, parse_mode="HTML")
     else:
         sent = await message.answer(text, reply_markup=kb, parse_mode="HTML")
         await state.update_data(q_msg_id=sent.message_id)
@@ -1702,7 +1637,8 @@ async def ask_next_question(message: types.Message, state: FSMContext):
 async def handle_answer(callback: types.CallbackQuery, state: FSMContext):
     value = callback.data.split(":")[1]  # 'yes'/'no' | '1'..'5' | 'text'
     data = await state.get_data()
-    questions = data["questions"]
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     current = data["current"]
     answers_map = _normalize_answers_map(data.get("answers_map"))
     q_msg_id = data.get("q_msg_id")
@@ -1716,15 +1652,12 @@ async def handle_answer(callback: types.CallbackQuery, state: FSMContext):
     if value == "text":
         await state.update_data(active_question_id=qid, return_state=Form.answering_question)
         await state.set_state(Form.manual_text_answer)
-        await callback.bot.edit_message_text(
-            chat_id=callback.message.chat.id,
-            message_id=q_msg_id or callback.message.message_id,
-            text="✍️ Введите ваш ответ текстом:",
-        )
-        await callback.bot.edit_message_reply_markup(
-            chat_id=callback.message.chat.id,
-            message_id=q_msg_id or callback.message.message_id,
-            reply_markup=build_submode_keyboard()
+        await edit_message(
+            callback.bot,
+            callback.message.chat.id,
+            q_msg_id or callback.message.message_id,
+            "✍️ Введите ваш ответ текстом:",
+            build_submode_keyboard(),
         )
         await callback.answer()
         return
@@ -1737,29 +1670,23 @@ async def handle_answer(callback: types.CallbackQuery, state: FSMContext):
     await state.update_data(answers_map=answers_map)
 
     if attempt_id:
-        await asyncio.to_thread(checklists_service.save_answer, attempt_id, qid, value)
+        await checklists_service.save_answer(attempt_id, qid, value)
 
-    kb = build_question_keyboard(question["type"], current, selected=value)
-    text = _question_text(question, draft)
+    rendering = structure.rendering(qid)
+    kb = rendering.keyboard(value)
+    text = rendering.text(draft)
 
     try:
-        await callback.bot.edit_message_text(
-            chat_id=callback.message.chat.id,
-            message_id=q_msg_id or callback.message.message_id,
-            text=text,
-            reply_markup=kb,
+        await edit_message(
+            callback.bot,
+            callback.message.chat.id,
+            q_msg_id or callback.message.message_id,
+            text,
+            kb,
             parse_mode="HTML",
         )
     except TelegramBadRequest:
-        # если текст не изменился — обновим хотя бы клавиатуру
-        try:
-            await callback.bot.edit_message_reply_markup(
-                chat_id=callback.message.chat.id,
-                message_id=q_msg_id or callback.message.message_id,
-                reply_markup=kb
-            )
-        except TelegramBadRequest:
-            pass
+        pass
 
     await callback.answer("Ответ записан. Можно добавить комментарий/фото или нажать «Далее».")
 
@@ -1774,7 +1701,7 @@ async def _safe_delete(msg: types.Message):
 
 async def _save_text_answer(message: types.Message, state: FSMContext, text_answer: str, *, delete_message: bool = True):
     data = await state.get_data()
-    qid, question = _resolve_question(data, data.get("active_question_id"))
+    qid, question = _resolve_question(await _state_structure(data), data, data.get("active_question_id"))
     if not qid or not question:
         return
 
@@ -1784,7 +1711,7 @@ async def _save_text_answer(message: types.Message, state: FSMContext, text_answ
 
     attempt_id = data.get("attempt_id")
     if attempt_id:
-        await asyncio.to_thread(checklists_service.save_answer, attempt_id, qid, text_answer)
+        await checklists_service.save_answer(attempt_id, qid, text_answer)
 
     if delete_message:
         await _safe_delete(message)
@@ -1802,7 +1729,7 @@ async def _save_text_answer(message: types.Message, state: FSMContext, text_answ
 
 async def _save_comment_text(message: types.Message, state: FSMContext, comment_text: str, *, delete_message: bool = True):
     data = await state.get_data()
-    qid, question = _resolve_question(data, data.get("active_question_id"))
+    qid, question = _resolve_question(await _state_structure(data), data, data.get("active_question_id"))
     if not qid or not question:
         return
 
@@ -1812,7 +1739,7 @@ async def _save_comment_text(message: types.Message, state: FSMContext, comment_
 
     attempt_id = data.get("attempt_id")
     if attempt_id:
-        await asyncio.to_thread(checklists_service.save_comment, attempt_id, qid, comment_text)
+        await checklists_service.save_comment(attempt_id, qid, comment_text)
 
     if delete_message:
         await _safe_delete(message)
@@ -1842,7 +1769,8 @@ async def handle_manual_text_answer(message: types.Message, state: FSMContext):
 async def handle_comment_button(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     q_msg_id = data.get("q_msg_id")
-    questions = data.get("questions") or []
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     current = data.get("current")
     qid = None
     if current is not None and 0 <= current < len(questions):
@@ -1855,15 +1783,12 @@ async def handle_comment_button(callback: types.CallbackQuery, state: FSMContext
         return_state=Form.answering_question,
     )
 
-    await callback.bot.edit_message_text(
-        chat_id=callback.message.chat.id,
-        message_id=q_msg_id or callback.message.message_id,
-        text="💬 Введите ваш комментарий:",
-    )
-    await callback.bot.edit_message_reply_markup(
-        chat_id=callback.message.chat.id,
-        message_id=q_msg_id or callback.message.message_id,
-        reply_markup=build_submode_keyboard()
+    await edit_message(
+        callback.bot,
+        callback.message.chat.id,
+        q_msg_id or callback.message.message_id,
+        "💬 Введите ваш комментарий:",
+        build_submode_keyboard(),
     )
     await callback.answer()
 
@@ -1884,7 +1809,7 @@ async def _attach_photo_to_current_question(message: types.Message, state: FSMCo
         await message.answer("Пожалуйста, отправьте фото.")
         return
 
-    qid, question = _resolve_question(data, data.get("active_question_id"))
+    qid, question = _resolve_question(await _state_structure(data), data, data.get("active_question_id"))
     if not qid or not question:
         await message.answer("Не удалось определить вопрос для фото.")
         return
@@ -1897,7 +1822,7 @@ async def _attach_photo_to_current_question(message: types.Message, state: FSMCo
     await state.update_data(answers_map=answers_map)
 
     if attempt_id:
-        await asyncio.to_thread(checklists_service.save_photo, attempt_id, qid, photo_value)
+        await checklists_service.save_photo(attempt_id, qid, photo_value)
 
     await _safe_delete(message)
 
@@ -1926,7 +1851,8 @@ async def handle_direct_text(message: types.Message, state: FSMContext):
         return
 
     data = await state.get_data()
-    questions = data.get("questions") or []
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     current = data.get("current")
     if current is None or current >= len(questions):
         await _safe_delete(message)
@@ -1955,7 +1881,8 @@ async def handle_direct_text(message: types.Message, state: FSMContext):
 async def handle_photo_button(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     q_msg_id = data.get("q_msg_id")
-    questions = data.get("questions") or []
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     current = data.get("current")
     qid = None
     if current is not None and 0 <= current < len(questions):
@@ -1967,15 +1894,12 @@ async def handle_photo_button(callback: types.CallbackQuery, state: FSMContext):
         submode="photo",
     )
 
-    await callback.bot.edit_message_text(
-        chat_id=callback.message.chat.id,
-        message_id=q_msg_id or callback.message.message_id,
-        text="📷 Отправьте фото:",
-    )
-    await callback.bot.edit_message_reply_markup(
-        chat_id=callback.message.chat.id,
-        message_id=q_msg_id or callback.message.message_id,
-        reply_markup=build_submode_keyboard()
+    await edit_message(
+        callback.bot,
+        callback.message.chat.id,
+        q_msg_id or callback.message.message_id,
+        "📷 Отправьте фото:",
+        build_submode_keyboard(),
     )
     await callback.answer()
 
@@ -2031,7 +1955,8 @@ async def handle_back_to_question(callback: types.CallbackQuery, state: FSMConte
 @router.callback_query(F.data == "continue_after_extra")
 async def handle_continue_after_extra(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    questions = data["questions"]
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     current = data["current"]
     answers_map = _normalize_answers_map(data.get("answers_map"))
     q_msg_id = data.get("q_msg_id")
@@ -2123,7 +2048,8 @@ async def handle_hint(callback: types.CallbackQuery):
 @router.callback_query(F.data == "show_details")
 async def handle_show_details(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
-    questions = data["questions"]
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     answers_map = _normalize_answers_map(data.get("answers_map"))
 
     lines = ["🔍 <b>Подробные ответы:</b>"]
@@ -2152,10 +2078,13 @@ async def handle_show_details(callback: types.CallbackQuery, state: FSMContext):
 async def handle_show_answers_here(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     msg_id = data.get("next_actions_msg_id")
-    questions = data.get("questions", [])
+    structure = await _state_structure(data)
+    questions = structure.questions if structure else []
     answers_map = _normalize_answers_map(data.get("answers_map"))
 
     attempt_data = data.get("attempt_data")
+    if not isinstance(attempt_data, AttemptSummary):
+        attempt_data = None  # состояние, сохранённое до перехода на AttemptSummary
     text = _answers_summary_text(questions, answers_map, attempt_data=attempt_data)
 
     kb = InlineKeyboardMarkup(inline_keyboard=[
@@ -2163,17 +2092,7 @@ async def handle_show_answers_here(callback: types.CallbackQuery, state: FSMCont
     ])
 
     if msg_id:
-        await callback.bot.edit_message_text(
-            chat_id=callback.message.chat.id,
-            message_id=msg_id,
-            text=text,
-            parse_mode="HTML"
-        )
-        await callback.bot.edit_message_reply_markup(
-            chat_id=callback.message.chat.id,
-            message_id=msg_id,
-            reply_markup=kb
-        )
+        await edit_message(callback.bot, callback.message.chat.id, msg_id, text, kb, parse_mode="HTML")
     else:
         # запасной вариант, если msg_id потеряли
         await callback.message.answer(text, parse_mode="HTML", reply_markup=kb)
@@ -2191,16 +2110,7 @@ async def handle_back_to_next_actions(callback: types.CallbackQuery, state: FSMC
     ])
 
     if msg_id:
-        await callback.bot.edit_message_text(
-            chat_id=callback.message.chat.id,
-            message_id=msg_id,
-            text="Что дальше?"
-        )
-        await callback.bot.edit_message_reply_markup(
-            chat_id=callback.message.chat.id,
-            message_id=msg_id,
-            reply_markup=next_kb
-        )
+        await edit_message(callback.bot, callback.message.chat.id, msg_id, "Что дальше?", next_kb)
     else:
         await callback.message.answer("Что дальше?", reply_markup=next_kb)
 
@@ -1,8 +1,8 @@
 """Основные FSM-хэндлеры бота."""
 
-import asyncio
 import json
 import logging
+import math
 import os
 import tempfile
 import uuid
@@ -14,6 +14,8 @@ from aiogram.exceptions import TelegramBadRequest, SkipHandler
 from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile
 
+from checklist.passwords import LoginThrottled
+
 from ..bot_logic import (
     get_checklists_for_user,
     get_completed_checklists_for_user,
@@ -197,7 +199,16 @@ async def confirm_user(message: types.Message, state: FSMContext):
     login = data.get("login", "").strip()
     password = data.get("password", "")
 
-    user = await asyncio.to_thread(auth_service.authenticate, login, password)
+    try:
+        user = await auth_service.authenticate(login, password, chat_id=message.chat.id)
+    except LoginThrottled as exc:
+        minutes = max(1, math.ceil(exc.retry_after / 60))
+        await message.answer(
+            f"⏳ Слишком много неудачных попыток входа. Попробуйте через {minutes} мин."
+        )
+        await state.update_data(password=None)
+        await state.set_state(Form.entering_login)
+        return
 
     if user:
         await state.update_data(user_id=user["id"], user=user, password=None)
@@ -1,19 +1,22 @@
 # handlers/fsm_auth.py — авторизация, профиль, выход
-import asyncio
 import html
+import math
 
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from checklist.passwords import LoginThrottled
+
 from ..states import Form
-from ..services.auth import AuthService                      # ← сервис-слой вместо прямых вызовов bot_logic
+from ..services.auth import AuthService     # ← сервис-слой вместо прямых вызовов bot_logic
 from ..keyboards.inline import (
     get_identity_confirmation_keyboard,
     get_checklists_keyboard,
 )
 from ..keyboards.reply import authorized_keyboard
+from .start import restore_session, send_main_menu
 
 router = Router()
 auth_service = AuthService()
@@ -25,6 +28,18 @@ def _escape(text: str | None) -> str:
 
 @router.callback_query(F.data == "start_checklist")
 async def ask_login(callback: types.CallbackQuery, state: FSMContext):
+    # аккаунт Telegram уже привязан — пароль не спрашиваем
+    user = await restore_session(state, callback.from_user.id)
+    if user:
+        await send_main_menu(callback.message)
+        checklists = await auth_service.get_user_checklists(user["id"])
+        if checklists:
+            await callback.message.answer("Выберите чек-лист:", reply_markup=get_checklists_keyboard(checklists))
+        else:
+            await callback.message.answer("У вас пока нет доступных чек-листов.")
+        await callback.answer()
+        return
+
     await callback.message.answer("Введите ваш логин:")
     await state.set_state(Form.entering_login)
     await callback.answer()
@@ -47,7 +62,16 @@ async def confirm_user(message: types.Message, state: FSMContext):
     login = data.get("login", "").strip()
     password = data.get("password", "")
 
-    user = await asyncio.to_thread(auth_service.authenticate, login, password)
+    try:
+        user = await auth_service.authenticate(login, password, chat_id=message.chat.id)
+    except LoginThrottled as exc:
+        minutes = max(1, math.ceil(exc.retry_after / 60))
+        await message.answer(
+            f"⏳ Слишком много неудачных попыток входа. Попробуйте через {minutes} мин."
+        )
+        await state.update_data(password=None)
+        await state.set_state(Form.entering_login)
+        return
 
     if user:
         await state.update_data(user_id=user["id"], user=user)
@@ -82,6 +106,10 @@ async def identity_approved(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     user_id = data.get("user_id")
 
+    # следующий /start (в т.ч. после перезапуска бота) войдёт по telegram_id
+    if user_id:
+        await auth_service.bind_telegram(user_id, callback.from_user.id)
+
     await callback.message.answer(
         "✅ Авторизация прошла успешно. Главное меню появилось снизу 👇",
         reply_markup=authorized_keyboard,
@@ -117,8 +145,7 @@ async def identity_rejected(callback: types.CallbackQuery, state: FSMContext):
 # ℹ️ Профиль
 @router.message((F.text == "ℹ️ Обо мне") | (F.text == "ℹ️ обо мне"))
 async def show_user_info(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    user = data.get("user")
+    user = await restore_session(state, message.from_user.id)
 
     if not user:
         await message.answer("⚠️ Вы не авторизованы.")
@@ -150,6 +177,7 @@ async def handle_logout(message: types.Message, state: FSMContext):
     # исправленный относительный импорт!
     from ..keyboards.inline import get_start_keyboard
 
+    await auth_service.unbind_telegram(message.from_user.id)
     await state.clear()
     await message.answer("🚪 Вы вышли из системы.")
 
@@ -10,11 +10,12 @@ from aiogram.types import (
     FSInputFile,
 )
 
-from ..services.completed import CompletedService         # сервис вместо прямых вызовов bot_logic
+from ..services.completed import CompletedPage, CompletedService  # сервис вместо прямых вызовов bot_logic
 from ..export import export_attempt_to_files
 from ..utils.media import hydrate_photos_for_attempt      # вынесенный хелпер
 from ..utils.timezone import format_moscow, to_moscow
 from ..utils.export_helpers import prepare_attempt_for_export
+from .start import restore_session
 
 router = Router()
 completed_service = CompletedService()
@@ -26,28 +27,28 @@ completed_service = CompletedService()
 PAGE_LIMIT = 8  # показываем по 8 на страницу
 
 
-def _build_completed_list_text(items, offset: int) -> str:
-    if not items:
+def _build_completed_list_text(page: CompletedPage) -> str:
+    if not page.items:
         return "Пока нет пройденных чек-листов."
-    lines = ["Ваши последние чек-листы:\n"]
-    for i, it in enumerate(items, start=1):
-        idx = offset + i  # глобальная нумерация: 1..N
+    lines = [f"Ваши последние чек-листы (всего {page.total}):\n"]
+    for i, it in enumerate(page.items, start=1):
+        idx = page.position + i  # глобальная нумерация: 1..N
         dt = format_moscow(it["submitted_at"], "%d.%m.%Y %H:%M")
         lines.append(f"{idx}. {it['checklist_name']} — {dt}")
     return "\n".join(lines)
 
 
-def _build_completed_list_kb(items, offset: int, total: int) -> InlineKeyboardMarkup:
+def _build_completed_list_kb(page: CompletedPage) -> InlineKeyboardMarkup:
     kb_rows = []
 
     # Кнопки с номерами текущих карточек (по 4 в ряд)
     number_buttons = []
-    for i, it in enumerate(items, start=1):
-        idx = offset + i
+    for i, it in enumerate(page.items, start=1):
+        idx = page.position + i
         number_buttons.append(
             InlineKeyboardButton(
                 text=str(idx),
-                callback_data=f"completed_view:{it['answer_id']}:{offset}",
+                callback_data=f"completed_view:{it['answer_id']}:{page.cursor}",
             )
         )
         if len(number_buttons) == 4:
@@ -56,91 +57,57 @@ def _build_completed_list_kb(items, offset: int, total: int) -> InlineKeyboardMa
     if number_buttons:
         kb_rows.append(number_buttons)
 
-    # Навигация страниц (если всего больше лимита)
-    if total > PAGE_LIMIT:
-        nav_row = []
-        if offset > 0:
-            nav_row.append(
-                InlineKeyboardButton(
-                    text="⟵ Назад",
-                    callback_data=f"completed_page:{max(0, offset - PAGE_LIMIT)}",
-                )
-            )
-        if offset + PAGE_LIMIT < total:
-            nav_row.append(
-                InlineKeyboardButton(
-                    text="Вперёд ⟶",
-                    callback_data=f"completed_page:{offset + PAGE_LIMIT}",
-                )
-            )
-        if nav_row:
-            kb_rows.append(nav_row)
+    # Навигация страниц: курсоры keyset-пагинации (см. services/completed.py)
+    nav_row = []
+    if page.prev_cursor:
+        nav_row.append(InlineKeyboardButton(text="⟵ Назад", callback_data=f"completed_page:{page.prev_cursor}"))
+    if page.next_cursor:
+        nav_row.append(InlineKeyboardButton(text="Вперёд ⟶", callback_data=f"completed_page:{page.next_cursor}"))
+    if nav_row:
+        kb_rows.append(nav_row)
 
     return InlineKeyboardMarkup(inline_keyboard=kb_rows)
 
 
 @router.message((F.text == "📋 Пройденные чек-листы") | (F.text == "📋 пройденные чек-листы"))
 async def handle_completed_list(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    user_id = data.get("user_id")
-
-    if not user_id:
+    user = await restore_session(state, message.from_user.id)
+    if not user:
         await message.answer("⚠️ Сначала нужно авторизоваться.")
         return
 
-    offset = 0
-    items, total = await asyncio.to_thread(
-        completed_service.get_paginated,
-        user_id,
-        offset,
-        PAGE_LIMIT,
-    )
+    page = await completed_service.get_page(user["id"], "", PAGE_LIMIT)
 
-    if total == 0:
+    if not page.items:
         await message.answer("🕵️‍♂️ Вы ещё не проходили ни одного чек-листа.")
         return
 
-    text = _build_completed_list_text(items, offset)
-    kb = _build_completed_list_kb(items, offset, total)
-    await message.answer(text, reply_markup=kb)
+    await message.answer(_build_completed_list_text(page), reply_markup=_build_completed_list_kb(page))
 
 
 @router.callback_query(F.data.startswith("completed_page:"))
 async def handle_completed_page(callback: types.CallbackQuery, state: FSMContext):
-    data = await state.get_data()
-    user_id = data.get("user_id")
-
-    if not user_id:
+    # формат: completed_page:<курсор>
+    user = await restore_session(state, callback.from_user.id)
+    if not user:
         await callback.answer("Не авторизованы", show_alert=True)
         return
 
-    try:
-        offset = int(callback.data.split(":")[1])
-    except Exception:
-        offset = 0
-
-    items, total = await asyncio.to_thread(
-        completed_service.get_paginated,
-        user_id,
-        offset,
-        PAGE_LIMIT,
-    )
-
-    text = _build_completed_list_text(items, offset)
-    kb = _build_completed_list_kb(items, offset, total)
+    cursor = callback.data.split(":", 1)[1]
+    page = await completed_service.get_page(user["id"], cursor, PAGE_LIMIT)
 
-    await callback.message.edit_text(text, reply_markup=kb)
+    await callback.message.edit_text(_build_completed_list_text(page), reply_markup=_build_completed_list_kb(page))
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("completed_view:"))
 async def handle_completed_view(callback: types.CallbackQuery, state: FSMContext):
-    # формат: completed_view:<answer_id>:<offset>
+    # формат: completed_view:<answer_id>:<курсор страницы списка>
     parts = callback.data.split(":")
     answer_id = int(parts[1])
-    offset = int(parts[2]) if len(parts) > 2 else 0
+    cursor = parts[2] if len(parts) > 2 else ""
 
-    preview = await asyncio.to_thread(completed_service.get_report_preview, answer_id)
+    preview = await completed_service.get_report_preview(answer_id)
     try:
         state_data = await state.get_data()
     except Exception:
@@ -164,10 +131,10 @@ async def handle_completed_view(callback: types.CallbackQuery, state: FSMContext
     kb = InlineKeyboardMarkup(
         inline_keyboard=[
             [
-                InlineKeyboardButton(text="📄 PDF", callback_data=f"completed_pdf:{answer_id}:{offset}"),
-                InlineKeyboardButton(text="📊 Excel", callback_data=f"completed_excel:{answer_id}:{offset}"),
+                InlineKeyboardButton(text="📄 PDF", callback_data=f"completed_pdf:{answer_id}:{cursor}"),
+                InlineKeyboardButton(text="📊 Excel", callback_data=f"completed_excel:{answer_id}:{cursor}"),
             ],
-            [InlineKeyboardButton(text="⬅️ Назад к списку", callback_data=f"completed_page:{offset}")],
+            [InlineKeyboardButton(text="⬅️ Назад к списку", callback_data=f"completed_page:{cursor}")],
         ]
     )
 
@@ -177,15 +144,14 @@ async def handle_completed_view(callback: types.CallbackQuery, state: FSMContext
 
 @router.callback_query(F.data.startswith("completed_pdf:"))
 async def handle_completed_pdf(callback: types.CallbackQuery, state: FSMContext):
-    # формат: completed_pdf:<answer_id>:<offset>
+    # формат: completed_pdf:<answer_id>:<курсор списка>
     parts = callback.data.split(":")
     answer_id = int(parts[1])
-    # offset = int(parts[2]) if len(parts) > 2 else 0  # если нужно — можно использовать
 
     await callback.answer()  # закрыть «часики»
 
     # 1) Собираем данные попытки из БД
-    data = await asyncio.to_thread(completed_service.get_attempt, answer_id)
+    data = await completed_service.get_attempt(answer_id)
     state_data = await state.get_data()
     override = (state_data.get("recent_departments") or {}).get(str(answer_id))
     if data:
@@ -215,14 +181,13 @@ async def handle_completed_pdf(callback: types.CallbackQuery, state: FSMContext)
 
 @router.callback_query(F.data.startswith("completed_excel:"))
 async def handle_completed_excel(callback: types.CallbackQuery, state: FSMContext):
-    # формат: completed_excel:<answer_id>:<offset>
+    # формат: completed_excel:<answer_id>:<курсор списка>
     parts = callback.data.split(":")
     answer_id = int(parts[1])
-    # offset = int(parts[2]) if len(parts) > 2 else 0
 
     await callback.answer()
 
-    data = await asyncio.to_thread(completed_service.get_attempt, answer_id)
+    data = await completed_service.get_attempt(answer_id)
     state_data = await state.get_data()
     override = (state_data.get("recent_departments") or {}).get(str(answer_id))
     if data:
@@ -1,6 +1,7 @@
 # handlers/start.py
 
-import asyncio
+
+from typing import Any, Dict, Optional
 
 from aiogram import Router, types, F
 from aiogram.filters import CommandStart
@@ -9,12 +10,29 @@ from aiogram.fsm.context import FSMContext
 from ..keyboards.inline import get_start_keyboard, get_checklists_keyboard
 from ..keyboards.reply import authorized_keyboard
 from ..services.auth import AuthService
+from ..states import Form
 
 router = Router()  # ✅ ОБЯЗАТЕЛЬНО добавить
 
 auth_service = AuthService()
 
 
+async def restore_session(state: FSMContext, telegram_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Пользователь из FSM, а если его там нет (перезапуск бота, сброс состояния) —
+    по привязанному telegram_id, без логина и пароля. None — нужна авторизация.
+    """
+    data = await state.get_data()
+    if data.get("user_id"):
+        return data.get("user") or {"id": data["user_id"]}
+
+    user = await auth_service.find_by_telegram(telegram_id)
+    if user:
+        await state.update_data(user_id=user["id"], user=user)
+        await state.set_state(Form.show_checklists)
+    return user
+
+
 async def send_main_menu(message: types.Message):
     await message.answer(
         "👋 Добро пожаловать в основное меню!",
@@ -23,11 +41,10 @@ async def send_main_menu(message: types.Message):
 
 @router.message(CommandStart())
 async def handle_start(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    user_id = data.get("user_id")
+    user = await restore_session(state, message.from_user.id)
 
-    if user_id:
-        checklists = await asyncio.to_thread(auth_service.get_user_checklists, user_id)
+    if user:
+        checklists = await auth_service.get_user_checklists(user["id"])
         await send_main_menu(message)
         if checklists:
             await message.answer("Выберите чек-лист:", reply_markup=get_checklists_keyboard(checklists))
@@ -44,9 +61,8 @@ async def handle_start(message: types.Message, state: FSMContext):
 
 @router.message(F.text == "🏠 Домой")
 async def handle_home(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    user_id = data.get("user_id")
-    if not user_id:
+    user = await restore_session(state, message.from_user.id)
+    if not user:
         await message.answer("⚠️ Сначала нужно авторизоваться через /start", reply_markup=get_start_keyboard())
         return
 
@@ -38,13 +38,31 @@ def get_scale_keyboard():
         ]
     )
 
-def get_checklists_keyboard(checklists: list[dict]):
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=cl["name"], callback_data=f"checklist:{cl['id']}")]
-            for cl in checklists
-        ]
-    )
+CHECKLISTS_PAGE_SIZE = 8
+
+
+def get_checklists_keyboard(checklists: list[dict], page: int = 0, page_size: int = CHECKLISTS_PAGE_SIZE):
+    """Список чек-листов постранично; листание — callback checklists_page:<n>."""
+    pages = max(1, -(-len(checklists) // page_size))
+    page = max(0, min(page, pages - 1))
+    start = page * page_size
+    rows = [
+        [InlineKeyboardButton(text=cl["name"], callback_data=f"checklist:{cl['id']}")]
+        for cl in checklists[start:start + page_size]
+    ]
+    if pages > 1:
+        rows.append([
+            InlineKeyboardButton(
+                text="◀️",
+                callback_data=f"checklists_page:{page - 1}" if page > 0 else "checklists_page:noop",
+            ),
+            InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data="checklists_page:noop"),
+            InlineKeyboardButton(
+                text="▶️",
+                callback_data=f"checklists_page:{page + 1}" if page < pages - 1 else "checklists_page:noop",
+            ),
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 def get_identity_confirmation_keyboard():
     return InlineKeyboardMarkup(
         inline_keyboard=[
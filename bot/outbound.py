@@ -0,0 +1,199 @@
+# bot/outbound.py
+# Планировщик исходящих запросов к Telegram: token bucket на чат и общий на бота,
+# с учётом retry_after. Ставится middleware-ом на сессию бота, поэтому охватывает
+# все send_message / edit_message_* / delete_message и прочие методы с chat_id.
+#
+#   OUTBOUND_ENABLED      = 1 (по умолчанию) | 0
+#   OUTBOUND_GLOBAL_RATE  = запросов в секунду на бота (Telegram: ~30 сообщений/с)
+#   OUTBOUND_CHAT_RATE    = запросов в секунду в личный чат (Telegram: ~1/с, короткие всплески допустимы)
+#   OUTBOUND_CHAT_BURST   = сколько запросов в чат можно отправить залпом
+#   OUTBOUND_GROUP_RATE   = запросов в минуту в группу (Telegram: 20/мин)
+#   OUTBOUND_MAX_RETRIES  = сколько раз повторяем запрос после 429
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_ENABLED = (os.getenv("OUTBOUND_ENABLED") or "1").strip() not in {"0", "false", "no", "off"}
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = int(os.getenv("OUTBOUND_CHAT_BURST", "20"))
+OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", "20"))
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+_MAX_IDLE_BUCKETS = 10_000
+
+
+class TokenBucket:
+    """Асинхронный token bucket. Ожидающие обслуживаются по очереди (asyncio.Lock — FIFO)."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Ждёт токен; возвращает, сколько секунд пришлось ждать."""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return now - started
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Telegram ответил retry_after — не отправляем ничего до его истечения."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def idle(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        return not self.waiting and self.tokens >= self.capacity and now >= self.paused_until
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Request-middleware сессии бота: bot.session.middleware(OutboundScheduler())."""
+
+    def __init__(
+        self,
+        global_rate: float = OUTBOUND_GLOBAL_RATE,
+        chat_rate: float = OUTBOUND_CHAT_RATE,
+        chat_burst: int = OUTBOUND_CHAT_BURST,
+        group_rate_per_minute: float = OUTBOUND_GROUP_RATE,
+        max_retries: int = OUTBOUND_MAX_RETRIES,
+    ) -> None:
+        self.global_bucket = TokenBucket(global_rate, int(global_rate) or 1)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate_per_minute / 60
+        self.max_retries = max_retries
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._in_flight = 0
+        self._sent = 0
+        self._retries = 0
+        self._retry_after_total = 0.0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= _MAX_IDLE_BUCKETS:
+                self._prune()
+            is_group = isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0)
+            if is_group:
+                bucket = TokenBucket(self.group_rate, max(1, int(self.group_rate * 60)))
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self) -> None:
+        for chat_id in [cid for cid, bucket in self._chats.items() if bucket.idle()]:
+            del self._chats[chat_id]
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # answerCallbackQuery, getMe и т.п. — без очереди
+            return await make_request(bot, method)
+
+        chat_bucket = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            waited = await chat_bucket.acquire()
+            waited += await self.global_bucket.acquire()
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+            self._in_flight += 1
+            try:
+                response = await make_request(bot, method)
+            except TelegramRetryAfter as exc:
+                attempt += 1
+                self._retries += 1
+                self._retry_after_total += exc.retry_after
+                chat_bucket.pause(exc.retry_after)
+                logger.warning(
+                    "[OUTBOUND] 429 on %s for chat %s, retry after %ss (attempt %s/%s)",
+                    type(method).__name__, chat_id, exc.retry_after, attempt, self.max_retries,
+                )
+                if attempt > self.max_retries:
+                    raise
+                continue
+            finally:
+                self._in_flight -= 1
+
+            self._sent += 1
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        queued = self.global_bucket.waiting + sum(b.waiting for b in self._chats.values())
+        busiest = sorted(
+            ((cid, b.waiting) for cid, b in self._chats.items() if b.waiting),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:5]
+        return {
+            "queued": queued,
+            "queued_global": self.global_bucket.waiting,
+            "busiest_chats": busiest,
+            "in_flight": self._in_flight,
+            "sent": self._sent,
+            "retries": self._retries,
+            "retry_after_total_s": self._retry_after_total,
+            "avg_wait_ms": round(self._wait_total / self._sent * 1000, 2) if self._sent else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 2),
+            "chats_tracked": len(self._chats),
+        }
+
+
+_scheduler: Optional[OutboundScheduler] = None
+
+
+def install_outbound_scheduler(bot: Bot) -> Optional[OutboundScheduler]:
+    """Подключает планировщик к сессии бота (OUTBOUND_ENABLED=0 — не подключаем)."""
+    global _scheduler
+    if not OUTBOUND_ENABLED:
+        return None
+    _scheduler = OutboundScheduler()
+    bot.session.middleware(_scheduler)
+    return _scheduler
+
+
+def outbound_stats() -> Optional[Dict[str, Any]]:
+    return _scheduler.stats() if _scheduler else None
@@ -1,14 +1,13 @@
 # bot/report_data.py
 import datetime as dt
-import json
 import logging
 import os
-import re
 from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional, List, Any, Dict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import Select, Update, func, select, true, update
+from sqlalchemy.exc import NoResultFound
 
 from checklist.db.db import SessionLocal
 from checklist.db.models.checklist import (
@@ -18,13 +17,17 @@ from checklist.db.models.checklist import (
     ChecklistQuestionAnswer,
     ChecklistSection,
 )
-from checklist.db.models.user import User
-from checklist.db.models.company import Company
+from checklist.db.models.user import User, user_department_access
+from checklist.db.models.company import Company, Department
 
-from .utils.timezone import to_moscow
+from checklist.scoring import ScoringPlan, compile_plan, meta_dict, scoring_plans, summarize
+
+from .utils.timezone import format_moscow, to_moscow
 
 logger = logging.getLogger(__name__)
 
+ATTEMPTS_CHUNK = int(os.getenv("ATTEMPTS_CHUNK", "200"))  # попыток на пачку в get_attempt_data_many
+
 
 @dataclass
 class AnswerRow:
@@ -39,6 +42,7 @@ class AnswerRow:
     photo_label: Optional[str] = None
     section_id: Optional[int] = None
     section_title: Optional[str] = None
+    question_id: Optional[int] = None
 
 
 @dataclass
@@ -66,6 +70,28 @@ class AttemptData:
     sections: Optional[List[SectionResult]] = None
 
 
+@dataclass
+class AttemptSummary:
+    """
+    Итог попытки, сохранённый в checklist_answers при отправке (см. store_attempt_summary):
+    для превью и итогового сообщения не нужно заново собирать ответы и считать баллы.
+    """
+    attempt_id: int
+    checklist_name: str
+    submitted_at: Optional[dt.datetime]          # МСК
+    departments: List[str]
+    is_scored: bool = False
+    total_score: Optional[float] = None
+    total_max: Optional[float] = None
+    percent: Optional[float] = None
+    sections: Optional[List[Dict[str, Any]]] = None          # [{title, total_score, total_max, percent}]
+    question_scores: Optional[Dict[str, List[Optional[float]]]] = None  # str(qid) -> [score, weight]
+
+    @property
+    def department(self) -> Optional[str]:
+        return ", ".join(self.departments) or None
+
+
 # ---------------- formatting helpers ----------------
 
 def _fmt_number(value: Optional[float]) -> str:
@@ -76,7 +102,7 @@ def _fmt_number(value: Optional[float]) -> str:
     return str(value)
 
 
-def format_attempt_result(data: AttemptData, include_unscored: bool = False) -> Optional[str]:
+def format_attempt_result(data: AttemptData | AttemptSummary, include_unscored: bool = False) -> Optional[str]:
     if data.is_scored and data.total_score is not None and data.total_max is not None:
         percent_text = f" ({_fmt_number(data.percent)}%)" if data.percent is not None else ""
         return (
@@ -84,7 +110,7 @@ def format_attempt_result(data: AttemptData, include_unscored: bool = False) ->
             f"{_fmt_number(data.total_max)} баллов{percent_text}"
         )
 
-    if include_unscored:
+    if include_unscored and isinstance(data, AttemptData):
         scored_rows = [r.score for r in data.answers if isinstance(r.score, (int, float))]
         if scored_rows:
             total_score = sum(float(s) for s in scored_rows)
@@ -93,6 +119,19 @@ def format_attempt_result(data: AttemptData, include_unscored: bool = False) ->
     return None
 
 
+def format_attempt_preview(summary: Optional[AttemptSummary]) -> Optional[Dict[str, Any]]:
+    """«Шапка» для предпросмотра попытки: название, дата/время, подразделение, result."""
+    if summary is None:
+        return None
+    return {
+        "checklist_name": summary.checklist_name,
+        "date": format_moscow(summary.submitted_at, "%d.%m.%Y"),
+        "time": format_moscow(summary.submitted_at, "%H:%M"),
+        "department": summary.department or "—",
+        "result": format_attempt_result(summary) if summary.is_scored else None,
+    }
+
+
 # ---------------- helpers ----------------
 
 def _dbg_enabled() -> bool:
@@ -104,313 +143,465 @@ def _log(msg: str):
         logger.debug(msg)
 
 
-def _as_dict(raw: Any) -> dict:
-    if isinstance(raw, dict):
-        return raw
-    if isinstance(raw, str) and raw.strip():
-        try:
-            return json.loads(raw)
-        except Exception:
-            return {}
-    return {}
-
+# ---------------- main ----------------
 
-def _first_present(d: dict, keys: List[str]):
-    for k in keys:
-        if k in d and d[k] is not None:
-            return d[k]
-    return None
+def _score_rows(
+    q_and_a: Iterable[Any],
+    plan: ScoringPlan,
+) -> Tuple[List[AnswerRow], List[SectionResult], Optional[float], Optional[float], Optional[float]]:
+    """
+    Баллы по строкам «вопрос + ответ» (qid, qtext, qtype, section_*, response_value, ...)
+    по скомпилированному плану чек-листа (checklist.scoring):
+      - yes/no:   Да → score=weight, иначе 0
+      - scale:    score = weight * (value - min) / (max - min); границы из meta, дефолт 0..5
+      - прочие:   score=None
+    """
+    is_scored = plan.is_scored
+    rows: List[AnswerRow] = []
+    total_score_acc = 0.0
+    total_max_acc = 0.0
+    sections_map: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+    for idx, row in enumerate(q_and_a, start=1):
+        answer_raw = row.response_value
+        answer_str = "" if answer_raw is None else str(answer_raw)
+
+        score, weight = plan.score(row.qid, answer_str)
+
+        if weight is None:
+            _log(f"[SCORE] No weight for Q{idx} (id={row.qid}): '{row.qtext[:50]}'")
+        else:
+            _log(f"[SCORE] Q{idx} (id={row.qid}): {plan.question(row.qid)}, ans='{answer_str}' -> score={score}")
+            total_max_acc += weight
+            if score is not None:
+                total_score_acc += max(0.0, score)
+
+        section_title = (row.section_title or "Без раздела").strip() or "Без раздела"
+        section_id = row.section_id
+        section_key = section_id if section_id is not None else f"__none__:{section_title}"
+
+        if section_key not in sections_map:
+            sections_map[section_key] = {
+                "result": SectionResult(title=section_title, answers=[]),
+                "score_acc": 0.0,
+                "max_acc": 0.0,
+            }
+
+        answer_row = AnswerRow(
+            number=idx,
+            question=row.qtext,
+            qtype=row.qtype,
+            answer=answer_str,
+            comment=row.comment,
+            score=score,
+            weight=weight,
+            photo_path=row.photo_path,
+            photo_label=f"Вопрос №{idx}",
+            section_id=section_id,
+            section_title=section_title,
+            question_id=row.qid,
+        )
+        rows.append(answer_row)
+
+        section_entry = sections_map[section_key]
+        section_entry["result"].answers.append(answer_row)
+        if weight is not None:
+            section_entry["max_acc"] += weight
+            if score is not None:
+                section_entry["score_acc"] += max(0.0, score)
+
+    section_results: List[SectionResult] = []
+    for entry in sections_map.values():
+        result = entry["result"]
+        max_acc = entry["max_acc"]
+        score_acc = entry["score_acc"]
+        result.total_score, result.total_max, result.percent = summarize(is_scored, score_acc, max_acc)
+        section_results.append(result)
+
+    total_score, total_max, percent = summarize(is_scored, total_score_acc, total_max_acc)
+    return rows, section_results, total_score, total_max, percent
+
+
+def attempt_score_query(attempt_id: int) -> Select:
+    """Всё, что нужно для подсчёта баллов попытки, одним запросом (те же поля, что q_and_a)."""
+    return (
+        select(
+            ChecklistAnswer.checklist_id,
+            Checklist.is_scored.label("is_scored"),
+            ChecklistQuestion.id.label("qid"),
+            ChecklistQuestion.text.label("qtext"),
+            ChecklistQuestion.type.label("qtype"),
+            ChecklistQuestion.order.label("qorder"),
+            ChecklistQuestion.meta.label("qmeta"),
+            ChecklistQuestion.weight.label("qweight"),
+            ChecklistQuestion.section_id.label("section_id"),
+            ChecklistSection.name.label("section_title"),
+            ChecklistSection.order.label("section_order"),
+            ChecklistQuestionAnswer.response_value,
+            ChecklistQuestionAnswer.comment,
+            ChecklistQuestionAnswer.photo_path,
+        )
+        .select_from(ChecklistAnswer)
+        .join(Checklist, Checklist.id == ChecklistAnswer.checklist_id)
+        .join(ChecklistQuestion, ChecklistQuestion.checklist_id == ChecklistAnswer.checklist_id)
+        .outerjoin(ChecklistSection, ChecklistSection.id == ChecklistQuestion.section_id)
+        .outerjoin(
+            ChecklistQuestionAnswer,
+            (ChecklistQuestionAnswer.question_id == ChecklistQuestion.id)
+            & (ChecklistQuestionAnswer.answer_id == ChecklistAnswer.id),
+        )
+        .where(ChecklistAnswer.id == attempt_id)
+        .order_by(
+            func.coalesce(ChecklistSection.order, 10 ** 6).asc(),
+            ChecklistQuestion.order.asc(),
+            ChecklistQuestion.id.asc(),
+        )
+    )
+
+
+def attempt_headers_query(attempt_ids: Iterable[int]) -> Select:
+    """Шапки попыток: чек-лист, сотрудник, компания и его отделы (строка на отдел) — одним запросом."""
+    return (
+        select(
+            ChecklistAnswer.id.label("attempt_id"),
+            ChecklistAnswer.checklist_id,
+            ChecklistAnswer.submitted_at,
+            Checklist.name.label("checklist_name"),
+            Checklist.is_scored,
+            User.name.label("user_name"),
+            Company.name.label("company_name"),
+            Department.name.label("department_name"),
+        )
+        .select_from(ChecklistAnswer)
+        .outerjoin(Checklist, Checklist.id == ChecklistAnswer.checklist_id)
+        .outerjoin(User, User.id == ChecklistAnswer.user_id)
+        .outerjoin(Company, Company.id == User.company_id)
+        .outerjoin(user_department_access, user_department_access.c.user_id == User.id)
+        .outerjoin(Department, Department.id == user_department_access.c.department_id)
+        .where(ChecklistAnswer.id.in_(list(attempt_ids)))
+        .order_by(ChecklistAnswer.id, Department.id)
+    )
+
+
+def attempt_header_query(attempt_id: int) -> Select:
+    return attempt_headers_query([attempt_id])
+
+
+def checklist_questions_query(checklist_ids: Iterable[int]) -> Select:
+    """Структура чек-листов (вопросы + разделы) в порядке attempt_score_query."""
+    return (
+        select(
+            ChecklistQuestion.checklist_id,
+            ChecklistQuestion.id.label("qid"),
+            ChecklistQuestion.text.label("qtext"),
+            ChecklistQuestion.type.label("qtype"),
+            ChecklistQuestion.order.label("qorder"),
+            ChecklistQuestion.meta.label("qmeta"),
+            ChecklistQuestion.weight.label("qweight"),
+            ChecklistQuestion.section_id.label("section_id"),
+            ChecklistSection.name.label("section_title"),
+            ChecklistSection.order.label("section_order"),
+        )
+        .outerjoin(ChecklistSection, ChecklistSection.id == ChecklistQuestion.section_id)
+        .where(ChecklistQuestion.checklist_id.in_(list(checklist_ids)))
+        .order_by(
+            ChecklistQuestion.checklist_id,
+            func.coalesce(ChecklistSection.order, 10 ** 6).asc(),
+            ChecklistQuestion.order.asc(),
+            ChecklistQuestion.id.asc(),
+        )
+    )
 
 
-def _to_float(v) -> Optional[float]:
-    try:
-        if v is None:
-            return None
-        return float(v)
-    except Exception:
-        return None
+def attempt_answers_query(attempt_ids: Iterable[int]) -> Select:
+    return (
+        select(
+            ChecklistQuestionAnswer.answer_id,
+            ChecklistQuestionAnswer.question_id,
+            ChecklistQuestionAnswer.response_value,
+            ChecklistQuestionAnswer.comment,
+            ChecklistQuestionAnswer.photo_path,
+        )
+        .where(ChecklistQuestionAnswer.answer_id.in_(list(attempt_ids)))
+    )
 
 
-def _merge_meta(*parts: dict) -> dict:
-    merged: Dict[str, Any] = {}
-    for p in parts:
-        if isinstance(p, dict):
-            merged.update(p)
-    return merged
-
-
-def _extract_weight(meta: dict) -> Optional[float]:
-    candidate = _first_present(meta, [
-        # англ варианты
-        "weight", "score_weight", "points", "max_points", "max_score", "score", "weight_value",
-        # русские
-        "вес", "балл", "баллы",
-    ])
-    return _to_float(candidate)
-
-
-def _extract_scale_max(meta: dict) -> Optional[float]:
-    # прямые ключи
-    direct = _first_present(meta, ["max", "scale_max", "max_value", "upper", "upper_bound"])
-    mx = _to_float(direct)
-    if mx:
-        return mx
-
-    # options: len / max(value)
-    opts = meta.get("options")
-    if isinstance(opts, (list, tuple)) and len(opts) > 0:
-        if not isinstance(opts[0], dict):
-            return _to_float(len(opts)) or None
-        vals = []
-        for it in opts:
-            if isinstance(it, dict):
-                cand = _first_present(it, ["value", "val", "score", "points"])
-                f = _to_float(cand)
-                if f is not None:
-                    vals.append(f)
-        if vals:
-            return max(vals)
-        return _to_float(len(opts)) or None
-
-    # values / choices
-    for key in ["values", "choices"]:
-        seq = meta.get(key)
-        if isinstance(seq, (list, tuple)) and len(seq) > 0:
-            return _to_float(len(seq)) or None
-
-    # range "1-5"
-    rng = meta.get("range")
-    if isinstance(rng, str):
-        m = re.match(r"\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$", rng)
-        if m:
-            return _to_float(m.group(2))
+class _ScoreRow(NamedTuple):
+    """Строка «вопрос + ответ» с теми же полями, что у attempt_score_query."""
+    qid: int
+    qtext: str
+    qtype: str
+    qorder: int
+    qmeta: Any
+    qweight: Optional[int]
+    section_id: Optional[int]
+    section_title: Optional[str]
+    section_order: Optional[int]
+    response_value: Optional[str] = None
+    comment: Optional[str] = None
+    photo_path: Optional[str] = None
 
-    return None
 
+def _attempt_from_rows(
+    attempt_id: int,
+    header: List[Any],
+    q_and_a: List[Any],
+    plan: Optional[ScoringPlan] = None,
+) -> AttemptData:
+    head = header[0]
+    if plan is None:
+        plan = scoring_plans.get(head.checklist_id, bool(head.is_scored), q_and_a)
+    submitted_at = head.submitted_at or dt.datetime.utcnow()
+    submitted_at = to_moscow(submitted_at) or submitted_at
+
+    rows, section_results, total_score, total_max, percent = _score_rows(q_and_a, plan)
+
+    return AttemptData(
+        attempt_id=attempt_id,
+        checklist_name=head.checklist_name or f"Checklist #{head.checklist_id}",
+        user_name=head.user_name or "Неизвестный сотрудник",
+        company_name=head.company_name,
+        department=", ".join(r.department_name for r in header if r.department_name) or None,
+        submitted_at=submitted_at,
+        answers=rows,
+        total_score=total_score,
+        total_max=total_max,
+        percent=percent,
+        is_scored=plan.is_scored,
+        sections=section_results or None,
+    )
 
-# ---------------- main ----------------
 
 def get_attempt_data(attempt_id: int) -> AttemptData:
     """
-    Считает score/weight так:
-      - yes/no:   Да → score=weight, иначе 0
-      - scale:    score = weight * (value / scale_max), scale_max берём из meta/столбцов; дефолт 10
-      - прочие:   score=None
-    Источники данных для weight/scale_max (по убыв. приоритета):
-      1) ChecklistQuestion.meta
-      2) Отдельные числовые поля у ChecklistQuestion (если есть): weight/score_weight/max/scale_max/max_value
+    Полные данные попытки для выгрузок; баллы — по ScoringPlan чек-листа (см. _score_rows).
+    Два запроса при любом числе вопросов: шапка (attempt_header_query) и
+    вопросы с ответами (attempt_score_query).
     """
     with SessionLocal() as db:
-        attempt: ChecklistAnswer = (
-            db.query(ChecklistAnswer)
-            .filter(ChecklistAnswer.id == attempt_id)
-            .one()
-        )
+        header = db.execute(attempt_header_query(attempt_id)).all()
+        if not header:
+            raise NoResultFound(f"checklist answer {attempt_id} not found")
+        q_and_a = db.execute(attempt_score_query(attempt_id)).all()
+    return _attempt_from_rows(attempt_id, header, q_and_a)
 
-        checklist_obj = db.get(Checklist, attempt.checklist_id)
-        checklist_name = checklist_obj.name if checklist_obj else f"Checklist #{attempt.checklist_id}"
-        is_scored = bool(getattr(checklist_obj, "is_scored", False))
-
-        user_row = db.get(User, attempt.user_id)
-        user_name = user_row.name if user_row else "Неизвестный сотрудник"
-
-        company_name = None
-        department_name = None
-        if user_row:
-            if user_row.company_id:
-                company_name = (
-                    db.query(Company.name)
-                    .filter(Company.id == user_row.company_id)
-                    .scalar()
-                )
-            if getattr(user_row, "departments", None):
-                department_name = ", ".join(d.name for d in user_row.departments if getattr(d, "name", None)) or None
-
-        submitted_at = attempt.submitted_at or dt.datetime.utcnow()
-        submitted_at = to_moscow(submitted_at) or submitted_at
-
-        # вопросы (meta берём сразу), чтобы сохранить порядок
-        q_sub = (
-            db.query(
-                ChecklistQuestion.id,
-                ChecklistQuestion.text,
-                ChecklistQuestion.type,
-                ChecklistQuestion.order,
-                ChecklistQuestion.meta,
-                ChecklistQuestion.section_id,
-                ChecklistSection.name.label("section_title"),
-                ChecklistSection.order.label("section_order"),
-            )
-            .outerjoin(ChecklistSection, ChecklistSection.id == ChecklistQuestion.section_id)
-            .filter(ChecklistQuestion.checklist_id == attempt.checklist_id)
-            .subquery()
-        )
 
-        # ответы этой попытки (без meta у ответа)
-        q_and_a = (
-            db.query(
-                q_sub.c.id.label("qid"),
-                q_sub.c.text.label("qtext"),
-                q_sub.c.type.label("qtype"),
-                q_sub.c.order.label("qorder"),
-                q_sub.c.meta.label("qmeta"),
-                q_sub.c.section_id.label("section_id"),
-                q_sub.c.section_title.label("section_title"),
-                q_sub.c.section_order.label("section_order"),
-                ChecklistQuestionAnswer.response_value,
-                ChecklistQuestionAnswer.comment,
-                ChecklistQuestionAnswer.photo_path,
-            )
-            .outerjoin(
-                ChecklistQuestionAnswer,
-                (ChecklistQuestionAnswer.question_id == q_sub.c.id)
-                & (ChecklistQuestionAnswer.answer_id == attempt_id)
-            )
-            .order_by(
-                func.coalesce(q_sub.c.section_order, 10 ** 6).asc(),
-                q_sub.c.order.asc(),
-                q_sub.c.id.asc(),
-            )
-            .all()
-        )
+def get_attempt_data_many(attempt_ids: Iterable[int], chunk_size: int = ATTEMPTS_CHUNK) -> Iterator[AttemptData]:
+    """
+    AttemptData для многих попыток (выгрузки по отделу, массовые PDF) — в порядке attempt_ids,
+    несуществующие id пропускаются. Попытки читаются пачками по chunk_size: на пачку три
+    запроса (шапки, ответы, структура ещё не встречавшихся чек-листов), структура чек-листа
+    и её ScoringPlan — один раз на весь вызов. В памяти одновременно — не больше одной пачки.
+    """
+    structures: Dict[int, List[Any]] = {}
+    plans: Dict[int, ScoringPlan] = {}
+    ids = list(dict.fromkeys(attempt_ids))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        with SessionLocal() as db:
+            headers: Dict[int, List[Any]] = {}
+            for row in db.execute(attempt_headers_query(chunk)):
+                headers.setdefault(row.attempt_id, []).append(row)
+
+            answers: Dict[int, Dict[int, Tuple[Any, Any, Any]]] = {}
+            for row in db.execute(attempt_answers_query(list(headers))):
+                answers.setdefault(row.answer_id, {})[row.question_id] = (
+                    row.response_value, row.comment, row.photo_path,
+                )
 
-        # кэш: question_id -> ChecklistQuestion (для отдельных колонок)
-        q_cache: Dict[int, ChecklistQuestion] = {}
-
-        def _load_question(qid: int) -> Optional[ChecklistQuestion]:
-            if qid in q_cache:
-                return q_cache[qid]
-            obj = db.get(ChecklistQuestion, qid)
-            q_cache[qid] = obj
-            return obj
-
-        rows: List[AnswerRow] = []
-        total_score_acc = 0.0
-        total_max_acc = 0.0
-        has_scored_questions = False
-        sections_map: OrderedDict[str, Dict[str, Any]] = OrderedDict()
-        for idx, row in enumerate(q_and_a, start=1):
-            answer_raw = row.response_value
-            answer_str = "" if answer_raw is None else str(answer_raw)
-
-            # meta из вопроса
-            m_q = _as_dict(row.qmeta)
-
-            # если у модели есть отдельные числовые поля — добавим в meta
-            qobj = _load_question(row.qid)
-            m_cols: Dict[str, Any] = {}
-            if qobj is not None:
-                for attr in ("weight", "score_weight", "points", "max_points", "max_score",
-                             "max", "scale_max", "max_value"):
-                    if hasattr(qobj, attr):
-                        try:
-                            val = getattr(qobj, attr)
-                        except Exception:
-                            val = None
-                        if val is not None:
-                            m_cols[attr] = val
-
-            meta_all = _merge_meta(m_q, m_cols)
-
-            weight    = _extract_weight(meta_all)
-            scale_max = _extract_scale_max(meta_all) or 5.0
-
-            qtype = (row.qtype or "").lower().strip()
-            score: Optional[float] = None
-
-            if weight is not None:
-                has_scored_questions = True
-                if qtype in {"yesno", "boolean", "bool", "yn"}:
-                    s = answer_str.strip().lower()
-                    score = weight if s in {"yes", "да", "true", "1"} else 0.0
-                elif qtype in {"scale", "rating"}:
-                    try:
-                        val = float(answer_str) if answer_str.strip() != "" else 0.0
-                    except Exception:
-                        val = 0.0
-                    mx = scale_max if (scale_max and scale_max > 0) else 5.0
-                    ratio = val / mx if mx else 0.0
-                    ratio = max(0.0, min(1.0, ratio))
-                    score = weight * ratio
-                else:
-                    score = None
-
-            if weight is None:
-                _log(f"[SCORE] No weight for Q{idx} (id={row.qid}): '{row.qtext[:50]}', meta_all={meta_all}")
-            else:
-                _log(f"[SCORE] Q{idx} (id={row.qid}): weight={weight}, type={qtype}, ans='{answer_str}', scale_max={scale_max} -> score={score}")
-                total_max_acc += weight
-                if score is not None:
-                    total_score_acc += max(0.0, score)
-                else:
-                    # вопрос с весом, но без подсчитанного балла — считаем 0
-                    total_score_acc += 0.0
-
-            section_title = (row.section_title or "Без раздела").strip() or "Без раздела"
-            section_id = row.section_id
-            section_key = section_id if section_id is not None else f"__none__:{section_title}"
-
-            if section_key not in sections_map:
-                sections_map[section_key] = {
-                    "result": SectionResult(title=section_title, answers=[]),
-                    "score_acc": 0.0,
-                    "max_acc": 0.0,
-                }
-
-            answer_row = AnswerRow(
-                number=idx,
-                question=row.qtext,
-                qtype=row.qtype,
-                answer=answer_str,
-                comment=row.comment,
-                score=score,
-                weight=weight,
-                photo_path=row.photo_path,
-                photo_label=f"Вопрос №{idx}",
-                section_id=section_id,
-                section_title=section_title,
-            )
-            rows.append(answer_row)
-
-            section_entry = sections_map[section_key]
-            section_entry["result"].answers.append(answer_row)
-            if weight is not None:
-                section_entry["max_acc"] += weight
-                if score is not None:
-                    section_entry["score_acc"] += max(0.0, score)
-                else:
-                    section_entry["score_acc"] += 0.0
-
-        section_results: List[SectionResult] = []
-        for entry in sections_map.values():
-            result = entry["result"]
-            max_acc = entry["max_acc"]
-            score_acc = entry["score_acc"]
-            if is_scored and max_acc > 0:
-                result.total_max = round(max_acc, 2)
-                result.total_score = round(score_acc, 2)
-                result.percent = round((score_acc / max_acc) * 100, 2) if max_acc else None
-            section_results.append(result)
-
-        total_score = None
-        total_max = None
-        percent = None
-        if is_scored and has_scored_questions and total_max_acc > 0:
-            total_score = round(total_score_acc, 2)
-            total_max = round(total_max_acc, 2)
-            percent = round((total_score_acc / total_max_acc) * 100, 2)
-
-        return AttemptData(
-            attempt_id=attempt_id,
-            checklist_name=checklist_name,
-            user_name=user_name,
-            company_name=company_name,
-            department=department_name,
-            submitted_at=submitted_at,
-            answers=rows,
+            missing = {h[0].checklist_id for h in headers.values()} - structures.keys()
+            if missing:
+                for checklist_id in missing:
+                    structures[checklist_id] = []
+                for row in db.execute(checklist_questions_query(missing)):
+                    structures[row.checklist_id].append(row[1:])
+
+        for attempt_id in chunk:
+            header = headers.get(attempt_id)
+            if header is None:
+                continue
+            checklist_id = header[0].checklist_id
+            attempt_answers = answers.get(attempt_id, {})
+            q_and_a = [
+                _ScoreRow(*question, *attempt_answers.get(question[0], ()))
+                for question in structures[checklist_id]
+            ]
+            plan = plans.get(checklist_id)
+            if plan is None:
+                plan = plans[checklist_id] = scoring_plans.get(checklist_id, bool(header[0].is_scored), q_and_a)
+            yield _attempt_from_rows(attempt_id, header, q_and_a, plan)
+
+
+# ---------------- сохранённый итог попытки ----------------
+
+def attempt_summary_update(attempt_id: int, score_rows: List[Any]) -> Update:
+    """UPDATE checklist_answers с итогом попытки по строкам attempt_score_query."""
+    if score_rows:
+        plan = scoring_plans.get(score_rows[0].checklist_id, bool(score_rows[0].is_scored), score_rows)
+    else:
+        plan = compile_plan(0, False, [])
+    rows, sections, total_score, total_max, percent = _score_rows(score_rows, plan)
+    details = {
+        "is_scored": plan.is_scored,
+        "sections": [
+            {"title": sec.title, "total_score": sec.total_score, "total_max": sec.total_max, "percent": sec.percent}
+            for sec in sections
+        ],
+        "questions": {
+            str(row.question_id): [row.score, row.weight]
+            for row in rows
+            if row.weight is not None
+        },
+    }
+    return (
+        update(ChecklistAnswer)
+        .where(ChecklistAnswer.id == attempt_id)
+        .values(
             total_score=total_score,
             total_max=total_max,
             percent=percent,
-            is_scored=is_scored,
-            sections=section_results or None,
+            score_details=details,
+            scored_at=dt.datetime.utcnow(),
+        )
+    )
+
+
+def store_attempt_summary(db, attempt_id: int) -> None:
+    """Считает и записывает итог попытки в текущей транзакции (commit — на вызывающем)."""
+    db.execute(attempt_summary_update(attempt_id, db.execute(attempt_score_query(attempt_id)).all()))
+
+
+def attempt_summary_query(attempt_id: int) -> Select:
+    """Шапка + сохранённый итог + отделы пользователя (строка на отдел) — одно обращение к БД."""
+    return (
+        select(
+            ChecklistAnswer.id,
+            ChecklistAnswer.submitted_at,
+            ChecklistAnswer.total_score,
+            ChecklistAnswer.total_max,
+            ChecklistAnswer.percent,
+            ChecklistAnswer.score_details,
+            ChecklistAnswer.scored_at,
+            Checklist.name.label("checklist_name"),
+            Department.name.label("department_name"),
         )
+        .select_from(ChecklistAnswer)
+        .outerjoin(Checklist, Checklist.id == ChecklistAnswer.checklist_id)
+        .outerjoin(user_department_access, user_department_access.c.user_id == ChecklistAnswer.user_id)
+        .outerjoin(Department, Department.id == user_department_access.c.department_id)
+        .where(ChecklistAnswer.id == attempt_id)
+        .order_by(Department.id)
+    )
+
+
+def attempt_summary_from_rows(rows: List[Any]) -> Optional[AttemptSummary]:
+    """None — попытки нет или итог ещё не посчитан (scored_at IS NULL, см. backfill_scores.py)."""
+    if not rows or rows[0].scored_at is None:
+        return None
+    head = rows[0]
+    details = meta_dict(head.score_details)
+    submitted_at = to_moscow(head.submitted_at) if head.submitted_at else None
+    return AttemptSummary(
+        attempt_id=head.id,
+        checklist_name=head.checklist_name or "—",
+        submitted_at=submitted_at,
+        departments=[r.department_name for r in rows if r.department_name],
+        is_scored=bool(details.get("is_scored")),
+        total_score=head.total_score,
+        total_max=head.total_max,
+        percent=head.percent,
+        sections=details.get("sections") or None,
+        question_scores=details.get("questions") or {},
+    )
+
+
+def get_attempt_summary(attempt_id: int) -> Optional[AttemptSummary]:
+    """
+    Итог попытки из checklist_answers. Для попыток, отправленных до появления итога
+    (и ещё не прошедших backfill), считаем и сохраняем его здесь же.
+    """
+    with SessionLocal() as db:
+        rows = db.execute(attempt_summary_query(attempt_id)).all()
+        if not rows:
+            return None
+        if rows[0].scored_at is None:
+            store_attempt_summary(db, attempt_id)
+            db.commit()
+            rows = db.execute(attempt_summary_query(attempt_id)).all()
+        return attempt_summary_from_rows(rows)
+
+
+def backfill_attempt_summaries(batch_size: int = 500, limit: Optional[int] = None, rescore: bool = False) -> int:
+    """
+    Досчитывает итог для завершённых попыток без scored_at (rescore=True — пересчитывает все,
+    например после смены правил в checklist.scoring). Возвращает число обработанных.
+    """
+    done = 0
+    last_id = 0
+    while limit is None or done < limit:
+        with SessionLocal() as db:
+            ids = db.execute(
+                select(ChecklistAnswer.id)
+                .where(
+                    ChecklistAnswer.id > last_id,
+                    ChecklistAnswer.submitted_at.isnot(None),
+                    true() if rescore else ChecklistAnswer.scored_at.is_(None),
+                )
+                .order_by(ChecklistAnswer.id)
+                .limit(batch_size if limit is None else min(batch_size, limit - done))
+            ).scalars().all()
+            if not ids:
+                break
+            for attempt_id in ids:
+                store_attempt_summary(db, attempt_id)
+            db.commit()
+        done += len(ids)
+        last_id = ids[-1]
+        logger.info("[SCORES] backfilled %s attempts (last id %s)", done, last_id)
+    return done
+
+
+def _benchmark(count: int = 1000) -> List[Tuple[str, float, int]]:
+    """
+    Последние count попыток из DATABASE_URL (только чтение): цикл get_attempt_data
+    против get_attempt_data_many. (режим, секунды, запросов к БД).
+    """
+    import time
+
+    from sqlalchemy import event
+
+    import checklist.db.models  # noqa: F401  — все модели до первого запроса
+    from checklist.db.db import engine
+
+    with SessionLocal() as db:
+        ids = db.execute(
+            select(ChecklistAnswer.id).order_by(ChecklistAnswer.id.desc()).limit(count)
+        ).scalars().all()
+
+    statements = [0]
+
+    def count_statement(*_args) -> None:
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    results = []
+    try:
+        for name, load in (
+            ("loop", lambda: [get_attempt_data(i) for i in ids]),
+            ("many", lambda: list(get_attempt_data_many(ids))),
+        ):
+            statements[0] = 0
+            started = time.perf_counter()
+            loaded = load()
+            results.append((name, time.perf_counter() - started, statements[0]))
+            assert len(loaded) == len(ids)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    for name, seconds, queries in _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000):
+        print(f"{name:5s} {seconds:7.2f} s  {queries:6d} запросов")
+
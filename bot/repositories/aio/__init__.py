@@ -0,0 +1,18 @@
+# bot/repositories/aio/__init__.py
+# Асинхронные двойники репозиториев (SQLAlchemy AsyncSession, см. checklist/db/async_db.py).
+# Интерфейс и возвращаемые значения те же, что у синхронных версий в bot/repositories.
+from .answers import AsyncAnswersRepo
+from .attempts import AsyncAttemptsRepo
+from .checklists import AsyncChecklistsRepo
+from .companies import AsyncCompaniesRepo
+from .questions import AsyncQuestionsRepo
+from .users import AsyncUsersRepo
+
+__all__ = [
+    "AsyncAnswersRepo",
+    "AsyncAttemptsRepo",
+    "AsyncChecklistsRepo",
+    "AsyncCompaniesRepo",
+    "AsyncQuestionsRepo",
+    "AsyncUsersRepo",
+]
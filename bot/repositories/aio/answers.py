@@ -0,0 +1,54 @@
+# bot/repositories/aio/answers.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+import logging
+
+from checklist.db.async_db import AsyncSessionLocal
+
+from ...report_data import (
+    AttemptSummary,
+    attempt_score_query,
+    attempt_summary_from_rows,
+    attempt_summary_query,
+    attempt_summary_update,
+    format_attempt_preview,
+    get_attempt_data,
+)
+from ..answers import PageKey, completed_items, completed_page_query, completed_total_query
+from ...services.executor import run_db
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAnswersRepo:
+    async def get_completed_page(
+        self,
+        user_id: int,
+        limit: int,
+        anchor: Optional[PageKey] = None,
+        newer: bool = False,
+    ) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            return completed_items(await db.execute(completed_page_query(user_id, limit, anchor, newer)))
+
+    async def count_completed(self, user_id: int) -> int:
+        async with AsyncSessionLocal() as db:
+            return int(await db.scalar(completed_total_query(user_id)) or 0)
+
+    async def get_summary(self, answer_id: int) -> AttemptSummary | None:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(attempt_summary_query(answer_id))).all()
+            if rows and rows[0].scored_at is None:
+                # попытка отправлена до появления сохранённого итога — считаем один раз
+                score_rows = (await db.execute(attempt_score_query(answer_id))).all()
+                await db.execute(attempt_summary_update(answer_id, score_rows))
+                await db.commit()
+                rows = (await db.execute(attempt_summary_query(answer_id))).all()
+        return attempt_summary_from_rows(rows)
+
+    async def get_report_preview(self, answer_id: int) -> Dict[str, Any] | None:
+        return format_attempt_preview(await self.get_summary(answer_id))
+
+    async def get_attempt(self, answer_id: int):
+        return await run_db(get_attempt_data, answer_id)
@@ -0,0 +1,148 @@
+# bot/repositories/aio/attempts.py
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+from datetime import datetime
+
+from sqlalchemy import select, update
+from checklist.db.async_db import AsyncSessionLocal
+from checklist.db.models.checklist import (
+    ChecklistDraft,
+    ChecklistDraftAnswer,
+)
+
+from ..attempts import (
+    _check_draft_fields,
+    draft_answer_upsert,
+    draft_answers_upsert_many,
+    draft_upsert,
+    finished_attempt_query,
+    group_draft_rows,
+    insert_final_answer,
+    lock_draft_for_finish,
+    move_draft_answers,
+    release_draft_id,
+)
+from ...report_data import attempt_score_query, attempt_summary_update
+from ..answers import completed_totals
+
+
+class AsyncAttemptsRepo:
+    """Асинхронная версия AttemptsRepo: черновик попытки, ответы, комментарии и фото."""
+
+    async def get_or_create_draft(self, user_id: int, checklist_id: int) -> int:
+        async with AsyncSessionLocal() as db:
+            stmt = draft_upsert(db.bind.dialect.name, user_id, checklist_id, datetime.utcnow())
+            draft_id = (await db.execute(stmt)).scalar_one()
+            await db.commit()
+            return draft_id
+
+    async def get_draft_id(self, user_id: int, checklist_id: int) -> Optional[int]:
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(ChecklistDraft.id).where(
+                    ChecklistDraft.user_id == user_id,
+                    ChecklistDraft.checklist_id == checklist_id,
+                )
+            )
+
+    async def get_draft_department(self, draft_id: int) -> Optional[str]:
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(select(ChecklistDraft.department).where(ChecklistDraft.id == draft_id))
+
+    async def set_draft_department(self, draft_id: int, department: Optional[str]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(ChecklistDraft)
+                .where(ChecklistDraft.id == draft_id)
+                .values(department=department, updated_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def get_answers_for_attempt(self, answer_id: int) -> Dict[int, Dict[str, Optional[str]]]:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(
+                    ChecklistDraftAnswer.question_id,
+                    ChecklistDraftAnswer.response_value,
+                    ChecklistDraftAnswer.comment,
+                    ChecklistDraftAnswer.photo_path,
+                ).where(ChecklistDraftAnswer.draft_id == answer_id)
+            )
+            return {
+                row.question_id: {
+                    "answer": row.response_value,
+                    "comment": row.comment,
+                    "photo_path": row.photo_path,
+                }
+                for row in rows
+            }
+
+    async def upsert_draft_field(self, draft_id: int, question_id: int, **fields: Optional[str]) -> bool:
+        _check_draft_fields(fields)
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            touched = await db.execute(
+                update(ChecklistDraft).where(ChecklistDraft.id == draft_id).values(updated_at=now)
+            )
+            if not touched.rowcount:
+                return False
+            await db.execute(draft_answer_upsert(db.bind.dialect.name, draft_id, question_id, fields, now))
+            await db.commit()
+            return True
+
+    async def upsert_draft_fields_many(self, items: Sequence[Tuple[int, int, Mapping[str, Any]]]) -> int:
+        if not items:
+            return 0
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            draft_ids = {draft_id for draft_id, _, _ in items}
+            existing = (await db.scalars(
+                update(ChecklistDraft)
+                .where(ChecklistDraft.id.in_(draft_ids))
+                .values(updated_at=now)
+                .returning(ChecklistDraft.id)
+            )).all()
+            dialect_name = db.bind.dialect.name
+            written = 0
+            for field_names, rows in group_draft_rows(items, existing, now).items():
+                await db.execute(draft_answers_upsert_many(dialect_name, field_names), rows)
+                written += len(rows)
+            await db.commit()
+            return written
+
+    async def save_answer(self, answer_id: int, question_id: int, value: Optional[str]) -> None:
+        await self.upsert_draft_field(answer_id, question_id, response_value=value)
+
+    async def save_comment(self, answer_id: int, question_id: int, comment: Optional[str]) -> None:
+        await self.upsert_draft_field(answer_id, question_id, comment=comment)
+
+    async def save_photo_path(self, answer_id: int, question_id: int, photo_path: Optional[str]) -> None:
+        await self.upsert_draft_field(answer_id, question_id, photo_path=photo_path)
+
+    async def finish_attempt(self, draft_id: int) -> Optional[int]:
+        """Переносит черновик в основную таблицу (INSERT … SELECT) и возвращает id завершённой попытки."""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            draft = (await db.execute(lock_draft_for_finish(draft_id, now))).first()
+            if draft is None:
+                return (await db.execute(finished_attempt_query(draft_id))).scalar()
+
+            await db.execute(release_draft_id(draft_id))
+            answer_id = (await db.execute(insert_final_answer(draft_id, draft, now))).scalar_one()
+            for stmt in move_draft_answers(draft_id, answer_id, now):
+                await db.execute(stmt)
+            # итог попытки считаем один раз, в той же транзакции
+            score_rows = (await db.execute(attempt_score_query(answer_id))).all()
+            await db.execute(attempt_summary_update(answer_id, score_rows))
+            await db.commit()
+        completed_totals.invalidate(draft.user_id)  # «Пройденные чек-листы»: пересчитать total
+        return answer_id
+
+    async def discard_attempt(self, draft_id: int) -> None:
+        """Удаляет черновик попытки вместе с ответами."""
+        async with AsyncSessionLocal() as db:
+            draft = await db.get(ChecklistDraft, draft_id)
+            if not draft:
+                return
+            await db.delete(draft)
+            await db.commit()
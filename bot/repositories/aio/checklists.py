@@ -0,0 +1,29 @@
+# bot/repositories/aio/checklists.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+
+from checklist.db.async_db import AsyncSessionLocal
+from checklist.db.models.cache_version import CATALOG_VERSION, cache_version_query
+
+from ..checklists import catalog_for_position_query, catalog_for_user_query, catalog_from_rows
+
+
+class AsyncChecklistsRepo:
+    async def get_catalog_for_user(self, user_id: int) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """(position_id, [{"id", "name"}, ...]) — чек-листы, назначенные должности пользователя."""
+        async with AsyncSessionLocal() as db:
+            return catalog_from_rows(await db.execute(catalog_for_user_query(user_id)))
+
+    async def get_for_position(self, position_id: int) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(catalog_for_position_query(position_id))
+            return [{"id": r.id, "name": r.name} for r in rows]
+
+    async def get_catalog_version(self) -> int:
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(cache_version_query(CATALOG_VERSION)) or 0
+
+    async def get_for_user(self, user_id: int) -> List[Dict[str, Any]]:
+        """Чек-листы, назначенные должности пользователя (Position.checklists)."""
+        _, items = await self.get_catalog_for_user(user_id)
+        return items
@@ -0,0 +1,19 @@
+# bot/repositories/aio/companies.py
+from __future__ import annotations
+from typing import Optional
+
+from sqlalchemy import func, select
+from checklist.db.async_db import AsyncSessionLocal
+from checklist.db.models.company import Company
+
+
+class AsyncCompaniesRepo:
+    async def get_id_by_name(self, name: str | None) -> Optional[int]:
+        if not name:
+            return None
+        async with AsyncSessionLocal() as db:
+            return await db.scalar(
+                select(Company.id)
+                .where(func.lower(Company.name) == func.lower(name.strip()))
+                .limit(1)
+            )
@@ -0,0 +1,54 @@
+# bot/repositories/aio/questions.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import asc, select
+from sqlalchemy.orm import selectinload
+from checklist.db.async_db import AsyncSessionLocal
+from checklist.db.models.checklist import ChecklistAnswer, ChecklistQuestion, ChecklistQuestionAnswer
+
+from ..questions import question_to_dict
+
+
+class AsyncQuestionsRepo:
+    """Асинхронная версия QuestionsRepo."""
+
+    async def get_for_checklist(self, checklist_id: int) -> List[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            rows = await db.scalars(
+                select(ChecklistQuestion)
+                .where(ChecklistQuestion.checklist_id == checklist_id)
+                .options(selectinload(ChecklistQuestion.section))
+                .order_by(asc(ChecklistQuestion.order))
+            )
+            return [question_to_dict(row) for row in rows]
+
+    async def get_question_ids(self, checklist_id: int) -> List[int]:
+        async with AsyncSessionLocal() as db:
+            rows = await db.scalars(
+                select(ChecklistQuestion.id)
+                .where(ChecklistQuestion.checklist_id == checklist_id)
+                .order_by(asc(ChecklistQuestion.order))
+            )
+            return list(rows)
+
+    async def first_unanswered_for_attempt(self, answer_id: int) -> Optional[int]:
+        async with AsyncSessionLocal() as db:
+            checklist_id = await db.scalar(
+                select(ChecklistAnswer.checklist_id).where(ChecklistAnswer.id == answer_id)
+            )
+            if checklist_id is None:
+                return None
+
+            answered = select(ChecklistQuestionAnswer.question_id).where(
+                ChecklistQuestionAnswer.answer_id == answer_id
+            )
+            return await db.scalar(
+                select(ChecklistQuestion.id)
+                .where(
+                    ChecklistQuestion.checklist_id == checklist_id,
+                    ChecklistQuestion.id.not_in(answered),
+                )
+                .order_by(asc(ChecklistQuestion.order))
+                .limit(1)
+            )
@@ -0,0 +1,74 @@
+# bot/repositories/aio/users.py
+from __future__ import annotations
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, update
+from checklist.db.async_db import AsyncSessionLocal
+from checklist.db.models.user import User
+
+from ..users import _normalize_phone, user_from_rows, user_projection_query
+
+
+class AsyncUsersRepo:
+    async def find_by_name_phone_company(
+        self,
+        name: str,
+        phone: str,
+        company_id: int | None,
+    ) -> Optional[Dict[str, Any]]:
+        name = (name or "").strip()
+        norm_phone = _normalize_phone(phone)
+
+        q = user_projection_query().where(func.lower(User.name) == func.lower(name))
+
+        if norm_phone:
+            q = q.where(User.phone_normalized == norm_phone)
+
+        if company_id is not None:
+            q = q.where(User.company_id == company_id)
+
+        async with AsyncSessionLocal() as db:
+            _, user = user_from_rows(await db.execute(q))
+            return user
+
+    async def find_by_login(self, login: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        login = (login or "").strip()
+        if not login:
+            return None, None
+
+        async with AsyncSessionLocal() as db:
+            return user_from_rows(
+                await db.execute(user_projection_query().where(func.lower(User.login) == login.lower()))
+            )
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+            return bool(result.rowcount)
+
+    async def find_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as db:
+            _, user = user_from_rows(
+                await db.execute(user_projection_query().where(User.telegram_id == telegram_id))
+            )
+            return user
+
+    async def bind_telegram_id(self, user_id: int, telegram_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(User)
+                .where(User.telegram_id == telegram_id, User.id != user_id)
+                .values(telegram_id=None)
+            )
+            await db.execute(update(User).where(User.id == user_id).values(telegram_id=telegram_id))
+            await db.commit()
+
+    async def unbind_telegram_id(self, telegram_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(User).where(User.telegram_id == telegram_id).values(telegram_id=None))
+            await db.commit()
@@ -1,91 +1,143 @@
 # bot/repositories/answers.py
 from __future__ import annotations
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import Select, func, literal, select, tuple_
 from checklist.db.db import SessionLocal
 from checklist.db.models.checklist import Checklist, ChecklistAnswer
-from checklist.db.models.user import User
 from checklist.db.models.company import Department
 
-from ..report_data import get_attempt_data, format_attempt_result  # подробные данные для экспорта
-from ..utils.timezone import to_moscow, format_moscow
+from ..report_data import AttemptSummary, format_attempt_preview, get_attempt_data, get_attempt_summary
+from ..utils.timezone import to_moscow
 
 logger = logging.getLogger(__name__)
 
+COMPLETED_TOTAL_TTL = int(os.getenv("COMPLETED_TOTAL_TTL", "600"))  # сек.; страховка от правок из админки
+
+
+class CompletedTotals:
+    """
+    Число завершённых попыток пользователя для списка «Пройденные чек-листы».
+    Сбрасывается в finish_attempt (bot/repositories/attempts.py); удаления из админки
+    (другой процесс) подхватываются по COMPLETED_TOTAL_TTL.
+    """
+
+    def __init__(self, ttl: int = COMPLETED_TOTAL_TTL, max_users: int = 10_000) -> None:
+        self.ttl = ttl
+        self.max_users = max_users
+        self._items: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None or time.monotonic() - item[1] > self.ttl:
+                return None
+            self._items.move_to_end(user_id)
+            return item[0]
+
+    def store(self, user_id: int, total: int) -> int:
+        with self._lock:
+            self._items[user_id] = (total, time.monotonic())
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_users:
+                self._items.popitem(last=False)
+        return total
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._items.pop(user_id, None)
+
+
+completed_totals = CompletedTotals()
+
+# ключ keyset-пагинации: (submitted_at, id) последней/первой строки страницы
+PageKey = Tuple[datetime, int]
+
+
+def completed_page_query(user_id: int, limit: int, anchor: Optional[PageKey] = None, newer: bool = False) -> Select:
+    """
+    Страница истории пользователя без OFFSET, по индексу ix_ca_user_submitted (user_id, submitted_at, id).
+      newer=False — от anchor включительно к более старым (submitted_at DESC, id DESC);
+      newer=True  — строго новее anchor (для «Назад»), в порядке ASC.
+    Берётся limit + 1 строка: лишняя говорит, что дальше есть ещё.
+    """
+    q = (
+        select(
+            ChecklistAnswer.id.label("answer_id"),
+            Checklist.name.label("checklist_name"),
+            ChecklistAnswer.submitted_at.label("submitted_at"),
+        )
+        .join(Checklist, Checklist.id == ChecklistAnswer.checklist_id)
+        .where(
+            ChecklistAnswer.user_id == user_id,
+            ChecklistAnswer.submitted_at.isnot(None),
+        )
+    )
+    key = tuple_(ChecklistAnswer.submitted_at, ChecklistAnswer.id)
+    if newer:
+        if anchor is not None:
+            q = q.where(key > tuple_(literal(anchor[0]), literal(anchor[1])))
+        q = q.order_by(ChecklistAnswer.submitted_at.asc(), ChecklistAnswer.id.asc())
+    else:
+        if anchor is not None:
+            q = q.where(key <= tuple_(literal(anchor[0]), literal(anchor[1])))
+        q = q.order_by(ChecklistAnswer.submitted_at.desc(), ChecklistAnswer.id.desc())
+    return q.limit(limit + 1)
+
+
+def completed_total_query(user_id: int) -> Select:
+    return select(func.count(ChecklistAnswer.id)).where(
+        ChecklistAnswer.user_id == user_id,
+        ChecklistAnswer.submitted_at.isnot(None),
+    )
+
+
+def completed_items(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """[{answer_id, checklist_name, submitted_at (МСК), key (submitted_at UTC, id)}, ...]"""
+    return [
+        {
+            "answer_id": r.answer_id,
+            "checklist_name": r.checklist_name,
+            "submitted_at": to_moscow(r.submitted_at) if r.submitted_at else None,
+            "key": (r.submitted_at, r.answer_id),
+        }
+        for r in rows
+    ]
+
+
 class AnswersRepo:
-    def get_completed_paginated(self, user_id: int, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
-        """
-        Возвращает (items, total), где items = [{answer_id, checklist_name, submitted_at}, ...]
-        """
+    def get_completed_page(
+        self,
+        user_id: int,
+        limit: int,
+        anchor: Optional[PageKey] = None,
+        newer: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """До limit + 1 попыток в порядке запроса (см. completed_page_query)."""
+        with SessionLocal() as db:
+            return completed_items(db.execute(completed_page_query(user_id, limit, anchor, newer)))
+
+    def count_completed(self, user_id: int) -> int:
         with SessionLocal() as db:
-            base = (
-                db.query(
-                    ChecklistAnswer.id.label("answer_id"),
-                    Checklist.name.label("checklist_name"),
-                    ChecklistAnswer.submitted_at.label("submitted_at"),
-                )
-                .join(Checklist, Checklist.id == ChecklistAnswer.checklist_id)
-                .filter(
-                    ChecklistAnswer.user_id == user_id,
-                    ChecklistAnswer.submitted_at.isnot(None),
-                )
-                .order_by(ChecklistAnswer.submitted_at.desc())
-            )
-
-            total = db.query(func.count(ChecklistAnswer.id)).filter(
-                ChecklistAnswer.user_id == user_id,
-                ChecklistAnswer.submitted_at.isnot(None),
-            ).scalar() or 0
-
-            rows = base.offset(offset).limit(limit).all()
-            items = [
-                {
-                    "answer_id": r.answer_id,
-                    "checklist_name": r.checklist_name,
-                    "submitted_at": to_moscow(r.submitted_at) if r.submitted_at else None,
-                }
-                for r in rows
-            ]
-            return items, int(total)
+            return int(db.scalar(completed_total_query(user_id)) or 0)
+
+    def get_summary(self, answer_id: int) -> AttemptSummary | None:
+        """Итог попытки, сохранённый при отправке (баллы, разделы, подразделение)."""
+        return get_attempt_summary(answer_id)
 
     def get_report_preview(self, answer_id: int) -> Dict[str, Any] | None:
         """
         Короткая «шапка» для предпросмотра: название, дата/время, подразделение, (опционально) result.
         """
-        with SessionLocal() as db:
-            ans: ChecklistAnswer | None = db.query(ChecklistAnswer).get(answer_id)  # type: ignore[arg-type]
-            if not ans:
-                return None
-
-            checklist: Checklist | None = db.query(Checklist).get(ans.checklist_id)  # type: ignore[arg-type]
-            user: User | None = db.query(User).get(ans.user_id)  # type: ignore[arg-type]
-            if not checklist or not user:
-                return None
-
-            # подразделение — список отделов пользователя
-            departments = ", ".join(d.name for d in (user.departments or [])) or "—"
-
-            result: str | None = None
-            try:
-                attempt_data = get_attempt_data(answer_id)
-            except Exception as exc:
-                logger.warning("[REPORT] get_attempt_data failed for answer_id=%s: %s", answer_id, exc)
-                attempt_data = None
-
-            if attempt_data and getattr(attempt_data, "is_scored", False):
-                result = format_attempt_result(attempt_data)
-
-            dt = to_moscow(ans.submitted_at)
-            return {
-                "checklist_name": checklist.name,
-                "date": format_moscow(dt, "%d.%m.%Y"),
-                "time": format_moscow(dt, "%H:%M"),
-                "department": departments,
-                "result": result,
-            }
+        return format_attempt_preview(self.get_summary(answer_id))
 
     def get_attempt(self, answer_id: int):
         """
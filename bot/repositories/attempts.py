@@ -1,9 +1,9 @@
 # bot/repositories/attempts.py
 from __future__ import annotations
-from typing import Dict, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 from datetime import datetime
 
-from sqlalchemy.orm import selectinload
+from sqlalchemy import DateTime, Integer, delete, insert, literal, select, update
 
 from checklist.db.db import SessionLocal
 from checklist.db.models.checklist import (
@@ -13,6 +13,160 @@ from checklist.db.models.checklist import (
     ChecklistDraftAnswer,
 )
 
+from ..report_data import attempt_score_query, attempt_summary_update
+from .answers import completed_totals
+
+
+DRAFT_ANSWER_FIELDS = ("response_value", "comment", "photo_path")
+
+
+def dialect_insert(dialect_name: str):
+    """INSERT с поддержкой ON CONFLICT для диалекта (Postgres/SQLite): черновики, FSM-хранилище."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"UPSERT не поддерживается для {dialect_name!r}")
+    return insert
+
+
+def _check_draft_fields(fields: Mapping[str, Any]) -> None:
+    unknown = set(fields) - set(DRAFT_ANSWER_FIELDS)
+    if unknown or not fields:
+        raise ValueError(f"Недопустимые поля ответа: {sorted(unknown) or 'пусто'}")
+
+
+def draft_upsert(dialect_name: str, user_id: int, checklist_id: int, now: datetime):
+    """INSERT черновика … ON CONFLICT (user_id, checklist_id) DO UPDATE updated_at RETURNING id."""
+    insert = dialect_insert(dialect_name)
+    stmt = insert(ChecklistDraft).values(
+        user_id=user_id,
+        checklist_id=checklist_id,
+        started_at=now,
+        updated_at=now,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ChecklistDraft.user_id, ChecklistDraft.checklist_id],
+        set_={"updated_at": now},
+    ).returning(ChecklistDraft.id)
+
+
+def draft_answer_upsert(
+    dialect_name: str,
+    draft_id: int,
+    question_id: int,
+    fields: Mapping[str, Any],
+    now: datetime,
+):
+    """INSERT ответа … ON CONFLICT (draft_id, question_id) DO UPDATE только переданных полей."""
+    insert = dialect_insert(dialect_name)
+    stmt = insert(ChecklistDraftAnswer).values(
+        draft_id=draft_id,
+        question_id=question_id,
+        updated_at=now,
+        **fields,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ChecklistDraftAnswer.draft_id, ChecklistDraftAnswer.question_id],
+        set_={**fields, "updated_at": now},
+    )
+
+
+def draft_answers_upsert_many(dialect_name: str, field_names: Iterable[str]):
+    """То же, что draft_answer_upsert, но для executemany: значения берутся из excluded."""
+    insert = dialect_insert(dialect_name)
+    stmt = insert(ChecklistDraftAnswer)
+    set_ = {name: stmt.excluded[name] for name in field_names}
+    set_["updated_at"] = stmt.excluded.updated_at
+    return stmt.on_conflict_do_update(
+        index_elements=[ChecklistDraftAnswer.draft_id, ChecklistDraftAnswer.question_id],
+        set_=set_,
+    )
+
+
+def group_draft_rows(
+    items: Sequence[Tuple[int, int, Mapping[str, Any]]],
+    existing_drafts: Iterable[int],
+    now: datetime,
+) -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    """Раскладывает пачку (draft_id, question_id, fields) по набору полей — по одному executemany на группу."""
+    existing = set(existing_drafts)
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for draft_id, question_id, fields in items:
+        if draft_id not in existing:
+            continue
+        _check_draft_fields(fields)
+        key = tuple(sorted(fields))
+        groups.setdefault(key, []).append(
+            {"draft_id": draft_id, "question_id": question_id, "updated_at": now, **fields}
+        )
+    return groups
+
+
+def finished_attempt_query(draft_id: int):
+    """
+    Попытка, уже отправленная из черновика draft_id: повторное «Завершить» (двойной тап,
+    ретрай апдейта, другой процесс, рестарт) получает её же.
+    """
+    return select(ChecklistAnswer.id).where(ChecklistAnswer.draft_id == draft_id)
+
+
+def release_draft_id(draft_id: int):
+    """
+    SQLite может выдать id удалённого черновика новому (rowid без AUTOINCREMENT): пока
+    черновик жив и заблокирован, прежние попытки с этим draft_id к нему не относятся.
+    """
+    return update(ChecklistAnswer).where(ChecklistAnswer.draft_id == draft_id).values(draft_id=None)
+
+
+def lock_draft_for_finish(draft_id: int, now: datetime):
+    """
+    UPDATE … RETURNING: берёт блокировку строки черновика (параллельная отправка ждёт
+    и затем получает 0 строк) и сразу отдаёт поля для шапки попытки.
+    """
+    return (
+        update(ChecklistDraft)
+        .where(ChecklistDraft.id == draft_id)
+        .values(updated_at=now)
+        .returning(ChecklistDraft.checklist_id, ChecklistDraft.user_id, ChecklistDraft.started_at)
+    )
+
+
+def insert_final_answer(draft_id: int, draft: Any, now: datetime):
+    return (
+        insert(ChecklistAnswer)
+        .values(
+            draft_id=draft_id,
+            checklist_id=draft.checklist_id,
+            user_id=draft.user_id,
+            started_at=draft.started_at,
+            submitted_at=now,
+        )
+        .returning(ChecklistAnswer.id)
+    )
+
+
+def move_draft_answers(draft_id: int, answer_id: int, now: datetime) -> List[Any]:
+    """INSERT INTO checklist_question_answers … SELECT … FROM checklist_draft_answers, затем удаление черновика."""
+    copy = insert(ChecklistQuestionAnswer).from_select(
+        ["answer_id", "question_id", "response_value", "comment", "photo_path", "created_at"],
+        select(
+            literal(answer_id, Integer),
+            ChecklistDraftAnswer.question_id,
+            ChecklistDraftAnswer.response_value,
+            ChecklistDraftAnswer.comment,
+            ChecklistDraftAnswer.photo_path,
+            literal(now, DateTime),
+        ).where(ChecklistDraftAnswer.draft_id == draft_id),
+    )
+    return [
+        copy,
+        # ответы удаляем явно: в SQLite ON DELETE CASCADE без PRAGMA foreign_keys не срабатывает
+        delete(ChecklistDraftAnswer).where(ChecklistDraftAnswer.draft_id == draft_id),
+        delete(ChecklistDraft).where(ChecklistDraft.id == draft_id),
+    ]
+
 
 class AttemptsRepo:
     """Создание/поиск попытки, сохранение ответов, комментариев и фото."""
@@ -20,29 +174,10 @@ class AttemptsRepo:
     def get_or_create_draft(self, user_id: int, checklist_id: int) -> int:
         """Возвращает id черновика. Если существует — обновляем updated_at и используем его."""
         with SessionLocal() as db:
-            draft = (
-                db.query(ChecklistDraft)
-                .filter(
-                    ChecklistDraft.user_id == user_id,
-                    ChecklistDraft.checklist_id == checklist_id,
-                )
-                .first()
-            )
-            if draft:
-                draft.updated_at = datetime.utcnow()
-                db.commit()
-                return draft.id
-
-            new = ChecklistDraft(
-                user_id=user_id,
-                checklist_id=checklist_id,
-                started_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
-            )
-            db.add(new)
+            stmt = draft_upsert(db.get_bind().dialect.name, user_id, checklist_id, datetime.utcnow())
+            draft_id = db.execute(stmt).scalar_one()
             db.commit()
-            db.refresh(new)
-            return new.id
+            return draft_id
 
     def get_draft_id(self, user_id: int, checklist_id: int) -> Optional[int]:
         with SessionLocal() as db:
@@ -87,124 +222,78 @@ class AttemptsRepo:
                 }
             return answers
 
-    def save_answer(self, answer_id: int, question_id: int, value: Optional[str]) -> None:
+    def upsert_draft_field(self, draft_id: int, question_id: int, **fields: Optional[str]) -> bool:
+        """
+        Записывает поля ответа (response_value/comment/photo_path) одним INSERT … ON CONFLICT
+        и в той же транзакции обновляет checklist_drafts.updated_at.
+        False — черновика уже нет (завершён/удалён).
+        """
+        _check_draft_fields(fields)
         with SessionLocal() as db:
-            draft = db.query(ChecklistDraft).get(answer_id)  # type: ignore[arg-type]
-            if not draft:
-                return
-
-            row = (
-                db.query(ChecklistDraftAnswer)
-                .filter(
-                    ChecklistDraftAnswer.draft_id == answer_id,
-                    ChecklistDraftAnswer.question_id == question_id,
-                )
-                .one_or_none()
+            now = datetime.utcnow()
+            touched = db.execute(
+                update(ChecklistDraft).where(ChecklistDraft.id == draft_id).values(updated_at=now)
             )
-            if row is None:
-                row = ChecklistDraftAnswer(
-                    draft_id=answer_id,
-                    question_id=question_id,
-                    response_value=value,
-                )
-                db.add(row)
-            else:
-                row.response_value = value
-                row.updated_at = datetime.utcnow()
-
-            draft.updated_at = datetime.utcnow()
+            if not touched.rowcount:
+                return False
+            db.execute(draft_answer_upsert(db.get_bind().dialect.name, draft_id, question_id, fields, now))
             db.commit()
+            return True
 
-    def save_comment(self, answer_id: int, question_id: int, comment: Optional[str]) -> None:
+    def upsert_draft_fields_many(self, items: Sequence[Tuple[int, int, Mapping[str, Any]]]) -> int:
+        """
+        Пакетная запись накопленных правок одной транзакцией.
+        Правки для несуществующих черновиков пропускаются. Возвращает число записанных строк.
+        """
+        if not items:
+            return 0
         with SessionLocal() as db:
-            draft = db.query(ChecklistDraft).get(answer_id)  # type: ignore[arg-type]
-            if not draft:
-                return
-
-            row = (
-                db.query(ChecklistDraftAnswer)
-                .filter(
-                    ChecklistDraftAnswer.draft_id == answer_id,
-                    ChecklistDraftAnswer.question_id == question_id,
-                )
-                .one_or_none()
-            )
-            if row is None:
-                row = ChecklistDraftAnswer(
-                    draft_id=answer_id,
-                    question_id=question_id,
-                    comment=comment,
-                )
-                db.add(row)
-            else:
-                row.comment = comment
-                row.updated_at = datetime.utcnow()
-
-            draft.updated_at = datetime.utcnow()
+            now = datetime.utcnow()
+            draft_ids = {draft_id for draft_id, _, _ in items}
+            existing = db.scalars(
+                update(ChecklistDraft)
+                .where(ChecklistDraft.id.in_(draft_ids))
+                .values(updated_at=now)
+                .returning(ChecklistDraft.id)
+            ).all()
+            dialect_name = db.get_bind().dialect.name
+            written = 0
+            for field_names, rows in group_draft_rows(items, existing, now).items():
+                db.execute(draft_answers_upsert_many(dialect_name, field_names), rows)
+                written += len(rows)
             db.commit()
+            return written
 
-    def save_photo_path(self, answer_id: int, question_id: int, photo_path: Optional[str]) -> None:
-        with SessionLocal() as db:
-            draft = db.query(ChecklistDraft).get(answer_id)  # type: ignore[arg-type]
-            if not draft:
-                return
+    def save_answer(self, answer_id: int, question_id: int, value: Optional[str]) -> None:
+        self.upsert_draft_field(answer_id, question_id, response_value=value)
 
-            row = (
-                db.query(ChecklistDraftAnswer)
-                .filter(
-                    ChecklistDraftAnswer.draft_id == answer_id,
-                    ChecklistDraftAnswer.question_id == question_id,
-                )
-                .one_or_none()
-            )
-            if row is None:
-                row = ChecklistDraftAnswer(
-                    draft_id=answer_id,
-                    question_id=question_id,
-                    photo_path=photo_path,
-                )
-                db.add(row)
-            else:
-                row.photo_path = photo_path
-                row.updated_at = datetime.utcnow()
+    def save_comment(self, answer_id: int, question_id: int, comment: Optional[str]) -> None:
+        self.upsert_draft_field(answer_id, question_id, comment=comment)
 
-            draft.updated_at = datetime.utcnow()
-            db.commit()
+    def save_photo_path(self, answer_id: int, question_id: int, photo_path: Optional[str]) -> None:
+        self.upsert_draft_field(answer_id, question_id, photo_path=photo_path)
 
     def finish_attempt(self, draft_id: int) -> Optional[int]:
-        """Переносит черновик в основную таблицу и возвращает id завершённой попытки."""
+        """
+        Переносит черновик в основную таблицу и возвращает id завершённой попытки.
+        Постоянное число запросов при любом числе вопросов: ответы копируются INSERT … SELECT.
+        Повторная отправка того же черновика новую попытку не создаёт.
+        """
         with SessionLocal() as db:
-            draft: ChecklistDraft | None = (
-                db.query(ChecklistDraft)
-                .options(selectinload(ChecklistDraft.answers))
-                .get(draft_id)  # type: ignore[arg-type]
-            )
-            if not draft:
-                return None
+            now = datetime.utcnow()
+            draft = db.execute(lock_draft_for_finish(draft_id, now)).first()
+            if draft is None:
+                return db.execute(finished_attempt_query(draft_id)).scalar()
 
-            final_answer = ChecklistAnswer(
-                checklist_id=draft.checklist_id,
-                user_id=draft.user_id,
-                started_at=draft.started_at,
-                submitted_at=datetime.utcnow(),
-            )
-            db.add(final_answer)
-            db.flush()
-
-            for answer in draft.answers:
-                db.add(
-                    ChecklistQuestionAnswer(
-                        answer_id=final_answer.id,
-                        question_id=answer.question_id,
-                        response_value=answer.response_value,
-                        comment=answer.comment,
-                        photo_path=answer.photo_path,
-                    )
-                )
-
-            db.delete(draft)
+            db.execute(release_draft_id(draft_id))
+            answer_id = db.execute(insert_final_answer(draft_id, draft, now)).scalar_one()
+            for stmt in move_draft_answers(draft_id, answer_id, now):
+                db.execute(stmt)
+            # итог попытки считаем один раз, в той же транзакции
+            db.execute(attempt_summary_update(answer_id, db.execute(attempt_score_query(answer_id)).all()))
             db.commit()
-            return final_answer.id
+        completed_totals.invalidate(draft.user_id)  # «Пройденные чек-листы»: пересчитать total
+        return answer_id
 
     def discard_attempt(self, draft_id: int) -> None:
         """Удаляет черновик попытки вместе с ответами."""
@@ -1,26 +1,68 @@
 # bot/repositories/checklists.py
 from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
 from checklist.db.db import SessionLocal
 from checklist.db.models.user import User
-from checklist.db.models.role import Position
+from checklist.db.models.role import position_checklist_access
 from checklist.db.models.checklist import Checklist
+from checklist.db.models.cache_version import CATALOG_VERSION, cache_version_query
+
+
+def catalog_for_user_query(user_id: int):
+    """
+    Должность пользователя + id/name её чек-листов одним запросом, без загрузки
+    ORM-объектов (и их selectin-разделов/вопросов). Если чек-листов нет — одна строка с id=None.
+    """
+    return (
+        select(User.position_id, Checklist.id, Checklist.name)
+        .select_from(User)
+        .outerjoin(position_checklist_access, position_checklist_access.c.position_id == User.position_id)
+        .outerjoin(Checklist, Checklist.id == position_checklist_access.c.checklist_id)
+        .where(User.id == user_id)
+        .order_by(Checklist.id)
+    )
+
+
+def catalog_for_position_query(position_id: int):
+    return (
+        select(Checklist.id, Checklist.name)
+        .join(position_checklist_access, position_checklist_access.c.checklist_id == Checklist.id)
+        .where(position_checklist_access.c.position_id == position_id)
+        .order_by(Checklist.id)
+    )
+
+
+def catalog_from_rows(rows) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+    position_id = None
+    items = []
+    for row in rows:
+        position_id = row[0]
+        if row[1] is not None:
+            items.append({"id": row[1], "name": row[2]})
+    return position_id, items
+
 
 class ChecklistsRepo:
-    def get_for_user(self, user_id: int):
+    def get_catalog_for_user(self, user_id: int) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """(position_id, [{"id", "name"}, ...]) — чек-листы, назначенные должности пользователя."""
+        with SessionLocal() as db:
+            return catalog_from_rows(db.execute(catalog_for_user_query(user_id)))
+
+    def get_for_position(self, position_id: int) -> List[Dict[str, Any]]:
+        with SessionLocal() as db:
+            return [{"id": r.id, "name": r.name} for r in db.execute(catalog_for_position_query(position_id))]
+
+    def get_catalog_version(self) -> int:
+        """Счётчик правок каталога (см. checklist/db/models/cache_version.py)."""
+        with SessionLocal() as db:
+            return db.execute(cache_version_query(CATALOG_VERSION)).scalar() or 0
+
+    def get_for_user(self, user_id: int) -> List[Dict[str, Any]]:
         """
         Чек-листы, назначенные должности пользователя (Position.checklists).
         """
-        with SessionLocal() as db:
-            u: User | None = db.query(User).get(user_id)  # type: ignore[arg-type]
-            if not u or not u.position_id:
-                return []
-
-            pos: Position | None = db.query(Position).get(u.position_id)  # type: ignore[arg-type]
-            if not pos:
-                return []
-
-            # возвращаем простой список dict’ов для клавиатуры
-            return [
-                {"id": cl.id, "name": cl.name}
-                for cl in (pos.checklists or [])
-            ]
+        _, items = self.get_catalog_for_user(user_id)
+        return items
@@ -1,19 +1,65 @@
 # bot/repositories/users.py
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-import bcrypt
-from sqlalchemy import func
+from sqlalchemy import Select, func, select, update
 from checklist.db.db import SessionLocal
-from checklist.db.models.user import User
-from checklist.db.models.company import Company
+from checklist.db.models.user import User, normalize_phone as _normalize_phone, user_department_access
+from checklist.db.models.company import Company, Department
+from checklist.db.models.role import Position
+
+
+def user_projection_query() -> Select:
+    """
+    Пользователь + название компании, должности и отделов одним запросом.
+    Строк столько, сколько у пользователя отделов (минимум одна) — собираем их в user_from_rows.
+    """
+    return (
+        select(
+            User.id,
+            User.name,
+            User.phone,
+            User.company_id,
+            User.hashed_password,
+            Company.name.label("company_name"),
+            Position.name.label("position_name"),
+            Department.name.label("department_name"),
+        )
+        .select_from(User)
+        .outerjoin(Company, Company.id == User.company_id)
+        .outerjoin(Position, Position.id == User.position_id)
+        .outerjoin(user_department_access, user_department_access.c.user_id == User.id)
+        .outerjoin(Department, Department.id == user_department_access.c.department_id)
+        .order_by(User.id, Department.id)
+    )
+
+
+def user_from_rows(rows: Iterable[Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    (hashed_password, компактный dict пользователя для FSM) для первого пользователя из строк user_projection_query.
+    """
+    first = None
+    dept_names = []
+    for row in rows:
+        if first is None:
+            first = row
+        elif row.id != first.id:
+            break
+        if row.department_name is not None:
+            dept_names.append(row.department_name)
+    if first is None:
+        return None, None
+    return first.hashed_password, {
+        "id": first.id,
+        "name": first.name,
+        "phone": first.phone or "",
+        "company_id": first.company_id,
+        "company_name": first.company_name or "—",
+        "position": first.position_name or "Не указано",
+        "department": ", ".join(dept_names) if dept_names else "Не указано",
+        "departments": dept_names,
+    }
 
-def _normalize_phone(phone: str | None) -> str:
-    if not phone:
-        return ""
-    digits = "".join(ch for ch in phone if ch.isdigit())
-    # берём последние 10 цифр, как в большинстве логик поиска
-    return digits[-10:] if len(digits) >= 10 else digits
 
 class UsersRepo:
     def find_by_name_phone_company(
@@ -23,74 +69,68 @@ class UsersRepo:
         company_id: int | None,
     ) -> Optional[Dict[str, Any]]:
         """
-        Ищем пользователя по ФИО (LIKE, без регистра), телефону (нормализовано: последние 10 цифр)
+        Ищем пользователя по ФИО (без регистра), телефону (нормализовано: последние 10 цифр)
         и компании (если передана). Возвращаем компактный dict для FSM.
         """
         name = (name or "").strip()
         norm_phone = _normalize_phone(phone)
 
+        q = user_projection_query().where(func.lower(User.name) == func.lower(name))
+
+        if norm_phone:
+            # users.phone_normalized — те же последние 10 цифр, индекс (company_id, phone_normalized)
+            q = q.where(User.phone_normalized == norm_phone)
+
+        if company_id is not None:
+            q = q.where(User.company_id == company_id)
+
         with SessionLocal() as db:
-            q = db.query(User).filter(
-                func.lower(User.name) == func.lower(name)
-            )
+            _, user = user_from_rows(db.execute(q))
+            return user
 
-            if norm_phone:
-                # приведём phone пользователя так же к последним 10 цифрам
-                q = q.filter(func.right(func.regexp_replace(User.phone, r'\D', '', 'g'), 10) == norm_phone) \
-                    if db.bind.dialect.name == "postgresql" else q.filter(User.phone.like(f"%{norm_phone}"))
-
-            if company_id is not None:
-                q = q.filter(User.company_id == company_id)
-
-            u: User | None = q.first()
-            if not u:
-                return None
-
-            company: Company | None = db.query(Company).get(u.company_id)  # type: ignore[arg-type]
-            dept_names = [d.name for d in (u.departments or [])]
-
-            return {
-                "id": u.id,
-                "name": u.name,
-                "phone": u.phone or "",
-                "company_id": u.company_id,
-                "company_name": company.name if company else "—",
-                "position": getattr(getattr(u, "position", None), "name", "Не указано"),
-                "department": ", ".join(dept_names) if dept_names else "Не указано",
-                "departments": dept_names,
-            }
-
-    def find_by_credentials(self, login: str, password: str) -> Optional[Dict[str, Any]]:
+    def find_by_login(self, login: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        (hashed_password, dict пользователя) по логину без учёта регистра; пароль проверяет
+        вызывающий (AuthService → пул bcrypt), чтобы не держать поток БД на время bcrypt.
+        """
         login = (login or "").strip()
-        if not login or not password:
-            return None
+        if not login:
+            return None, None
+
+        # lower(login) — функциональный индекс ix_users_login_lower
+        q = user_projection_query().where(func.lower(User.login) == login.lower())
+        with SessionLocal() as db:
+            return user_from_rows(db.execute(q))
+
+    def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """Пересохранение хеша (rehash при входе); если пароль успели сменить — не трогаем."""
+        with SessionLocal() as db:
+            result = db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            db.commit()
+            return bool(result.rowcount)
+
+    def find_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Пользователь, привязанный к аккаунту Telegram (unique-индекс по telegram_id)."""
+        with SessionLocal() as db:
+            _, user = user_from_rows(db.execute(user_projection_query().where(User.telegram_id == telegram_id)))
+            return user
+
+    def bind_telegram_id(self, user_id: int, telegram_id: int) -> None:
+        """Привязывает аккаунт Telegram к пользователю; прежняя привязка этого аккаунта снимается."""
+        with SessionLocal() as db:
+            db.execute(
+                update(User)
+                .where(User.telegram_id == telegram_id, User.id != user_id)
+                .values(telegram_id=None)
+            )
+            db.execute(update(User).where(User.id == user_id).values(telegram_id=telegram_id))
+            db.commit()
 
+    def unbind_telegram_id(self, telegram_id: int) -> None:
         with SessionLocal() as db:
-            login_lower = login.lower()
-            if not login_lower:
-                return None
-            q = db.query(User).filter(func.lower(User.login) == login_lower)
-            user: User | None = q.first()
-            if not user or not user.hashed_password:
-                return None
-
-            try:
-                if not bcrypt.checkpw(password.encode(), user.hashed_password.encode()):
-                    return None
-            except ValueError:
-                # некорректный hash
-                return None
-
-            company: Company | None = db.query(Company).get(user.company_id)  # type: ignore[arg-type]
-            dept_names = [d.name for d in (user.departments or [])]
-
-            return {
-                "id": user.id,
-                "name": user.name,
-                "phone": user.phone or "",
-                "company_id": user.company_id,
-                "company_name": company.name if company else "—",
-                "position": getattr(getattr(user, "position", None), "name", "Не указано"),
-                "department": ", ".join(dept_names) if dept_names else "Не указано",
-                "departments": dept_names,
-            }
+            db.execute(update(User).where(User.telegram_id == telegram_id).values(telegram_id=None))
+            db.commit()
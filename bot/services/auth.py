@@ -1,34 +1,132 @@
 # bot/services/auth.py
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from checklist.db.async_db import async_enabled
+from checklist.passwords import LoginThrottle, login_limits, login_throttle
 
 from ..repositories.users import UsersRepo
 from ..repositories.checklists import ChecklistsRepo
 from ..repositories.companies import CompaniesRepo
+from ..repositories.aio import AsyncChecklistsRepo, AsyncCompaniesRepo, AsyncUsersRepo
+from .checklist_catalog import ChecklistCatalogCache, checklist_catalog
+from .executor import run_db
+from .passwords import PasswordVerifier, password_verifier
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class AuthService:
     users: UsersRepo = UsersRepo()
     checklists: ChecklistsRepo = ChecklistsRepo()
     companies: CompaniesRepo = CompaniesRepo()
+    ausers: AsyncUsersRepo = AsyncUsersRepo()
+    achecklists: AsyncChecklistsRepo = AsyncChecklistsRepo()
+    acompanies: AsyncCompaniesRepo = AsyncCompaniesRepo()
+    catalog: ChecklistCatalogCache = checklist_catalog
+    verifier: PasswordVerifier = password_verifier
+    throttle: LoginThrottle = login_throttle
+    use_async: bool = field(default_factory=async_enabled)
 
-    def find_user(
+    async def find_user(
         self,
         name: str,
         phone: str,
         company_id: int | None = None,
         company_name: str | None = None,
     ) -> Optional[Dict[str, Any]]:
-        # если явно не передан id, но есть имя компании — найдём id
+        if self.use_async:
+            # если явно не передан id, но есть имя компании — найдём id
+            if company_id is None and company_name:
+                company_id = await self.acompanies.get_id_by_name(company_name)
+            return await self.ausers.find_by_name_phone_company(name=name, phone=phone, company_id=company_id)
+
         if company_id is None and company_name:
-            company_id = self.companies.get_id_by_name(company_name)
-        return self.users.find_by_name_phone_company(
-            name=name, phone=phone, company_id=company_id
+            company_id = await run_db(self.companies.get_id_by_name, company_name)
+        return await run_db(
+            self.users.find_by_name_phone_company, name=name, phone=phone, company_id=company_id
         )
 
-    def get_user_checklists(self, user_id: int):
-        return self.checklists.get_for_user(user_id)
+    async def get_user_checklists(self, user_id: int) -> List[Dict[str, Any]]:
+        """Каталог чек-листов должности пользователя (через кэш, см. checklist_catalog.py)."""
+        if self.catalog.version_check_due():
+            if self.use_async:
+                version = await self.achecklists.get_catalog_version()
+            else:
+                version = await run_db(self.checklists.get_catalog_version)
+            self.catalog.apply_version(version)
+
+        known, position_id, items = self.catalog.lookup(user_id)
+        if items is not None:
+            return items
+        if known and position_id is not None:
+            if self.use_async:
+                items = await self.achecklists.get_for_position(position_id)
+            else:
+                items = await run_db(self.checklists.get_for_position, position_id)
+            return self.catalog.store_position(position_id, items)
+
+        if self.use_async:
+            position_id, items = await self.achecklists.get_catalog_for_user(user_id)
+        else:
+            position_id, items = await run_db(self.checklists.get_catalog_for_user, user_id)
+        return self.catalog.store(user_id, position_id, items)
+
+    async def authenticate(self, login: str, password: str, chat_id: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Вход по логину/паролю. Неудачные попытки считаются по логину и по чату;
+        при превышении лимита бросает LoginThrottled (до обращения к БД и bcrypt).
+        """
+        login = (login or "").strip()
+        if not login or not password:
+            return None
+        limits = login_limits(login, chat_id)
+        self.throttle.check(limits)
+
+        if self.use_async:
+            hashed_password, user = await self.ausers.find_by_login(login)
+        else:
+            hashed_password, user = await run_db(self.users.find_by_login, login)
+
+        ok = False
+        if user is not None:
+            ok, new_hash = await self.verifier.verify(password, hashed_password)
+            if ok and new_hash:
+                await self._store_rehash(user["id"], hashed_password, new_hash)
+
+        if not ok:
+            self.throttle.failure(key for key, _ in limits)
+            return None
+        self.throttle.success(limits[0][0])
+        return user
+
+    async def find_by_telegram(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Вход без пароля для уже привязанного аккаунта Telegram (см. bind_telegram)."""
+        if self.use_async:
+            return await self.ausers.find_by_telegram_id(telegram_id)
+        return await run_db(self.users.find_by_telegram_id, telegram_id)
+
+    async def bind_telegram(self, user_id: int, telegram_id: int) -> None:
+        if self.use_async:
+            await self.ausers.bind_telegram_id(user_id, telegram_id)
+        else:
+            await run_db(self.users.bind_telegram_id, user_id, telegram_id)
+
+    async def unbind_telegram(self, telegram_id: int) -> None:
+        if self.use_async:
+            await self.ausers.unbind_telegram_id(telegram_id)
+        else:
+            await run_db(self.users.unbind_telegram_id, telegram_id)
 
-    def authenticate(self, login: str, password: str) -> Optional[Dict[str, Any]]:
-        return self.users.find_by_credentials(login=login, password=password)
+    async def _store_rehash(self, user_id: int, old_hash: str, new_hash: str) -> None:
+        """Хеш со старым cost factor (BCRYPT_ROUNDS поменяли) — тихо пересохраняем."""
+        try:
+            if self.use_async:
+                await self.ausers.update_password_hash(user_id, old_hash, new_hash)
+            else:
+                await run_db(self.users.update_password_hash, user_id, old_hash, new_hash)
+        except Exception:
+            # вход не ломаем: пересчитаем при следующем
+            logger.exception("[AUTH] rehash failed for user %s", user_id)
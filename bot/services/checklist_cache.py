@@ -0,0 +1,134 @@
+# bot/services/checklist_cache.py
+# Общий для процесса кэш «скомпилированной» структуры чек-листа.
+#
+# Раньше каждый пользователь держал в FSM полный список вопросов и question_map,
+# и оба пересериализовывались на каждом update_data. Теперь в FSM лежат только
+# checklist_id + checklist_version + курсор, а структура читается отсюда.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.checklist_mode import group_questions_by_section
+from .question_render import CompiledQuestion, compile_questions
+
+CHECKLIST_CACHE_TTL = int(os.getenv("CHECKLIST_CACHE_TTL", "60"))   # сек. до перепроверки структуры в БД
+CHECKLIST_CACHE_SIZE = int(os.getenv("CHECKLIST_CACHE_SIZE", "256"))  # сколько версий держим в памяти
+
+
+@dataclass(frozen=True)
+class ChecklistStructure:
+    """Неизменяемая структура чек-листа. Словари вопросов — только для чтения."""
+    checklist_id: int
+    version: str
+    questions: List[Dict[str, Any]]
+    question_map: Dict[int, Dict[str, Any]]
+    sections: List[Dict[str, Any]]           # group_questions_by_section(questions)
+    preview_sections: List[Dict[str, Any]]   # [{"title", "questions": [текст, ...]}] для «показать весь чек-лист»
+    rendered: Dict[int, CompiledQuestion]    # готовые тексты/клавиатуры вопросов, см. question_render.py
+
+    def question(self, qid: Optional[int]) -> Optional[Dict[str, Any]]:
+        if qid is None:
+            return None
+        return self.question_map.get(qid)
+
+    def rendering(self, qid: Optional[int]) -> Optional[CompiledQuestion]:
+        if qid is None:
+            return None
+        return self.rendered.get(qid)
+
+
+def _version_of(questions: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(questions, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def compile_structure(checklist_id: int, questions: List[Dict[str, Any]]) -> ChecklistStructure:
+    sections = group_questions_by_section(questions)
+    preview_sections = []
+    for section in sections:
+        texts = []
+        for q in section["items"]:
+            text = (q.get("text") or q.get("question_text") or "").strip()
+            if not text:
+                text = f"Вопрос #{len(texts) + 1}"
+            texts.append(text)
+        preview_sections.append({"title": section["title"], "questions": texts})
+
+    return ChecklistStructure(
+        checklist_id=checklist_id,
+        version=_version_of(questions),
+        questions=questions,
+        question_map={q["id"]: q for q in questions if q.get("id") is not None},
+        sections=sections,
+        preview_sections=preview_sections,
+        rendered=compile_questions(questions),
+    )
+
+
+class ChecklistStructureCache:
+    """
+    Ключ — (checklist_id, version). Для каждого чек-листа помним «текущую» версию,
+    которую перепроверяем в БД не чаще раза в ttl секунд. Старые версии остаются
+    в LRU, чтобы начатые прохождения доигрывали ту структуру, с которой стартовали.
+    """
+
+    def __init__(self, ttl: int = CHECKLIST_CACHE_TTL, max_size: int = CHECKLIST_CACHE_SIZE) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: "OrderedDict[Tuple[int, str], ChecklistStructure]" = OrderedDict()
+        self._current: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_cached(self, checklist_id: int, version: Optional[str] = None) -> Optional[ChecklistStructure]:
+        """Без обращения к БД. None — нужно вызвать load()."""
+        with self._lock:
+            if version is not None:
+                item = self._items.get((checklist_id, version))
+                if item is not None:
+                    self._items.move_to_end((checklist_id, version))
+                    return item
+                # версия вытеснена/после рестарта — отдаём текущую, если она свежая
+            current = self._current.get(checklist_id)
+            if current is None:
+                return None
+            current_version, loaded_at = current
+            if time.monotonic() - loaded_at > self.ttl:
+                return None
+            return self._items.get((checklist_id, current_version))
+
+    def load(self, checklist_id: int, loader: Callable[[int], List[Dict[str, Any]]]) -> ChecklistStructure:
+        """Читает вопросы через loader (sync, ходит в БД) и кладёт структуру в кэш."""
+        return self.store(checklist_id, loader(checklist_id))
+
+    def store(self, checklist_id: int, questions: List[Dict[str, Any]]) -> ChecklistStructure:
+        """Компилирует уже прочитанные вопросы и делает их текущей версией чек-листа."""
+        structure = compile_structure(checklist_id, questions)
+        key = (checklist_id, structure.version)
+        with self._lock:
+            existing = self._items.get(key)
+            if existing is not None:
+                structure = existing
+            self._items[key] = structure
+            self._items.move_to_end(key)
+            self._current[checklist_id] = (structure.version, time.monotonic())
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return structure
+
+    def invalidate(self, checklist_id: Optional[int] = None) -> None:
+        """Форсирует перечитывание текущей версии (старые версии остаются для активных прохождений)."""
+        with self._lock:
+            if checklist_id is None:
+                self._current.clear()
+            else:
+                self._current.pop(checklist_id, None)
+
+
+checklist_structures = ChecklistStructureCache()
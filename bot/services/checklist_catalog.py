@@ -0,0 +1,132 @@
+# bot/services/checklist_catalog.py
+# Каталог чек-листов по должностям: id/name чек-листов, доступных должности
+# (position_checklist_access), плюс соответствие пользователь → должность.
+# /start и «Доступные чек-листы» ходят в БД за каталогом не чаще раза в CATALOG_CACHE_TTL секунд.
+#
+# Админка — отдельный процесс: её правки доступа (Position.checklists, переименование/удаление
+# Checklist, смена должности пользователя) увеличивают версию каталога в таблице cache_versions
+# (checklist/db/models/cache_version.py). Бот сверяет версию не чаще раза в
+# CATALOG_VERSION_CHECK секунд (один запрос по первичному ключу) и при расхождении
+# сбрасывает кэш целиком.
+#
+#   CATALOG_CACHE_TTL     = сек. жизни записи
+#   CATALOG_CACHE_USERS   = сколько пользователей помним
+#   CATALOG_VERSION_CHECK = как часто сверять версию каталога, сек. (0 — при каждом обращении)
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "60"))          # сек. жизни записи
+CATALOG_CACHE_USERS = int(os.getenv("CATALOG_CACHE_USERS", "10000"))   # сколько пользователей помним
+CATALOG_VERSION_CHECK = float(os.getenv("CATALOG_VERSION_CHECK", "5"))
+
+Items = List[Dict[str, Any]]
+_ALL = object()
+
+
+class ChecklistCatalogCache:
+    """
+    Два уровня: user_id → position_id и position_id → [{"id", "name"}, ...].
+    Пользователи одной должности делят одну запись каталога.
+    """
+
+    def __init__(
+        self,
+        ttl: int = CATALOG_CACHE_TTL,
+        max_users: int = CATALOG_CACHE_USERS,
+        version_check: float = CATALOG_VERSION_CHECK,
+    ) -> None:
+        self.ttl = ttl
+        self.max_users = max_users
+        self.version_check = version_check
+        self._version: Optional[int] = None
+        self._version_checked_at = float("-inf")
+        self._users: "OrderedDict[int, Tuple[Optional[int], float]]" = OrderedDict()
+        self._positions: Dict[Optional[int], Tuple[Items, float]] = {None: ([], float("inf"))}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at <= self.ttl
+
+    def version_check_due(self) -> bool:
+        return time.monotonic() - self._version_checked_at >= self.version_check
+
+    def apply_version(self, version: int) -> None:
+        """Версия каталога из БД: если изменилась с прошлой сверки — сбрасываем всё."""
+        with self._lock:
+            self._version_checked_at = time.monotonic()
+            if version == self._version:
+                return
+            changed = self._version is not None
+            self._version = version
+        if changed:
+            self.invalidate()
+
+    def lookup(self, user_id: int) -> Tuple[bool, Optional[int], Optional[Items]]:
+        """
+        (known, position_id, items):
+          items не None      — всё есть в кэше;
+          known и items None — должность известна, перечитать только её каталог;
+          not known          — нужен полный запрос по пользователю.
+        """
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None or not self._fresh(user[1]):
+                self._misses += 1
+                return False, None, None
+            self._users.move_to_end(user_id)
+            position_id = user[0]
+            catalog = self._positions.get(position_id)
+            if catalog is None or not self._fresh(catalog[1]):
+                self._misses += 1
+                return True, position_id, None
+            self._hits += 1
+            return True, position_id, catalog[0]
+
+    def store(self, user_id: int, position_id: Optional[int], items: Items) -> Items:
+        now = time.monotonic()
+        with self._lock:
+            self._users[user_id] = (position_id, now)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            if position_id is not None:
+                self._positions[position_id] = (items, now)
+        return items
+
+    def store_position(self, position_id: int, items: Items) -> Items:
+        with self._lock:
+            self._positions[position_id] = (items, time.monotonic())
+        return items
+
+    def invalidate(self, position_id: Any = _ALL) -> None:
+        """Без аргумента — сбросить всё (например, переименовали чек-лист)."""
+        with self._lock:
+            if position_id is _ALL:
+                self._users.clear()
+                self._positions = {None: ([], float("inf"))}
+            else:
+                self._positions.pop(position_id, None)
+
+    def forget_user(self, user_id: int) -> None:
+        """Пользователю сменили должность / он вышел — перечитаем при следующем обращении."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._users),
+            "positions": len(self._positions) - 1,
+            "version": self._version,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+checklist_catalog = ChecklistCatalogCache()
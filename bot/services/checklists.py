@@ -1,52 +1,113 @@
 # bot/services/checklists.py
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from checklist.db.async_db import async_enabled
 
 from ..repositories.questions import QuestionsRepo
 from ..repositories.attempts import AttemptsRepo
+from ..repositories.aio import AsyncAttemptsRepo, AsyncQuestionsRepo
+from .checklist_cache import ChecklistStructure, ChecklistStructureCache, checklist_structures
+from .executor import run_db
+from .write_buffer import DraftWriteBuffer
 
 
 @dataclass
 class ChecklistsService:
-    """Бизнес-правила прохождения чек-листа: какой вопрос дальше, как сохранять ответ и т.п."""
+    """
+    Бизнес-правила прохождения чек-листа: какой вопрос дальше, как сохранять ответ и т.п.
+    При DB_ASYNC=1 работает через асинхронные репозитории, иначе — через синхронные в пуле run_db.
+    Правки черновика при DRAFT_WRITE_BEHIND_MS > 0 идут через write-behind буфер (см. write_buffer.py).
+    """
     questions: QuestionsRepo = QuestionsRepo()
     attempts: AttemptsRepo = AttemptsRepo()
+    aquestions: AsyncQuestionsRepo = AsyncQuestionsRepo()
+    aattempts: AsyncAttemptsRepo = AsyncAttemptsRepo()
+    structures: ChecklistStructureCache = checklist_structures
+    use_async: bool = field(default_factory=async_enabled)
+    writes: Optional[DraftWriteBuffer] = None
+
+    def __post_init__(self) -> None:
+        if self.writes is None:
+            self.writes = DraftWriteBuffer(self._write_batch)
 
     # ---- чтение структуры ----
-    def get_questions_for_checklist(self, checklist_id: int) -> List[Dict[str, Any]]:
-        return self.questions.get_for_checklist(checklist_id)
+    async def get_questions_for_checklist(self, checklist_id: int) -> List[Dict[str, Any]]:
+        if self.use_async:
+            return await self.aquestions.get_for_checklist(checklist_id)
+        return await run_db(self.questions.get_for_checklist, checklist_id)
+
+    async def get_structure(self, checklist_id: int) -> ChecklistStructure:
+        """Перечитывает вопросы из БД и обновляет общий кэш структуры (вызывать при промахе кэша)."""
+        questions = await self.get_questions_for_checklist(checklist_id)
+        return self.structures.store(checklist_id, questions)
 
-    def get_first_unanswered(self, answer_id: int) -> Optional[int]:
-        return self.questions.first_unanswered_for_attempt(answer_id)
+    async def get_first_unanswered(self, answer_id: int) -> Optional[int]:
+        if self.use_async:
+            return await self.aquestions.first_unanswered_for_attempt(answer_id)
+        return await run_db(self.questions.first_unanswered_for_attempt, answer_id)
 
     # ---- работа с попыткой ----
-    def start_attempt(self, user_id: int, checklist_id: int) -> int:
-        return self.attempts.get_or_create_draft(user_id=user_id, checklist_id=checklist_id)
+    async def start_attempt(self, user_id: int, checklist_id: int) -> int:
+        if self.use_async:
+            return await self.aattempts.get_or_create_draft(user_id=user_id, checklist_id=checklist_id)
+        return await run_db(self.attempts.get_or_create_draft, user_id=user_id, checklist_id=checklist_id)
+
+    async def get_attempt_answers(self, answer_id: int) -> Dict[int, Dict[str, Optional[str]]]:
+        if self.use_async:
+            answers = await self.aattempts.get_answers_for_attempt(answer_id)
+        else:
+            answers = await run_db(self.attempts.get_answers_for_attempt, answer_id)
+        return self.writes.overlay(answer_id, answers)
+
+    async def _write_field(self, answer_id: int, question_id: int, **fields: Optional[str]) -> None:
+        if self.writes.enabled:
+            await self.writes.put(answer_id, question_id, **fields)
+        elif self.use_async:
+            await self.aattempts.upsert_draft_field(answer_id, question_id, **fields)
+        else:
+            await run_db(self.attempts.upsert_draft_field, answer_id, question_id, **fields)
 
-    def get_attempt_answers(self, answer_id: int) -> Dict[int, Dict[str, Optional[str]]]:
-        return self.attempts.get_answers_for_attempt(answer_id)
+    async def _write_batch(self, items: Sequence[Tuple[int, int, Mapping[str, Any]]]) -> int:
+        if self.use_async:
+            return await self.aattempts.upsert_draft_fields_many(items)
+        return await run_db(self.attempts.upsert_draft_fields_many, items)
 
-    def save_answer(self, answer_id: int, question_id: int, value: Optional[str]) -> None:
-        self.attempts.save_answer(answer_id=answer_id, question_id=question_id, value=value)
+    async def save_answer(self, answer_id: int, question_id: int, value: Optional[str]) -> None:
+        await self._write_field(answer_id, question_id, response_value=value)
 
-    def save_comment(self, answer_id: int, question_id: int, comment: Optional[str]) -> None:
-        self.attempts.save_comment(answer_id=answer_id, question_id=question_id, comment=comment)
+    async def save_comment(self, answer_id: int, question_id: int, comment: Optional[str]) -> None:
+        await self._write_field(answer_id, question_id, comment=comment)
 
-    def save_photo(self, answer_id: int, question_id: int, photo_path: Optional[str]) -> None:
-        self.attempts.save_photo_path(answer_id=answer_id, question_id=question_id, photo_path=photo_path)
+    async def save_photo(self, answer_id: int, question_id: int, photo_path: Optional[str]) -> None:
+        await self._write_field(answer_id, question_id, photo_path=photo_path)
 
-    def finish(self, answer_id: int) -> Optional[int]:
-        return self.attempts.finish_attempt(answer_id)
+    async def finish(self, answer_id: int) -> Optional[int]:
+        await self.writes.flush(answer_id)
+        if self.use_async:
+            return await self.aattempts.finish_attempt(answer_id)
+        return await run_db(self.attempts.finish_attempt, answer_id)
 
-    def discard(self, answer_id: int) -> None:
-        self.attempts.discard_attempt(answer_id)
+    async def discard(self, answer_id: int) -> None:
+        self.writes.drop(answer_id)
+        if self.use_async:
+            await self.aattempts.discard_attempt(answer_id)
+        else:
+            await run_db(self.attempts.discard_attempt, answer_id)
 
-    def find_draft_attempt(self, user_id: int, checklist_id: int) -> Optional[int]:
-        return self.attempts.get_draft_id(user_id=user_id, checklist_id=checklist_id)
+    async def find_draft_attempt(self, user_id: int, checklist_id: int) -> Optional[int]:
+        if self.use_async:
+            return await self.aattempts.get_draft_id(user_id=user_id, checklist_id=checklist_id)
+        return await run_db(self.attempts.get_draft_id, user_id=user_id, checklist_id=checklist_id)
 
-    def get_draft_department(self, draft_id: int) -> Optional[str]:
-        return self.attempts.get_draft_department(draft_id)
+    async def get_draft_department(self, draft_id: int) -> Optional[str]:
+        if self.use_async:
+            return await self.aattempts.get_draft_department(draft_id)
+        return await run_db(self.attempts.get_draft_department, draft_id)
 
-    def set_draft_department(self, draft_id: int, department: Optional[str]) -> None:
-        self.attempts.set_draft_department(draft_id, department)
+    async def set_draft_department(self, draft_id: int, department: Optional[str]) -> None:
+        if self.use_async:
+            await self.aattempts.set_draft_department(draft_id, department)
+        else:
+            await run_db(self.attempts.set_draft_department, draft_id, department)
@@ -1,18 +1,140 @@
 # bot/services/completed.py
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from checklist.db.async_db import async_enabled
+
+from ..repositories.answers import AnswersRepo, CompletedTotals, PageKey, completed_totals
+from ..repositories.aio import AsyncAnswersRepo
+from .executor import run_db
+
+# Курсор страницы в callback_data («completed_page:<курсор>», лимит Telegram — 64 байта):
+#   "a.<pos>.<ts>.<id>" — страница, начинающаяся с попытки (ts, id) включительно;
+#   "p.<pos>.<ts>.<id>" — страница перед попыткой (ts, id) (кнопка «Назад»);
+#   "" / "a" / что-то непонятное — первая страница.
+# pos — номер первой строки страницы (только для нумерации), ts — submitted_at в мкс от эпохи, base36.
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _b36(value: int) -> str:
+    if value <= 0:
+        return "0"
+    out = []
+    while value:
+        value, rem = divmod(value, 36)
+        out.append(_DIGITS[rem])
+    return "".join(reversed(out))
+
+
+def encode_cursor(kind: str, position: int, key: PageKey) -> str:
+    submitted_at, answer_id = key
+    return f"{kind}.{position}.{_b36((submitted_at - _EPOCH) // _MICROSECOND)}.{_b36(answer_id)}"
+
+
+def decode_cursor(token: str) -> Tuple[str, int, Optional[PageKey]]:
+    try:
+        kind, position, ts, answer_id = token.split(".")
+        if kind not in ("a", "p"):
+            raise ValueError(kind)
+        key = (_EPOCH + int(ts, 36) * _MICROSECOND, int(answer_id, 36))
+        return kind, max(0, int(position)), key
+    except (ValueError, OverflowError):
+        return "a", 0, None
+
+
+@dataclass
+class CompletedPage:
+    items: List[Dict[str, Any]]
+    position: int                   # номер первой строки страницы (с нуля)
+    total: int
+    cursor: str                     # курсор этой же страницы — для «Назад к списку»
+    prev_cursor: Optional[str]
+    next_cursor: Optional[str]
 
-from ..repositories.answers import AnswersRepo
 
 @dataclass
 class CompletedService:
     answers: AnswersRepo = AnswersRepo()
+    aanswers: AsyncAnswersRepo = AsyncAnswersRepo()
+    totals: CompletedTotals = completed_totals
+    use_async: bool = field(default_factory=async_enabled)
+
+    async def _fetch(self, user_id: int, limit: int, anchor: Optional[PageKey], newer: bool) -> List[Dict[str, Any]]:
+        if self.use_async:
+            return await self.aanswers.get_completed_page(user_id, limit, anchor, newer)
+        return await run_db(self.answers.get_completed_page, user_id, limit, anchor, newer)
+
+    async def get_total(self, user_id: int) -> int:
+        """COUNT(*) — один раз до следующего finish_attempt (см. CompletedTotals)."""
+        total = self.totals.get(user_id)
+        if total is None:
+            if self.use_async:
+                total = await self.aanswers.count_completed(user_id)
+            else:
+                total = await run_db(self.answers.count_completed, user_id)
+            self.totals.store(user_id, total)
+        return total
+
+    async def get_page(self, user_id: int, cursor: str, limit: int) -> CompletedPage:
+        """
+        Keyset-пагинация по (submitted_at, id): одна выборка limit + 1 строк по индексу,
+        без OFFSET — время не зависит от того, насколько далеко пролистан список.
+        """
+        kind, position, anchor = decode_cursor(cursor)
+        rows = await self._fetch(user_id, limit, anchor, newer=(kind == "p"))
+
+        if kind == "p":
+            has_prev = len(rows) > limit
+            items = list(reversed(rows[:limit]))
+            has_next = True  # anchor — старше этой страницы
+            position = max(0, position - len(items))
+        else:
+            items = rows[:limit]
+            has_next = len(rows) > limit
+            has_prev = anchor is not None and position > 0
+            if not has_prev:
+                position = 0
+
+        if not items and anchor is not None:
+            # попытки вокруг курсора удалили — показываем список с начала
+            return await self.get_page(user_id, "", limit)
+
+        next_cursor = None
+        if has_next:
+            # «Вперёд» — страница с первой строки после текущей: лишняя (limit + 1)-я строка
+            # или, если пришли «Назад», сама anchor-строка
+            next_key = anchor if kind == "p" else rows[limit]["key"]
+            next_cursor = encode_cursor("a", position + len(items), next_key)
+
+        total = await self.get_total(user_id)
+        if items:
+            total = max(total, position + len(items))
+
+        return CompletedPage(
+            items=items,
+            position=position,
+            total=total,
+            cursor=encode_cursor("a", position, items[0]["key"]) if items else "",
+            prev_cursor=encode_cursor("p", position, items[0]["key"]) if has_prev else None,
+            next_cursor=next_cursor,
+        )
 
-    def get_paginated(self, user_id: int, offset: int, limit: int):
-        return self.answers.get_completed_paginated(user_id=user_id, offset=offset, limit=limit)
+    async def get_summary(self, answer_id: int):
+        """Сохранённый при отправке итог попытки (AttemptSummary) — без пересчёта баллов."""
+        if self.use_async:
+            return await self.aanswers.get_summary(answer_id)
+        return await run_db(self.answers.get_summary, answer_id)
 
-    def get_report_preview(self, answer_id: int):
-        return self.answers.get_report_preview(answer_id)
+    async def get_report_preview(self, answer_id: int):
+        if self.use_async:
+            return await self.aanswers.get_report_preview(answer_id)
+        return await run_db(self.answers.get_report_preview, answer_id)
 
-    def get_attempt(self, answer_id: int):
-        return self.answers.get_attempt(answer_id)
+    async def get_attempt(self, answer_id: int):
+        if self.use_async:
+            return await self.aanswers.get_attempt(answer_id)
+        return await run_db(self.answers.get_attempt, answer_id)
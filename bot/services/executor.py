@@ -0,0 +1,143 @@
+# bot/services/executor.py
+# Отдельный пул потоков для синхронных обращений к БД из хендлеров бота.
+#
+# asyncio.to_thread делит общий executor со всем остальным и ничего не знает о размере
+# пула соединений SQLAlchemy: при нагрузке потоки копятся в ожидании соединения.
+# Здесь потоков ровно столько, сколько соединений может выдать engine, а лишние
+# вызовы ждут в очереди (её глубина и время ожидания видны в stats()).
+#
+#   DB_EXECUTOR_WORKERS = размер пула потоков (по умолчанию pool_size + max_overflow engine)
+#   DB_CALL_TIMEOUT     = сколько вызов может ждать свободный поток, сек (0 — без ограничения)
+#
+# Таймаут — только на ожидание в очереди: такой вызов снимается и не выполнится. Начавшийся
+# вызов не прерываем — поток всё равно довёл бы его до commit, а хендлер получил бы ошибку,
+# и повтор пользователя записал бы то же самое второй раз (finish_attempt, bind_telegram_id).
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from sqlalchemy.engine import Engine
+
+from checklist.db.db import engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DB_CALL_TIMEOUT = float(os.getenv("DB_CALL_TIMEOUT", "30"))
+SLOW_WAIT_WARNING = 1.0  # сек. в очереди, после которых пишем предупреждение
+_DEFAULT = object()
+
+
+def pool_capacity(db_engine: Engine) -> int:
+    """Сколько соединений одновременно может выдать engine (pool_size + max_overflow)."""
+    pool = db_engine.pool
+    size = getattr(pool, "size", None)
+    if not callable(size):
+        return 1  # SingletonThreadPool/StaticPool и т.п. — сериализуем
+    overflow = max(0, int(getattr(pool, "_max_overflow", 0) or 0))
+    return max(1, int(size()) + overflow)
+
+
+class DBExecutor:
+    """Пул потоков под БД с метриками очереди и таймаутом на ожидание в ней."""
+
+    def __init__(self, workers: int, timeout: Optional[float] = DB_CALL_TIMEOUT) -> None:
+        self.workers = workers
+        self.timeout = timeout or None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._calls = 0
+        self._started = 0
+        self._errors = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def run(self, fn: Callable[..., T], *args: Any, _timeout: Any = _DEFAULT, **kwargs: Any) -> T:
+        # _timeout — с подчёркиванием, чтобы не перехватывать аргумент timeout у самой fn
+        timeout = self.timeout if _timeout is _DEFAULT else _timeout
+        submitted = time.monotonic()
+        ctx = contextvars.copy_context()
+
+        def call() -> T:
+            waited = time.monotonic() - submitted
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._started += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            if waited > SLOW_WAIT_WARNING:
+                logger.warning("[DB] %s waited %.2fs for a worker", getattr(fn, "__qualname__", fn), waited)
+            try:
+                return ctx.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        with self._lock:
+            self._queued += 1
+            self._calls += 1
+        cf = self._pool.submit(call)
+        future = asyncio.wrap_future(cf)
+        try:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            except asyncio.TimeoutError:
+                if not cf.cancel():
+                    # уже выполняется — дожидаемся результата, а не бросаем его на полпути
+                    return await future
+                with self._lock:
+                    self._timeouts += 1
+                logger.error("[DB] %s waited over %ss for a worker, dropped", getattr(fn, "__qualname__", fn), timeout)
+                raise
+        except asyncio.CancelledError:
+            # хендлер отменён — снимаем вызов, если он ещё в очереди (shield сам этого не сделает)
+            cf.cancel()
+            raise
+        except asyncio.TimeoutError:
+            raise
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            if cf.cancelled():
+                # так и не начал выполняться — убираем из очереди
+                with self._lock:
+                    self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self._started
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "calls": self._calls,
+                "errors": self._errors,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._wait_total / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+db_executor = DBExecutor(int(os.getenv("DB_EXECUTOR_WORKERS") or 0) or pool_capacity(engine))
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет синхронную функцию репозитория/сервиса в пуле БД: `await run_db(service.method, arg)`."""
+    return await db_executor.run(fn, *args, **kwargs)
@@ -0,0 +1,174 @@
+# bot/services/passwords.py
+# Проверка паролей вне event loop и вне пула БД: bcrypt намеренно тяжёлый (десятки мс CPU),
+# и шквал входов в начало смены через asyncio.to_thread / run_db занимал потоки, нужные
+# хендлерам сохранения ответов. Здесь — отдельный ограниченный пул процессов.
+#
+#   PASSWORD_WORKERS     = процессов в пуле (по умолчанию min(4, CPU)); 0 — пул из одного потока
+#   PASSWORD_MAX_PENDING = сколько проверок одновременно отдано в пул, остальные ждут в loop
+#
+# Бенчмарк (200 одновременных входов + «фоновые» запросы к пулу БД):
+#   python -m bot.services.passwords
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from checklist.passwords import BCRYPT_ROUNDS, verify_and_upgrade
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS") or min(4, os.cpu_count() or 1))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING") or 0) or PASSWORD_WORKERS * 2 or 2
+
+
+class PasswordVerifier:
+    """Пул создаётся лениво, при первой проверке; shutdown() — при остановке бота."""
+
+    def __init__(self, workers: int = PASSWORD_WORKERS, max_pending: int = PASSWORD_MAX_PENDING) -> None:
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+        self._pool: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._checks = 0
+        self._rehashes = 0
+        self._time_total = 0.0
+        self._time_max = 0.0
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.workers > 0:
+                # spawn: не форкаем процесс с запущенным loop и потоками пула БД
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bcrypt")
+        return self._pool
+
+    async def verify(
+        self,
+        password: str,
+        hashed_password: Optional[str],
+        rounds: int = BCRYPT_ROUNDS,
+    ) -> Tuple[bool, Optional[str]]:
+        """(пароль верный, новый хеш при смене BCRYPT_ROUNDS) — см. checklist.passwords.verify_and_upgrade."""
+        if not password or not hashed_password:
+            return False, None
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        started = time.monotonic()
+        self._waiting += 1
+        waiting = True
+        try:
+            async with self._slots:
+                self._waiting -= 1
+                waiting = False
+                ok, new_hash = await self._run(password, hashed_password, rounds)
+        finally:
+            if waiting:
+                self._waiting -= 1
+            elapsed = time.monotonic() - started
+            self._checks += 1
+            self._time_total += elapsed
+            self._time_max = max(self._time_max, elapsed)
+        if new_hash:
+            self._rehashes += 1
+        return ok, new_hash
+
+    async def _run(self, password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor(), verify_and_upgrade, password, hashed_password, rounds)
+        except BrokenProcessPool:
+            # воркер упал (OOM, kill) — пересоздаём пул и повторяем один раз
+            logger.warning("[PASSWORDS] process pool is broken, restarting")
+            self.shutdown(wait=False)
+            return await loop.run_in_executor(self._executor(), verify_and_upgrade, password, hashed_password, rounds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "waiting": self._waiting,
+            "checks": self._checks,
+            "rehashes": self._rehashes,
+            "avg_ms": round(self._time_total / self._checks * 1000, 2) if self._checks else 0.0,
+            "max_ms": round(self._time_max * 1000, 2),
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+password_verifier = PasswordVerifier()
+
+
+async def _benchmark(logins: int = 200, rounds: int = 8, db_workers: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    200 одновременных входов, параллельно — короткие «запросы к БД» в пуле размером с пул
+    соединений (как run_db). Было: bcrypt внутри run_db; стало: bcrypt в PasswordVerifier.
+    """
+    from checklist.passwords import hash_password
+
+    hashed = hash_password("secret", rounds)
+
+    def pct(values: list, q: float) -> float:
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 1)
+
+    async def run(mode: str) -> Dict[str, float]:
+        loop = asyncio.get_running_loop()
+        db_pool = ThreadPoolExecutor(max_workers=db_workers)
+        verifier = PasswordVerifier()
+        await verifier.verify("secret", hashed, rounds)  # прогрев пула процессов
+        login_times: list = []
+        probe_times: list = []
+        done = asyncio.Event()
+
+        async def login() -> None:
+            started = time.monotonic()
+            if mode == "inline":
+                await loop.run_in_executor(db_pool, verify_and_upgrade, "secret", hashed, rounds)
+            else:
+                await verifier.verify("secret", hashed, rounds)
+            login_times.append(time.monotonic() - started)
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.monotonic()
+                await loop.run_in_executor(db_pool, time.sleep, 0.001)
+                probe_times.append(time.monotonic() - started)
+                await asyncio.sleep(0.01)
+
+        probes = [asyncio.create_task(probe()) for _ in range(5)]
+        started = time.monotonic()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        total = time.monotonic() - started
+        done.set()
+        await asyncio.gather(*probes)
+        verifier.shutdown()
+        db_pool.shutdown()
+        return {
+            "total_s": round(total, 2),
+            "login_p50_ms": pct(login_times, 0.5),
+            "login_p95_ms": pct(login_times, 0.95),
+            "db_probe_p95_ms": pct(probe_times, 0.95),
+        }
+
+    return {mode: await run(mode) for mode in ("inline", "pool")}
+
+
+if __name__ == "__main__":
+    for mode, result in asyncio.run(_benchmark()).items():
+        print(f"{mode:8s}", "  ".join(f"{k}={v}" for k, v in result.items()))
+
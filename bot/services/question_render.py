@@ -0,0 +1,257 @@
+# bot/services/question_render.py
+# Предкомпилированные отрисовки вопросов: экранированный текст и шаблоны клавиатур
+# строятся один раз на версию чек-листа (см. compile_structure), а на каждое нажатие
+# остаётся только наложить состояние черновика (ответ, есть ли комментарий/фото).
+#
+# Микробенчмарк: python -m bot.services.question_render
+from __future__ import annotations
+
+import html
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+YESNO_TYPES = {"yesno", "yes_no", "boolean", "bool", "yn"}
+SCALE_TYPES = {"scale", "rating"}
+SCALE_VALUES = ("1", "2", "3", "4", "5")
+
+_YES_VALUES = {"yes", "да", "true", "1"}
+_NO_VALUES = {"no", "нет", "false", "0"}
+
+
+def _escape(text: Optional[str]) -> str:
+    return html.escape(text or "")
+
+
+@dataclass(eq=False)
+class CompiledQuestion:
+    """
+    Отрисовка одного вопроса. Клавиатуры (InlineKeyboardMarkup) кэшируются по состоянию
+    черновика — вариантов немного: выбранный ответ × есть комментарий × есть фото.
+    Возвращаемые объекты общие — изменять их нельзя.
+    """
+    qid: int
+    index: int                 # позиция в чек-листе (для callback_data comment:/photo:)
+    raw_type: str              # как в БД — на нём построена клавиатура обычного режима
+    kind: str                  # "yesno" | "scale" | "text"
+    base_html: str
+    require_comment: bool
+    require_photo: bool
+    _keyboards: Dict[Any, InlineKeyboardMarkup] = field(default_factory=dict, repr=False)
+    _block_keyboards: Dict[Any, InlineKeyboardMarkup] = field(default_factory=dict, repr=False)
+    _texts: Dict[Any, str] = field(default_factory=dict, repr=False)
+
+    # ---- текст ----
+
+    def text(self, draft: Dict[str, Any]) -> str:
+        """Текст вопроса + индикаторы введённых данных."""
+        answer = draft.get("answer")
+        answer_str = str(answer).strip() if answer is not None else None
+        comment_present = bool(draft.get("comment"))
+        photo_present = bool(draft.get("photo_path"))
+
+        key = (answer_str, comment_present, photo_present)
+        # свободный текст ответа не кэшируем — иначе кэш растёт без границ
+        cacheable = answer_str is None or self.kind != "text"
+        if cacheable:
+            cached = self._texts.get(key)
+            if cached is not None:
+                return cached
+
+        parts = [self.base_html]
+
+        req_lines: List[str] = []
+        if self.require_comment:
+            req_lines.append("✅ Комментарий добавлен" if comment_present else "💬 Требуется комментарий")
+        if self.require_photo:
+            req_lines.append("✅ Фото добавлено" if photo_present else "📷 Требуется фото")
+        if req_lines:
+            parts.append("\n".join(req_lines))
+
+        extra: List[str] = []
+        if answer_str is not None:
+            if answer_str == "":
+                extra.append("🟦 Ответ: <b>—</b>")
+            else:
+                extra.append(f"{self._answer_emoji(answer_str)} Ответ: <b>{_escape(answer_str)}</b>")
+        if comment_present and not self.require_comment:
+            extra.append("💬 Комментарий добавлен")
+        if photo_present and not self.require_photo:
+            extra.append("📷 Фото добавлено")
+        if extra:
+            parts.append("\n".join(extra))
+
+        result = "\n\n".join(parts)
+        if cacheable and len(self._texts) < 64:
+            self._texts[key] = result
+        return result
+
+    def _answer_emoji(self, answer_str: str) -> str:
+        if self.kind == "yesno":
+            lower = answer_str.lower()
+            if lower in _YES_VALUES:
+                return "🟩"
+            if lower in _NO_VALUES:
+                return "🟥"
+            return "🟪"
+        if self.kind == "scale":
+            return "🟨"
+        return "🟪"
+
+    # ---- обычный режим (по одному вопросу) ----
+
+    def keyboard(self, selected: Optional[str] = None) -> InlineKeyboardMarkup:
+        """Ответ/коммент/фото/далее + назад к предыдущему. selected — подсвечиваемый вариант."""
+        key = selected if selected in ("yes", "no", "text", *SCALE_VALUES) else None
+        markup = self._keyboards.get(key)
+        if markup is None:
+            markup = self._build_keyboard(key)
+            self._keyboards[key] = markup
+        return markup
+
+    def _build_keyboard(self, selected: Optional[str]) -> InlineKeyboardMarkup:
+        def mark(label: str, key: str) -> str:
+            # нейтральная метка при выборе
+            return f"• {label}" if selected == key else label
+
+        rows = []
+        if self.raw_type == "yesno":
+            rows.append([
+                InlineKeyboardButton(text=mark("✅ Да", "yes"), callback_data="answer:yes"),
+                InlineKeyboardButton(text=mark("❌ Нет", "no"), callback_data="answer:no"),
+            ])
+        elif self.raw_type == "scale":
+            rows.append([
+                InlineKeyboardButton(text=mark(value, value), callback_data=f"answer:{value}")
+                for value in SCALE_VALUES
+            ])
+        else:
+            rows.append([InlineKeyboardButton(text=mark("✍️ Ввести текст", "text"), callback_data="answer:text")])
+
+        rows.append([
+            InlineKeyboardButton(text="💬 Комментарий", callback_data=f"comment:{self.index}"),
+            InlineKeyboardButton(text="📷 Фото", callback_data=f"photo:{self.index}"),
+        ])
+        rows.append([InlineKeyboardButton(text="➡️ Далее", callback_data="continue_after_extra")])
+        rows.append([InlineKeyboardButton(text="⬅️ Назад к предыдущему", callback_data="prev_question")])
+        return InlineKeyboardMarkup(inline_keyboard=rows)
+
+    # ---- режим блоков ----
+
+    def _block_answer_key(self, answer: Any) -> Any:
+        if answer is None:
+            return None
+        if self.kind == "yesno":
+            lower = str(answer).lower()
+            return lower if lower in ("yes", "no") else None
+        if self.kind == "scale":
+            return str(answer) if str(answer) in SCALE_VALUES else None
+        return answer not in (None, "")
+
+    def block_keyboard(self, draft: Dict[str, Any]) -> InlineKeyboardMarkup:
+        key = (self._block_answer_key(draft.get("answer")), bool(draft.get("comment")), bool(draft.get("photo_path")))
+        markup = self._block_keyboards.get(key)
+        if markup is None:
+            markup = self._build_block_keyboard(*key)
+            self._block_keyboards[key] = markup
+        return markup
+
+    def _build_block_keyboard(self, answer_key: Any, has_comment: bool, has_photo: bool) -> InlineKeyboardMarkup:
+        qid = self.qid
+
+        def mark(label: str, match: str) -> str:
+            return f"{label}✔" if answer_key == match else label
+
+        comment_btn = InlineKeyboardButton(text="💬✔" if has_comment else "💬", callback_data=f"block_comment:{qid}")
+        photo_btn = InlineKeyboardButton(text="📷✔" if has_photo else "📷", callback_data=f"block_photo:{qid}")
+
+        rows: List[List[InlineKeyboardButton]] = []
+        if self.kind == "yesno":
+            rows.append([
+                InlineKeyboardButton(text=mark("✅", "yes"), callback_data=f"block_answer:{qid}:yes"),
+                InlineKeyboardButton(text=mark("❌", "no"), callback_data=f"block_answer:{qid}:no"),
+                comment_btn,
+                photo_btn,
+            ])
+        elif self.kind == "scale":
+            rows.append([
+                InlineKeyboardButton(text=mark(value, value), callback_data=f"block_answer:{qid}:{value}")
+                for value in SCALE_VALUES
+            ])
+            rows.append([comment_btn, photo_btn])
+        else:
+            answer_label = "✍️✔" if answer_key else "✍️"
+            rows.append([
+                InlineKeyboardButton(text=answer_label, callback_data=f"block_answer:{qid}:text"),
+                comment_btn,
+                photo_btn,
+            ])
+        return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def compile_question(question: Dict[str, Any], index: int) -> CompiledQuestion:
+    raw_type = question.get("type") or ""
+    normalized = raw_type.lower().strip()
+    if normalized in YESNO_TYPES:
+        kind = "yesno"
+    elif normalized in SCALE_TYPES:
+        kind = "scale"
+    else:
+        kind = "text"
+    return CompiledQuestion(
+        qid=question["id"],
+        index=index,
+        raw_type=raw_type,
+        kind=kind,
+        base_html=_escape(str(question.get("text", ""))),
+        require_comment=bool(question.get("require_comment")),
+        require_photo=bool(question.get("require_photo")),
+    )
+
+
+def compile_questions(questions: List[Dict[str, Any]]) -> Dict[int, CompiledQuestion]:
+    return {
+        q["id"]: compile_question(q, index)
+        for index, q in enumerate(questions)
+        if q.get("id") is not None
+    }
+
+
+def _benchmark(rounds: int = 2000) -> List[Tuple[str, float]]:
+    """Сравнение: сборка отрисовки на каждое нажатие (как раньше) против скомпилированной."""
+    import timeit
+
+    questions = [
+        {"id": i, "text": f"Проверка <зоны> №{i} & чистота", "type": ("yesno", "scale", "text")[i % 3],
+         "require_comment": i % 4 == 0, "require_photo": i % 5 == 0}
+        for i in range(1, 31)
+    ]
+    drafts = [{"answer": ("yes", "3", None)[i % 3], "comment": "ok" if i % 2 else None, "photo_path": None}
+              for i in range(1, 31)]
+    compiled = compile_questions(questions)
+
+    def per_tap_rebuild() -> None:
+        for idx, (q, d) in enumerate(zip(questions, drafts)):
+            cq = compile_question(q, idx)
+            cq.text(d)
+            cq.keyboard(d.get("answer"))
+            cq.block_keyboard(d)
+
+    def precompiled() -> None:
+        for q, d in zip(questions, drafts):
+            cq = compiled[q["id"]]
+            cq.text(d)
+            cq.keyboard(d.get("answer"))
+            cq.block_keyboard(d)
+
+    results = []
+    for name, fn in (("rebuild", per_tap_rebuild), ("precompiled", precompiled)):
+        seconds = min(timeit.repeat(fn, number=rounds // 10, repeat=5))
+        results.append((name, seconds / (rounds // 10) / len(questions) * 1e6))
+    return results
+
+
+if __name__ == "__main__":
+    for name, usec in _benchmark():
+        print(f"{name:12s} {usec:8.2f} µs / вопрос")
@@ -0,0 +1,160 @@
+# bot/services/write_buffer.py
+# Write-behind для правок черновика: частые нажатия в режиме блоков склеиваются
+# по (draft_id, question_id) и пишутся одной транзакцией раз в interval_ms.
+#
+#   DRAFT_WRITE_BEHIND_MS   = интервал сброса, мс (0 — выключено, пишем сразу)
+#   DRAFT_WRITE_BEHIND_MAX  = при таком числе накопленных строк сбрасываем, не дожидаясь таймера
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DRAFT_WRITE_BEHIND_MS = int(os.getenv("DRAFT_WRITE_BEHIND_MS", "0"))
+DRAFT_WRITE_BEHIND_MAX = int(os.getenv("DRAFT_WRITE_BEHIND_MAX", "500"))
+
+Key = Tuple[int, int]  # (draft_id, question_id)
+BatchWriter = Callable[[Sequence[Tuple[int, int, Mapping[str, Any]]]], Awaitable[int]]
+
+_buffers: "weakref.WeakSet[DraftWriteBuffer]" = weakref.WeakSet()
+
+
+class DraftWriteBuffer:
+    """
+    Накапливает правки черновиков в памяти. Работает в одном event loop, поэтому
+    отдельная блокировка нужна только на сам сброс — чтобы пачки ложились в БД по порядку.
+    """
+
+    def __init__(
+        self,
+        writer: BatchWriter,
+        interval_ms: int = DRAFT_WRITE_BEHIND_MS,
+        max_pending: int = DRAFT_WRITE_BEHIND_MAX,
+    ) -> None:
+        self.writer = writer
+        self.interval = max(0, interval_ms) / 1000
+        self.max_pending = max(1, max_pending)
+        self._pending: Dict[Key, Dict[str, Any]] = {}
+        self._inflight: Dict[Key, Dict[str, Any]] = {}  # уже отданы writer'у, но ещё не закоммичены
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        # метрики
+        self._edits = 0
+        self._flushes = 0
+        self._rows = 0
+        self._batch_max = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._failures = 0
+        _buffers.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    # ---- запись ----
+
+    async def put(self, draft_id: int, question_id: int, **fields: Any) -> None:
+        self._pending.setdefault((draft_id, question_id), {}).update(fields)
+        self._edits += 1
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("[DRAFTS] background flush failed, will retry")
+            if self._pending:
+                self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self, draft_id: Optional[int] = None) -> int:
+        """Пишет накопленное (всё или только по одному черновику). Возвращает число строк."""
+        async with self._flush_lock:
+            if draft_id is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {k: self._pending.pop(k) for k in [k for k in self._pending if k[0] == draft_id]}
+            if not batch:
+                return 0
+
+            started = time.monotonic()
+            self._inflight = batch
+            try:
+                await self.writer([(d, q, fields) for (d, q), fields in batch.items()])
+            except BaseException:  # в т.ч. отмена при остановке — правки не теряем
+                self._failures += 1
+                # возвращаем в буфер, не затирая более свежие правки
+                for key, fields in batch.items():
+                    self._pending[key] = {**fields, **self._pending.get(key, {})}
+                raise
+            finally:
+                self._inflight = {}
+
+            elapsed = time.monotonic() - started
+            self._flushes += 1
+            self._rows += len(batch)
+            self._batch_max = max(self._batch_max, len(batch))
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+            return len(batch)
+
+    def drop(self, draft_id: int) -> None:
+        """Черновик удаляется — его несохранённые правки больше не нужны."""
+        for key in [k for k in self._pending if k[0] == draft_id]:
+            del self._pending[key]
+
+    # ---- чтение ----
+
+    def overlay(self, draft_id: int, answers: Dict[int, Dict[str, Optional[str]]]) -> Dict[int, Dict[str, Optional[str]]]:
+        """Накладывает несохранённые правки на ответы из БД (read-your-writes)."""
+        for (d, qid), fields in [*self._inflight.items(), *self._pending.items()]:
+            if d != draft_id:
+                continue
+            entry = answers.setdefault(qid, {"answer": None, "comment": None, "photo_path": None})
+            if "response_value" in fields:
+                entry["answer"] = fields["response_value"]
+            if "comment" in fields:
+                entry["comment"] = fields["comment"]
+            if "photo_path" in fields:
+                entry["photo_path"] = fields["photo_path"]
+        return answers
+
+    async def close(self) -> None:
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "edits": self._edits,
+            "flushes": self._flushes,
+            "rows": self._rows,
+            "avg_batch": round(self._rows / self._flushes, 2) if self._flushes else 0.0,
+            "max_batch": self._batch_max,
+            "avg_flush_ms": round(self._latency_total / self._flushes * 1000, 2) if self._flushes else 0.0,
+            "max_flush_ms": round(self._latency_max * 1000, 2),
+            "failures": self._failures,
+        }
+
+
+async def flush_all() -> None:
+    """Сброс всех буферов процесса — вызывается при остановке бота."""
+    for buffer in list(_buffers):
+        try:
+            await buffer.close()
+        except Exception:
+            logger.exception("[DRAFTS] flush on shutdown failed, %s edits lost", len(buffer._pending))
+
+
+def buffers_stats() -> List[Dict[str, Any]]:
+    return [buffer.stats() for buffer in list(_buffers)]
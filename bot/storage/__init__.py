@@ -0,0 +1,57 @@
+# bot/storage/__init__.py
+# Выбор FSM-хранилища бота по переменным окружения:
+#   FSM_STORAGE   = sql (по умолчанию) | redis | memory
+#   FSM_REDIS_URL = redis://localhost:6379/0   (для FSM_STORAGE=redis)
+#   FSM_STATE_TTL = сколько секунд хранить неактивное состояние (0 — бессрочно)
+#
+# sql изолирует апдейты одного пользователя только внутри процесса (SimpleEventIsolation);
+# несколько процессов бота на одной базе — FSM_STORAGE=redis (распределённые блокировки).
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional, Tuple
+
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_TTL = 7 * 24 * 60 * 60  # неделя без активности
+
+
+def _state_ttl() -> Optional[int]:
+    raw = (os.getenv("FSM_STATE_TTL") or "").strip()
+    if not raw:
+        return DEFAULT_STATE_TTL
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning("[FSM] некорректный FSM_STATE_TTL=%r, используем %s", raw, DEFAULT_STATE_TTL)
+        return DEFAULT_STATE_TTL
+    return value if value > 0 else None
+
+
+def create_storage() -> Tuple[BaseStorage, Optional[BaseEventIsolation]]:
+    """Возвращает (storage, events_isolation) для Dispatcher."""
+    backend = (os.getenv("FSM_STORAGE") or "sql").strip().lower()
+    ttl = _state_ttl()
+
+    if backend == "memory":
+        return MemoryStorage(), None
+
+    if backend == "redis":
+        from .redis_storage import create_redis_storage
+
+        url = (os.getenv("FSM_REDIS_URL") or "redis://localhost:6379/0").strip()
+        return create_redis_storage(url, ttl=ttl)
+
+    if backend == "sql":
+        from checklist.db.db import engine
+        from .sql import SQLStorage
+
+        # хендлеры одного пользователя — по очереди: get/set state и data уходят в поток,
+        # без изоляции два апдейта перемешали бы свои чтения и записи
+        return SQLStorage(engine, ttl=ttl), SimpleEventIsolation()
+
+    raise RuntimeError(f"Неизвестный FSM_STORAGE={backend!r}. Допустимо: sql, redis, memory.")
@@ -0,0 +1,57 @@
+# bot/storage/codec.py
+# JSON-сериализация данных FSM для внешних хранилищ (SQL/Redis).
+#
+# В data хэндлеры кладут не только примитивы: State (return_state),
+# datetime и dataclass'ы отчёта (AttemptData). MemoryStorage это переживал,
+# а для персистентных бэкендов нужно уметь записать и поднять обратно.
+from __future__ import annotations
+
+import dataclasses
+import datetime as dt
+import json
+from typing import Any, Dict
+
+from aiogram.fsm.state import State
+
+_DATETIME_TAG = "__datetime__"
+_DATACLASS_TAG = "__dataclass__"
+
+
+def _dataclass_registry() -> Dict[str, type]:
+    # импорт внутри, чтобы не тянуть report_data (и БД) при импорте пакета
+    from ..report_data import AnswerRow, AttemptData, AttemptSummary, SectionResult
+
+    return {cls.__name__: cls for cls in (AnswerRow, AttemptData, AttemptSummary, SectionResult)}
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, State):
+        # State сравнивается со строкой, поэтому достаточно хранить его имя
+        return obj.state
+    if isinstance(obj, dt.datetime):
+        return {_DATETIME_TAG: obj.isoformat()}
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # поля отдаём «как есть», вложенные dataclass'ы снова пройдут через _default
+        fields = {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+        return {_DATACLASS_TAG: type(obj).__name__, "fields": fields}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _object_hook(obj: Dict[str, Any]) -> Any:
+    if _DATETIME_TAG in obj and len(obj) == 1:
+        return dt.datetime.fromisoformat(obj[_DATETIME_TAG])
+    if _DATACLASS_TAG in obj:
+        cls = _dataclass_registry().get(obj[_DATACLASS_TAG])
+        if cls is not None:
+            return cls(**obj.get("fields", {}))
+    return obj
+
+
+def dumps(data: Any) -> str:
+    return json.dumps(data, default=_default, ensure_ascii=False)
+
+
+def loads(raw: str | bytes | None) -> Any:
+    if not raw:
+        return {}
+    return json.loads(raw, object_hook=_object_hook)
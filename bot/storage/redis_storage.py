@@ -0,0 +1,34 @@
+# bot/storage/redis_storage.py
+# FSM-хранилище по протоколу Redis (Redis/KeyDB/Valkey и т.п.).
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage, DefaultKeyBuilder
+
+from . import codec
+
+
+def create_redis_storage(url: str, ttl: Optional[int] = None) -> Tuple[BaseStorage, BaseEventIsolation]:
+    """
+    RedisStorage из aiogram + распределённые блокировки, чтобы несколько процессов бота
+    не обрабатывали апдейты одного пользователя одновременно.
+    Пакет `redis` — необязательная зависимость, нужен только для этого бэкенда.
+    """
+    try:
+        from aiogram.fsm.storage.redis import RedisEventIsolation, RedisStorage
+    except ImportError as exc:  # pragma: no cover - зависит от окружения
+        raise RuntimeError(
+            "Для FSM_STORAGE=redis установите пакет redis (pip install redis)."
+        ) from exc
+
+    storage = RedisStorage.from_url(
+        url,
+        key_builder=DefaultKeyBuilder(with_destiny=True),
+        state_ttl=ttl or None,
+        data_ttl=ttl or None,
+        json_dumps=codec.dumps,
+        json_loads=codec.loads,
+    )
+    isolation = RedisEventIsolation(redis=storage.redis, key_builder=storage.key_builder)
+    return storage, isolation
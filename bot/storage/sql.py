@@ -0,0 +1,167 @@
+# bot/storage/sql.py
+# FSM-хранилище в таблице bot_fsm_states (тот же engine, что у остального приложения).
+# Таблицу создаёт миграция c41d7e2a9b10 (alembic upgrade head).
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Mapping, Optional
+from weakref import WeakValueDictionary
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from sqlalchemy import case, delete
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from checklist.db.models.bot_state import BotFsmState
+
+from ..repositories.attempts import dialect_insert
+from ..services.executor import run_db
+from . import codec
+
+logger = logging.getLogger(__name__)
+
+
+class SQLStorage(BaseStorage):
+    """
+    Персистентное FSM-хранилище поверх SQLAlchemy.
+    ttl — сколько секунд хранится «простаивающая» запись (None/0 — бессрочно).
+    Просроченные записи не отдаются при чтении и периодически удаляются.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        key_builder: KeyBuilder | None = None,
+        ttl: Optional[int] = None,
+        purge_interval: int = 600,
+    ) -> None:
+        self.engine = engine
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.ttl = ttl or None
+        self.purge_interval = purge_interval
+        self._session_factory = sessionmaker(bind=engine)
+        self._last_purge = 0.0
+        # блокировки update_data по ключу; освобождаются сами, когда их никто не ждёт
+        self._locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+    # ---- sync-часть (выполняется в потоке) ----
+
+    def _is_expired(self, row: BotFsmState) -> bool:
+        if not self.ttl or row.updated_at is None:
+            return False
+        return row.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    def _read(self, key: str) -> Optional[BotFsmState]:
+        with self._session_factory() as db:
+            row = db.get(BotFsmState, key)
+            if row is None or self._is_expired(row):
+                return None
+            db.expunge(row)
+            return row
+
+    def _write(self, key: str, **fields: Any) -> None:
+        """
+        INSERT … ON CONFLICT (key) DO UPDATE только переданных полей: без гонки «прочитал —
+        не нашёл — вставил» при первых параллельных записях ключа. Просроченная запись
+        перезаписывается целиком (остальные поля — NULL); опустевшая — удаляется.
+        """
+        now = datetime.utcnow()
+        with self._session_factory() as db:
+            insert = dialect_insert(db.get_bind().dialect.name)
+            stmt = insert(BotFsmState).values(key=key, updated_at=now, **fields)
+            set_ = {**fields, "updated_at": now}
+            if self.ttl:
+                expired = BotFsmState.updated_at < now - timedelta(seconds=self.ttl)
+                for name in ("state", "data"):
+                    if name not in fields:
+                        set_[name] = case((expired, None), else_=getattr(BotFsmState, name))
+            db.execute(stmt.on_conflict_do_update(index_elements=[BotFsmState.key], set_=set_))
+            if all(value is None for value in fields.values()):
+                # пустая запись не нужна
+                db.execute(
+                    delete(BotFsmState)
+                    .where(BotFsmState.key == key, BotFsmState.state.is_(None), BotFsmState.data.is_(None))
+                )
+            db.commit()
+
+        self._maybe_purge()
+
+    def _merge_data(self, key: str, patch: Mapping[str, Any]) -> Dict[str, Any]:
+        """get_data + dict.update + set_data за один поход в поток."""
+        row = self._read(key)
+        data = codec.loads(row.data) if row and row.data else {}
+        data.update(patch)
+        self._write(key, data=codec.dumps(data) if data else None)
+        return data
+
+    def _maybe_purge(self) -> None:
+        if not self.ttl:
+            return
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        try:
+            removed = self.purge_expired()
+        except Exception:
+            logger.exception("[FSM] purge of expired states failed")
+            return
+        if removed:
+            logger.info("[FSM] removed %s expired states", removed)
+
+    def purge_expired(self) -> int:
+        """Удаляет записи, к которым не обращались дольше ttl. Возвращает число удалённых."""
+        if not self.ttl:
+            return 0
+        border = datetime.utcnow() - timedelta(seconds=self.ttl)
+        with self._session_factory() as db:
+            removed = (
+                db.query(BotFsmState)
+                .filter(BotFsmState.updated_at < border)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+            return int(removed or 0)
+
+    # ---- BaseStorage ----
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await run_db(self._write, self.key_builder.build(key), state=value)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        row = await run_db(self._read, self.key_builder.build(key))
+        return row.state if row else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        raw = codec.dumps(data) if data else None
+        await run_db(self._write, self.key_builder.build(key), data=raw)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        row = await run_db(self._read, self.key_builder.build(key))
+        if not row or not row.data:
+            return {}
+        return codec.loads(row.data)
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> Dict[str, Any]:
+        # базовая реализация — get_data и set_data отдельными походами в поток: параллельные
+        # update_data одного ключа теряли бы изменения друг друга
+        built = self.key_builder.build(key)
+        lock = self._locks.get(built)
+        if lock is None:
+            lock = self._locks[built] = asyncio.Lock()
+        async with lock:
+            merged = await run_db(self._merge_data, built, dict(data))
+        return merged.copy()
+
+    async def close(self) -> None:
+        # engine общий с приложением — не закрываем
+        pass
@@ -0,0 +1,311 @@
+# bot/utils/messages.py
+# Работа с уже отправленными сообщениями:
+#   * пакетное удаление через deleteMessages (до 100 id за вызов);
+#   * edit_message — правка с кэшем последней отрисовки: одинаковые правки не отправляются,
+#     при изменении только клавиатуры зовётся editMessageReplyMarkup, частые правки одного
+#     сообщения склеиваются (дебаунс).
+#
+#   RENDER_CACHE_SIZE   = сколько сообщений помнить (LRU)
+#   EDIT_DEBOUNCE_MS    = окно склейки правок одного сообщения, мс (0 — без дебаунса)
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.methods import (
+    DeleteMessage,
+    DeleteMessages,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    Response,
+    SendMessage,
+    TelegramMethod,
+)
+from aiogram.methods.base import TelegramType
+from aiogram.types import InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+DELETE_MESSAGES_LIMIT = 100  # ограничение Bot API на один вызов deleteMessages
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "50000"))
+EDIT_DEBOUNCE_MS = int(os.getenv("EDIT_DEBOUNCE_MS", "300"))
+
+Key = Tuple[Any, int]  # (chat_id, message_id)
+_UNKNOWN = object()    # текст/клавиатура сообщения нам неизвестны
+
+
+def _markup_hash(markup: Optional[InlineKeyboardMarkup]) -> Optional[int]:
+    if markup is None:
+        return None
+    return hash(markup.model_dump_json(exclude_none=True))
+
+
+def _is_not_modified(exc: TelegramBadRequest) -> bool:
+    return "message is not modified" in str(exc)
+
+
+class RenderCache:
+    """Что сейчас показано в сообщении: хэш текста и клавиатуры по (chat_id, message_id)."""
+
+    def __init__(self, max_size: int = RENDER_CACHE_SIZE) -> None:
+        self.max_size = max(1, max_size)
+        self._items: "OrderedDict[Key, Tuple[Any, Any]]" = OrderedDict()
+
+    def get(self, key: Key) -> Tuple[Any, Any]:
+        item = self._items.get(key)
+        if item is None:
+            return _UNKNOWN, _UNKNOWN
+        self._items.move_to_end(key)
+        return item
+
+    def remember(self, key: Key, text: Any = _UNKNOWN, markup: Any = _UNKNOWN) -> None:
+        old_text, old_markup = self._items.get(key, (_UNKNOWN, _UNKNOWN))
+        self._items[key] = (
+            old_text if text is _UNKNOWN else hash(text),
+            old_markup if markup is _UNKNOWN else _markup_hash(markup),
+        )
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def forget(self, key: Key) -> None:
+        self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class _PendingEdit:
+    __slots__ = ("payload", "future", "task")
+
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.payload = payload
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: Optional[asyncio.Task] = None
+
+
+class MessageRenderer:
+    """Правки сообщений с учётом того, что в них уже показано."""
+
+    def __init__(self, cache: Optional[RenderCache] = None, debounce_ms: int = EDIT_DEBOUNCE_MS) -> None:
+        self.cache = cache or RenderCache()
+        self.debounce = max(0, debounce_ms) / 1000
+        self._last_edit: Dict[Key, float] = {}
+        self._pending: Dict[Key, _PendingEdit] = {}
+        # метрики
+        self._skipped = 0
+        self._text_edits = 0
+        self._markup_edits = 0
+        self._not_modified = 0
+        self._debounced = 0
+
+    async def edit(
+        self,
+        bot: Bot,
+        chat_id: Any,
+        message_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        **kwargs: Any,
+    ) -> bool:
+        """Возвращает True, если запрос в Telegram был отправлен."""
+        key = (chat_id, message_id)
+        payload = {"bot": bot, "text": text, "reply_markup": reply_markup, "kwargs": kwargs}
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            # правка уже ждёт отправки — подменяем её содержимое на свежее
+            pending.payload = payload
+            self._debounced += 1
+            return await asyncio.shield(pending.future)
+
+        wait = self._last_edit.get(key, 0.0) + self.debounce - time.monotonic()
+        if wait <= 0:
+            return await self._apply(key, payload)
+
+        pending = _PendingEdit(payload)
+        self._pending[key] = pending
+        pending.task = asyncio.create_task(self._apply_later(key, pending, wait))
+        return await asyncio.shield(pending.future)
+
+    async def _apply_later(self, key: Key, pending: _PendingEdit, wait: float) -> None:
+        await asyncio.sleep(wait)
+        self._pending.pop(key, None)
+        try:
+            result = await self._apply(key, pending.payload)
+        except asyncio.CancelledError:
+            pending.future.cancel()
+            raise
+        except Exception as exc:
+            if not pending.future.done():
+                pending.future.set_exception(exc)
+                pending.future.exception()  # ошибку получат ожидающие, не логируем как «не извлечённую»
+            return
+        if not pending.future.done():
+            pending.future.set_result(result)
+
+    async def _apply(self, key: Key, payload: Dict[str, Any]) -> bool:
+        chat_id, message_id = key
+        bot: Bot = payload["bot"]
+        text = payload["text"]
+        markup = payload["reply_markup"]
+
+        cached_text, cached_markup = self.cache.get(key)
+        text_same = cached_text == hash(text)
+        markup_same = cached_markup == _markup_hash(markup)
+        if text_same and markup_same:
+            self._skipped += 1
+            return False
+
+        try:
+            if text_same:
+                await bot.edit_message_reply_markup(chat_id=chat_id, message_id=message_id, reply_markup=markup)
+                self._markup_edits += 1
+            else:
+                await bot.edit_message_text(
+                    chat_id=chat_id,
+                    message_id=message_id,
+                    text=text,
+                    reply_markup=markup,
+                    **payload["kwargs"],
+                )
+                self._text_edits += 1
+        except TelegramBadRequest as exc:
+            if not _is_not_modified(exc):
+                self.cache.forget(key)
+                raise
+            self._not_modified += 1
+        finally:
+            self._last_edit[key] = time.monotonic()
+            if len(self._last_edit) > self.cache.max_size:
+                self._last_edit.clear()
+
+        self.cache.remember(key, text, markup)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached": len(self.cache),
+            "skipped": self._skipped,
+            "text_edits": self._text_edits,
+            "markup_edits": self._markup_edits,
+            "not_modified": self._not_modified,
+            "debounced": self._debounced,
+        }
+
+
+class RenderTracker(BaseRequestMiddleware):
+    """
+    Request-middleware сессии бота: запоминает, что отправлено и во что отредактировано
+    любое сообщение (даже мимо edit_message), чтобы кэш не устаревал.
+    """
+
+    def __init__(self, cache: RenderCache) -> None:
+        self.cache = cache
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        key = None
+        if isinstance(method, (EditMessageText, EditMessageReplyMarkup)) and method.message_id:
+            key = (method.chat_id, method.message_id)
+
+        try:
+            response = await make_request(bot, method)
+        except TelegramBadRequest as exc:
+            if key is not None and not _is_not_modified(exc):
+                self.cache.forget(key)
+            raise
+
+        # middleware сессии получает уже разобранный результат метода (Message / True)
+        if isinstance(method, SendMessage):
+            if isinstance(response, Message):
+                self.cache.remember((method.chat_id, response.message_id), method.text, method.reply_markup)
+        elif isinstance(method, EditMessageText) and key is not None:
+            self.cache.remember(key, method.text, method.reply_markup)
+        elif isinstance(method, EditMessageReplyMarkup) and key is not None:
+            self.cache.remember(key, markup=method.reply_markup)
+        elif isinstance(method, DeleteMessage):
+            self.cache.forget((method.chat_id, method.message_id))
+        elif isinstance(method, DeleteMessages):
+            for msg_id in method.message_ids:
+                self.cache.forget((method.chat_id, msg_id))
+        return response
+
+
+renderer = MessageRenderer()
+
+
+def install_render_tracker(bot: Bot) -> RenderTracker:
+    """Подключает отслеживание отрисовки к сессии бота."""
+    tracker = RenderTracker(renderer.cache)
+    bot.session.middleware(tracker)
+    return tracker
+
+
+async def edit_message(
+    bot: Bot,
+    chat_id: Any,
+    message_id: int,
+    text: str,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    **kwargs: Any,
+) -> bool:
+    """
+    Правит текст и клавиатуру сообщения одним запросом и только если что-то поменялось.
+    «message is not modified» не считается ошибкой; прочие TelegramBadRequest пробрасываются.
+    """
+    return await renderer.edit(bot, chat_id, message_id, text, reply_markup, **kwargs)
+
+
+def render_stats() -> Dict[str, Any]:
+    return renderer.stats()
+
+
+def _unique_ids(message_ids: Iterable[Optional[int]]) -> List[int]:
+    seen = set()
+    result = []
+    for msg_id in message_ids:
+        if not msg_id or msg_id in seen:
+            continue
+        seen.add(msg_id)
+        result.append(int(msg_id))
+    return result
+
+
+async def delete_messages(bot: Bot, chat_id: int, message_ids: Iterable[Optional[int]]) -> None:
+    """
+    Удаляет сообщения пачками по 100 через deleteMessages. Если Telegram отклонил пачку
+    (например, среди сообщений есть старше 48 часов), удаляем её поштучно и игнорируем ошибки.
+    """
+    ids = _unique_ids(message_ids)
+    for msg_id in ids:
+        renderer.cache.forget((chat_id, msg_id))
+    for start in range(0, len(ids), DELETE_MESSAGES_LIMIT):
+        chunk = ids[start:start + DELETE_MESSAGES_LIMIT]
+        if len(chunk) == 1:
+            await _delete_one(bot, chat_id, chunk[0])
+            continue
+        try:
+            await bot.delete_messages(chat_id, chunk)
+        except TelegramAPIError as exc:
+            logger.debug("[MESSAGES] deleteMessages failed for chat %s (%s), falling back", chat_id, exc)
+            for msg_id in chunk:
+                await _delete_one(bot, chat_id, msg_id)
+
+
+async def _delete_one(bot: Bot, chat_id: int, msg_id: int) -> None:
+    try:
+        await bot.delete_message(chat_id, msg_id)
+    except Exception:
+        pass
@@ -0,0 +1,216 @@
+# bot/webhook.py
+# Приём апдейтов через вебхук (встроенный aiohttp-сервер) — альтернатива long polling.
+#
+# Переменные окружения:
+#   BOT_MODE               = polling (по умолчанию) | webhook
+#   WEBHOOK_BASE_URL       = https://bot.example.com   (публичный адрес; пусто — setWebhook не вызываем)
+#   WEBHOOK_PATH           = /telegram/webhook
+#   WEBHOOK_SECRET         = значение X-Telegram-Bot-Api-Secret-Token (A-Z, a-z, 0-9, _ и -)
+#   WEBHOOK_HOST / WEBHOOK_PORT = где слушать (порт по умолчанию — $PORT или 8080)
+#   WEBHOOK_WORKERS        = сколько апдейтов обрабатываем параллельно (по разным чатам)
+#   WEBHOOK_QUEUE_SIZE     = максимум апдейтов «в работе», дальше отвечаем 503 и Telegram повторит
+#   WEBHOOK_DRAIN_TIMEOUT  = сколько секунд при остановке дорабатываем очередь
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from dotenv import load_dotenv
+
+from .outbound import outbound_stats
+from .utils.messages import render_stats
+from .services.checklist_catalog import checklist_catalog
+from .services.executor import db_executor
+from .services.write_buffer import buffers_stats
+from .services.passwords import password_verifier
+from checklist.passwords import login_throttle
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = (os.getenv("WEBHOOK_PATH") or "/telegram/webhook").strip()
+WEBHOOK_BASE_URL = (os.getenv("WEBHOOK_BASE_URL") or "").strip().rstrip("/")
+WEBHOOK_SECRET = (os.getenv("WEBHOOK_SECRET") or "").strip() or None
+WEBHOOK_HOST = (os.getenv("WEBHOOK_HOST") or "0.0.0.0").strip()
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT") or os.getenv("PORT") or "8080")
+WEBHOOK_WORKERS = max(1, int(os.getenv("WEBHOOK_WORKERS", "16")))
+WEBHOOK_QUEUE_SIZE = max(1, int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000")))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "25"))
+WEBHOOK_ENQUEUE_TIMEOUT = 1.0  # сколько ждём места в очереди, прежде чем ответить 503
+
+
+def _ordering_key(update: Dict[str, Any]) -> int:
+    """
+    Ключ, по которому сохраняем порядок: id чата, иначе id пользователя.
+    Апдейты с одинаковым ключом всегда попадают в один воркер и идут строго по очереди.
+    """
+    for field, payload in update.items():
+        if field == "update_id" or not isinstance(payload, dict):
+            continue
+        chat = payload.get("chat")
+        if chat is None and isinstance(payload.get("message"), dict):
+            chat = payload["message"].get("chat")  # callback_query
+        if isinstance(chat, dict) and chat.get("id") is not None:
+            return int(chat["id"])
+        user = payload.get("from") or payload.get("user")
+        if isinstance(user, dict) and user.get("id") is not None:
+            return int(user["id"])
+    return int(update.get("update_id") or 0)
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """
+    Сразу отвечает Telegram 200 и кладёт апдейт в ограниченную очередь.
+    Очередь разбита на шарды по чату: разные чаты обрабатываются параллельно,
+    внутри одного чата порядок апдейтов сохраняется.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: Optional[str] = None,
+        workers: int = WEBHOOK_WORKERS,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        drain_timeout: float = WEBHOOK_DRAIN_TIMEOUT,
+        **data: Any,
+    ) -> None:
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        per_shard = max(1, queue_size // workers)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=per_shard) for _ in range(workers)]
+        self._workers: List[asyncio.Task] = []
+        self.drain_timeout = drain_timeout
+        self._closing = False
+
+    def register(self, app: web.Application, /, path: str, **kwargs: Any) -> None:
+        app.on_startup.append(self._start_workers)
+        super().register(app, path=path, **kwargs)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    async def _start_workers(self, *a: Any, **kw: Any) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(queue), name=f"webhook-worker-{i}")
+            for i, queue in enumerate(self._queues)
+        ]
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self._background_feed_update(bot=self.bot, update=update)
+            except Exception:
+                logger.exception("[WEBHOOK] update %s failed", update.get("update_id"))
+            finally:
+                queue.task_done()
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self._closing:
+            return web.Response(status=503, text="Shutting down")
+        try:
+            update = await request.json(loads=bot.session.json_loads)
+        except ValueError:
+            return web.Response(status=400, text="Bad update")
+        if not isinstance(update, dict):
+            return web.Response(status=400, text="Bad update")
+
+        queue = self._queues[_ordering_key(update) % len(self._queues)]
+        try:
+            await asyncio.wait_for(queue.put(update), timeout=WEBHOOK_ENQUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Telegram повторит доставку позже — это и есть наш backpressure
+            logger.warning("[WEBHOOK] queue is full (%s in flight), update %s rejected",
+                           self.in_flight, update.get("update_id"))
+            return web.Response(status=503, text="Busy")
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def close(self) -> None:
+        """Перестаём принимать апдейты, дорабатываем очередь, затем закрываем сессию бота."""
+        self._closing = True
+        if self._workers:
+            pending = self.in_flight
+            if pending:
+                logger.info("[WEBHOOK] draining %s queued updates", pending)
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(q.join() for q in self._queues)),
+                    timeout=self.drain_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("[WEBHOOK] drain timeout, %s updates dropped", self.in_flight)
+            for task in self._workers:
+                task.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        await super().close()
+
+
+def build_app(bot: Bot, dp: Dispatcher, allowed_updates: Optional[List[str]] = None) -> web.Application:
+    app = web.Application()
+    handler = QueuedRequestHandler(dp, bot, secret_token=WEBHOOK_SECRET)
+
+    async def on_startup(_: web.Application) -> None:
+        if not WEBHOOK_BASE_URL:
+            logger.warning("[WEBHOOK] WEBHOOK_BASE_URL не задан — setWebhook не вызываем")
+            return
+        await bot.set_webhook(
+            url=WEBHOOK_BASE_URL + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=allowed_updates,
+        )
+        logger.info("[WEBHOOK] webhook set to %s%s", WEBHOOK_BASE_URL, WEBHOOK_PATH)
+
+    async def health(_: web.Request) -> web.Response:
+        return web.json_response({
+            "ok": True,
+            "in_flight": handler.in_flight,
+            "db": db_executor.stats(),
+            "drafts": buffers_stats(),
+            "outbound": outbound_stats(),
+            "render": render_stats(),
+            "catalog": checklist_catalog.stats(),
+            "passwords": {**password_verifier.stats(), "throttle": login_throttle.stats()},
+        })
+
+    app.on_startup.append(on_startup)
+    app.router.add_get("/healthz", health)
+    # обработчик регистрируем раньше setup_application: на остановке сначала
+    # дорабатываем очередь, и только потом dispatcher закрывает FSM-хранилище
+    handler.register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, allowed_updates: Optional[List[str]] = None) -> None:
+    """Запускает aiohttp-сервер и ждёт SIGINT/SIGTERM."""
+    if WEBHOOK_BASE_URL and not WEBHOOK_SECRET:
+        logger.warning("[WEBHOOK] WEBHOOK_SECRET не задан — запросы не проверяются")
+
+    app = build_app(bot, dp, allowed_updates)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+    await site.start()
+    logger.info("[WEBHOOK] listening on %s:%s%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
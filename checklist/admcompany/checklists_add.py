@@ -14,6 +14,7 @@ from typing import Optional, Dict, List
 from sqlalchemy.exc import IntegrityError
 
 from checklist.db.db import SessionLocal
+from checklist.db.loaders import CHECKLIST_HEADER
 from checklist.db.models import Checklist, ChecklistQuestion, ChecklistSection, Position
 
 
@@ -191,6 +192,7 @@ def checklists_add_tab(company_id: int, embedded: bool = False, dialog_state_key
                         # Проверка дубля названия в пределах компании
                         existing = (
                             db.query(Checklist)
+                            .options(*CHECKLIST_HEADER)
                             .filter_by(name=ss.cl_add_form["name"], company_id=company_id)
                             .first()
                         )
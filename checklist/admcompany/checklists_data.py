@@ -5,6 +5,7 @@ import pandas as pd
 from sqlalchemy.orm import joinedload
 
 from checklist.db.db import SessionLocal
+from checklist.db.loaders import CHECKLIST_HEADER
 from checklist.db.models import (
     Checklist,
     ChecklistQuestion,
@@ -126,7 +127,7 @@ def checklists_data_tab(company_id: int):
         # Список чек-листов c позициями
         checklists = (
             db.query(Checklist)
-            .options(joinedload(Checklist.positions))
+            .options(joinedload(Checklist.positions), *CHECKLIST_HEADER)
             .filter(Checklist.company_id == company_id)
             .order_by(Checklist.name.asc())
             .all()
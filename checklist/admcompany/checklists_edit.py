@@ -6,6 +6,7 @@ import pandas as pd
 from typing import Optional, List, Dict, Any
 
 from checklist.db.db import SessionLocal
+from checklist.db.loaders import CHECKLIST_HEADER
 from checklist.db.models import (
     Checklist,
     ChecklistSection,
@@ -25,7 +26,7 @@ QUESTION_TYPES = [
 #   HELPERS
 # ----------------------------
 def _load_checklist(db, checklist_id: int) -> Optional[Checklist]:
-    return db.query(Checklist).get(checklist_id)
+    return db.get(Checklist, checklist_id, options=CHECKLIST_HEADER)
 
 
 def _get_sections(db, checklist_id: int) -> List[ChecklistSection]:
@@ -449,6 +450,7 @@ def checklists_edit_tab(company_id: int):
     try:
         checklists = (
             db.query(Checklist)
+            .options(*CHECKLIST_HEADER)
             .filter(Checklist.company_id == company_id)
             .order_by(Checklist.name.asc())
             .all()
@@ -9,6 +9,7 @@ import pandas as pd
 from typing import Optional
 
 from checklist.db.db import SessionLocal
+from checklist.db.loaders import CHECKLIST_HEADER
 from checklist.db.models import Role, Position, Checklist, User
 
 
@@ -144,6 +145,7 @@ def _add_or_edit_form(db, company_id: int, *, is_edit: bool, position: Optional[
     roles_all = db.query(Role).order_by(Role.name.asc()).all()
     checklists_all = (
         db.query(Checklist)
+        .options(*CHECKLIST_HEADER)
         .filter(Checklist.company_id == company_id)
         .order_by(Checklist.name.asc())
         .all()
@@ -209,7 +211,7 @@ def _add_or_edit_form(db, company_id: int, *, is_edit: bool, position: Optional[
         db.commit()
         db.refresh(new_pos)
         if chk_selected_ids:
-            chks = db.query(Checklist).filter(Checklist.id.in_(chk_selected_ids)).all()
+            chks = db.query(Checklist).options(*CHECKLIST_HEADER).filter(Checklist.id.in_(chk_selected_ids)).all()
             new_pos.checklists = chks
             db.commit()
         st.success("Должность добавлена.")
@@ -231,7 +233,7 @@ def _add_or_edit_form(db, company_id: int, *, is_edit: bool, position: Optional[
                 return
             position.name = name.strip()
             position.role_id = new_role.id
-            chks = db.query(Checklist).filter(Checklist.id.in_(chk_selected_ids)).all()
+            chks = db.query(Checklist).options(*CHECKLIST_HEADER).filter(Checklist.id.in_(chk_selected_ids)).all()
             position.checklists = chks
             db.commit()
             st.success("Изменения сохранены.")
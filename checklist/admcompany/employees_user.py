@@ -7,7 +7,7 @@ from __future__ import annotations
 import streamlit as st
 import pandas as pd
 from typing import Optional
-import bcrypt  # хешируем веб‑пароли
+from checklist.passwords import hash_password  # хешируем веб‑пароли (BCRYPT_ROUNDS)
 
 from checklist.db.db import SessionLocal
 from checklist.db.models import (
@@ -177,7 +177,7 @@ def _add_employee_modal(db, company_id: int):
                 # Уникальность
                 exists = (
                     db.query(User)
-                    .filter(User.company_id == company_id, User.phone == phone)
+                    .filter(User.company_id == company_id, User.phone_normalized == raw_phone)
                     .first()
                 )
                 if exists:
@@ -190,7 +190,7 @@ def _add_employee_modal(db, company_id: int):
                     return
 
                 # Создание
-                hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+                hashed = hash_password(password)
 
                 new_user = User(
                     name=full_name,
@@ -337,7 +337,7 @@ def _edit_employee_popover(db, company_id: int):
             # телефон — уникальность (кроме себя)
             exists_phone = (
                 db.query(User)
-                .filter(User.company_id == company_id, User.phone == phone, User.id != u.id)
+                .filter(User.company_id == company_id, User.phone_normalized == raw_phone, User.id != u.id)
                 .first()
             )
             if exists_phone:
@@ -361,7 +361,9 @@ def _edit_employee_popover(db, company_id: int):
             u.login = login
 
             if new_password:
-                u.hashed_password = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+                u.hashed_password = hash_password(new_password)
+                # смена пароля — выход из бота: следующий вход снова по логину/паролю
+                u.telegram_id = None
 
             new_deps = db.query(Department).filter(Department.id.in_(selected_dep_ids)).all()
             u.departments.clear()
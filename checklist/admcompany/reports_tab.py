@@ -17,16 +17,13 @@ from checklist.db.models import (
     User,
 )
 from checklist.db.models.user import user_department_access
+from checklist.scoring import Totals, scoring_plans
+from checklist.scoring_vector import score_totals
 
 # =======================
 #     НАСТРОЙКИ / КОНСТАНТЫ
 # =======================
 
-SCALE_MIN = 1
-SCALE_MAX = 5  # 1 = 0, 5 = 1
-
-YES_TOKENS = {"да", "yes", "y", "true", "1", "ok", "✔", "✅", "пройдено", "завершено"}
-
 MEDIA_DIR = "media"
 FALLBACK_EXT = ".jpg"
 os.makedirs(MEDIA_DIR, exist_ok=True)
@@ -218,60 +215,24 @@ def _accessible_departments(db: Session, company_id: Optional[int]) -> list[Depa
 # =======================
 
 
-def _resolve_weight(raw_weight: Optional[int], raw_meta: Optional[dict]) -> float:
-    if raw_weight is not None:
-        return float(raw_weight)
-    if isinstance(raw_meta, dict):
-        candidate = raw_meta.get("weight")
-        if candidate is not None:
-            try:
-                return float(candidate)
-            except (TypeError, ValueError):
-                pass
-    return 1.0
-
-
-def _is_yes(value: Optional[str]) -> bool:
-    if value is None:
-        return False
-    return str(value).strip().lower() in YES_TOKENS
-
+def _compute_scores_map(answer_checklists: Dict[int, int], qa_rows, question_rows) -> Dict[int, Totals]:
+    """
+    answer_id → (набрано, максимум, %) по ScoringPlan чек-листа (checklist/scoring.py) —
+    те же числа, что бот показывает в итоге попытки и в PDF/Excel. Строки ответов
+    считаются векторно (checklist/scoring_vector.py).
+    """
+    structures: Dict[int, list] = {}
+    is_scored: Dict[int, bool] = {}
+    for row in question_rows:
+        structures.setdefault(row.checklist_id, []).append(row)
+        is_scored[row.checklist_id] = bool(row.is_scored)
+    plans = {
+        checklist_id: scoring_plans.get(checklist_id, is_scored[checklist_id], rows)
+        for checklist_id, rows in structures.items()
+    }
 
-def _parse_scale(value: Optional[str]) -> int:
-    try:
-        parsed = int(float(str(value).replace(",", ".").strip()))
-    except (TypeError, ValueError):
-        parsed = SCALE_MIN
-    return max(SCALE_MIN, min(SCALE_MAX, parsed))
-
-
-def _compute_scores_map(rows) -> Dict[int, Tuple[Optional[float], Optional[float], Optional[float]]]:
-    totals: Dict[int, Dict[str, float]] = {}
-    for row in rows:
-        bucket = totals.setdefault(row.answer_id, {"score": 0.0, "weight": 0.0})
-        if row.type not in ("yesno", "scale"):
-            continue
-        weight = _resolve_weight(row.weight, row.meta)
-        bucket["weight"] += weight
-
-        if row.type == "yesno":
-            value = 1.0 if _is_yes(row.response_value) else 0.0
-        else:
-            scale_value = _parse_scale(row.response_value)
-            value = (scale_value - SCALE_MIN) / float(SCALE_MAX - SCALE_MIN)
-        bucket["score"] += value * weight
-
-    scores: Dict[int, Tuple[Optional[float], Optional[float], Optional[float]]] = {}
-    for answer_id, data in totals.items():
-        total_weight = data["weight"]
-        if total_weight <= 0:
-            scores[answer_id] = (None, None, None)
-            continue
-        score_value = round(data["score"], 2)
-        max_value = round(total_weight, 2)
-        percent_value = round(data["score"] / total_weight * 100, 1)
-        scores[answer_id] = (score_value, max_value, percent_value)
-    return scores
+    answer_ids, question_ids, values = zip(*qa_rows) if qa_rows else ((), (), ())
+    return score_totals(answer_checklists, plans, answer_ids, question_ids, values)
 
 
 @st.cache_data(ttl=60)
@@ -328,17 +289,29 @@ def _answers_df_for_all(company_id: Optional[int]) -> pd.DataFrame:
         qa_rows = (
             db.query(
                 ChecklistQuestionAnswer.answer_id,
+                ChecklistQuestionAnswer.question_id,
                 ChecklistQuestionAnswer.response_value,
-                ChecklistQuestion.type,
-                ChecklistQuestion.weight,
-                ChecklistQuestion.meta,
             )
-            .join(ChecklistQuestion, ChecklistQuestionAnswer.question_id == ChecklistQuestion.id)
             .filter(ChecklistQuestionAnswer.answer_id.in_(answer_ids))
             .all()
         )
 
-        scores_map = _compute_scores_map(qa_rows)
+        answer_checklists = {answer_id: data["checklist_id"] for answer_id, data in answer_info.items()}
+        question_rows = (
+            db.query(
+                ChecklistQuestion.checklist_id,
+                ChecklistQuestion.id.label("qid"),
+                ChecklistQuestion.type.label("qtype"),
+                ChecklistQuestion.meta.label("qmeta"),
+                ChecklistQuestion.weight.label("qweight"),
+                Checklist.is_scored,
+            )
+            .join(Checklist, ChecklistQuestion.checklist_id == Checklist.id)
+            .filter(ChecklistQuestion.checklist_id.in_(set(answer_checklists.values())))
+            .all()
+        )
+
+        scores_map = _compute_scores_map(answer_checklists, qa_rows, question_rows)
 
         records = []
         for answer_id, data in answer_info.items():
@@ -0,0 +1,79 @@
+# checklist/db/async_db.py
+# Асинхронный engine для бота (SQLAlchemy AsyncEngine) поверх того же DATABASE_URL.
+#   DB_ASYNC=1  — включить (нужны asyncpg для Postgres или aiosqlite для SQLite)
+# Streamlit-админка и миграции продолжают работать через синхронный checklist/db/db.py.
+import os
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:  # sqlalchemy.ext.asyncio требует greenlet — импортируем только при DB_ASYNC=1
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+load_dotenv()
+DATABASE_URL = (os.getenv("DATABASE_URL") or "").strip()
+DB_ASYNC = (os.getenv("DB_ASYNC") or "").strip().lower() in {"1", "true", "yes", "on"}
+
+_engine: Optional["AsyncEngine"] = None
+_session_factory: Optional["async_sessionmaker"] = None
+
+
+def async_enabled() -> bool:
+    return DB_ASYNC
+
+
+def make_async_url(url: str) -> tuple[str, dict]:
+    """
+    postgresql://...?sslmode=require -> postgresql+asyncpg://... + connect_args={"ssl": "require"}
+    sqlite:///./app.db               -> sqlite+aiosqlite:///./app.db
+    """
+    url = url or "sqlite:///./app.db"
+    scheme, _, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    connect_args: dict = {}
+
+    if driver in ("postgresql", "postgres"):
+        parts = urlsplit(f"postgresql+asyncpg://{rest}")
+        query = dict(parse_qsl(parts.query))
+        # asyncpg не понимает sslmode — передаём его как ssl
+        sslmode = query.pop("sslmode", "require")
+        if sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        return urlunsplit(parts._replace(query=urlencode(query))), connect_args
+
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite://{rest}", connect_args
+
+    raise RuntimeError(f"DB_ASYNC не поддерживает диалект {driver!r}")
+
+
+def get_async_engine() -> "AsyncEngine":
+    global _engine
+    if _engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        url, connect_args = make_async_url(DATABASE_URL)
+        kwargs = {"connect_args": connect_args}
+        if url.startswith("postgresql"):
+            kwargs.update(pool_pre_ping=True, pool_recycle=300)
+        _engine = create_async_engine(url, **kwargs)
+    return _engine
+
+
+def AsyncSessionLocal():
+    """async with AsyncSessionLocal() as db: ... — аналог SessionLocal для асинхронного кода."""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _session_factory = async_sessionmaker(bind=get_async_engine(), expire_on_commit=False)
+    return _session_factory()
+
+
+async def dispose_async_engine() -> None:
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
@@ -0,0 +1,20 @@
+# checklist/db/loaders.py
+# Пресеты loader options для Checklist. Связи sections / questions по умолчанию ленивые,
+# дерево вопросов грузится только там, где его явно попросили:
+#
+#   db.query(Checklist).options(*CHECKLIST_HEADER)            — списки, выпадашки, «шапки»
+#   db.query(Checklist).options(*CHECKLIST_WITH_STRUCTURE)    — нужен весь чек-лист с разделами и вопросами
+#   db.get(Checklist, checklist_id, options=CHECKLIST_HEADER)
+from sqlalchemy.orm import lazyload, selectinload
+
+from checklist.db.models.checklist import Checklist, ChecklistSection
+
+# только строка checklists; разделы/вопросы — отдельным запросом при первом обращении
+CHECKLIST_HEADER = (
+    lazyload(Checklist.sections),
+)
+
+# разделы и вопросы двумя запросами selectin на всю выборку
+CHECKLIST_WITH_STRUCTURE = (
+    selectinload(Checklist.sections).selectinload(ChecklistSection.questions),
+)
@@ -2,3 +2,5 @@
 from .user import User, user_department_access
 from .checklist import Checklist, ChecklistQuestion, ChecklistAnswer, ChecklistQuestionAnswer, ChecklistSection
 from .role import Role, Position, position_checklist_access
+from .bot_state import BotFsmState
+from .cache_version import CacheVersion
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, Text, DateTime, Index
+
+from checklist.db.base import Base
+
+
+class BotFsmState(Base):
+    """Состояние FSM Telegram-бота (ключ aiogram StorageKey → state + data)."""
+
+    __tablename__ = "bot_fsm_states"
+
+    key = Column(String, primary_key=True)
+    state = Column(String, nullable=True)
+    data = Column(Text, nullable=True)  # JSON (см. bot/storage/codec.py)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_bfs_updated_at", "updated_at"),
+    )
@@ -0,0 +1,65 @@
+# Версии данных, которые бот кэширует у себя в памяти. Админка и бот — разные процессы,
+# поэтому правка в админке увеличивает версию в той же транзакции, а бот время от времени
+# сверяет её (bot/services/checklist_catalog.py) и сбрасывает кэш, если она изменилась.
+#
+# Слушатели висят на классе Session и регистрируются при импорте checklist.db.models —
+# то есть в любом процессе, который работает с моделями. Массовые update()/delete()
+# мимо ORM-объектов версию не меняют — такие правки бот увидит по TTL кэша.
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from checklist.db.base import Base
+from checklist.db.models.checklist import Checklist
+from checklist.db.models.role import Position
+from checklist.db.models.user import User
+
+# каталог чек-листов по должностям: position_checklist_access, названия чек-листов, должности пользователей
+CATALOG_VERSION = "checklist_catalog"
+
+
+class CacheVersion(Base):
+    """Счётчик изменений по имени (строку создаёт миграция 9f3d2b7c6e15)."""
+
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def cache_version_query(name: str):
+    return select(CacheVersion.version).where(CacheVersion.name == name)
+
+
+def _catalog_changed(session: Session) -> bool:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Position):
+            if obj in session.deleted or inspect(obj).attrs.checklists.history.has_changes():
+                return True
+        elif isinstance(obj, Checklist):
+            state = inspect(obj).attrs
+            if obj in session.deleted or state.name.history.has_changes() or state.positions.history.has_changes():
+                return True
+        elif isinstance(obj, User):
+            if obj in session.deleted or inspect(obj).attrs.position_id.history.has_changes():
+                return True
+    return False
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalog_version(session: Session, _flush_context) -> None:
+    if not _catalog_changed(session):
+        return
+    # в той же транзакции, что и сама правка: после rollback версия не меняется
+    connection = session.connection()
+    bumped = connection.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == CATALOG_VERSION)
+        .values(version=CacheVersion.version + 1, updated_at=datetime.utcnow())
+    ).rowcount
+    if not bumped:
+        connection.execute(
+            CacheVersion.__table__.insert().values(name=CATALOG_VERSION, version=1, updated_at=datetime.utcnow())
+        )
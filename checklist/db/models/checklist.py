@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, JSON, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, Float, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from checklist.db.base import Base
@@ -26,7 +26,6 @@ class Checklist(Base):
         "ChecklistSection",
         back_populates="checklist",
         cascade="all, delete-orphan",
-        lazy="selectin",
     )
 
 
@@ -43,7 +42,6 @@ class ChecklistSection(Base):
         "ChecklistQuestion",
         back_populates="section",
         cascade="all, delete-orphan",
-        lazy="selectin",
     )
 
 
@@ -73,9 +71,23 @@ class ChecklistAnswer(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     submitted_at = Column(DateTime, default=datetime.utcnow)
+    # черновик, из которого отправлена попытка: повторная отправка находит её по нему
+    # (bot/repositories/attempts.py, finish_attempt); без FK — черновик удаляется
+    draft_id = Column(Integer, nullable=True)
+
+    # итог, посчитанный при отправке (bot.report_data.store_attempt_summary);
+    # scored_at IS NULL — ещё не посчитан (старые попытки до backfill_scores.py)
+    total_score = Column(Float, nullable=True)
+    total_max = Column(Float, nullable=True)
+    percent = Column(Float, nullable=True)
+    score_details = Column(JSON, nullable=True)
+    scored_at = Column(DateTime, nullable=True)
 
     __table_args__ = (
         Index("ix_ca_ck_user_date", "checklist_id", "user_id", "submitted_at"),
+        # история пользователя («Пройденные чек-листы»): keyset по (submitted_at, id)
+        Index("ix_ca_user_submitted", "user_id", "submitted_at", "id"),
+        Index("uq_ca_draft_id", "draft_id", unique=True),
     )
 
 
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Table
-from sqlalchemy.orm import relationship
+import re
+
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, Enum, Table, Index, func
+from sqlalchemy.orm import relationship, validates
 from checklist.db.base import Base 
 
 user_department_access = Table(
@@ -8,15 +10,40 @@ user_department_access = Table(
     Column("department_id", Integer, ForeignKey("departments.id", ondelete="CASCADE"), primary_key=True)
 )
 
+
+def normalize_phone(phone: str | None) -> str:
+    """Только цифры, последние 10 — так телефон хранится в users.phone_normalized и так же ищется."""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:]
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    telegram_id = Column(Integer, unique=True, nullable=True)
+    # привязка к аккаунту Telegram после входа (id бывают больше 2^31)
+    telegram_id = Column(BigInteger, unique=True, nullable=True)
     phone = Column(String, nullable=True)
+    # заполняется автоматически при записи phone (см. _sync_phone_normalized)
+    phone_normalized = Column(String(10), nullable=True)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     position_id = Column(Integer, ForeignKey("positions.id"), nullable=True)
     login = Column(String, unique=True, nullable=True)
     hashed_password = Column(String, nullable=True)
     position = relationship("Position", backref="users")
     departments = relationship("Department", secondary=user_department_access, back_populates="users")
+
+    __table_args__ = (
+        Index("ix_users_company_phone_norm", "company_id", "phone_normalized"),
+    )
+
+    @validates("phone")
+    def _sync_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value) or None
+        return value
+
+
+# поиск по ФИО без учёта регистра (find_by_name_phone_company)
+Index("ix_users_name_lower", func.lower(User.name))
+# вход по логину без учёта регистра (бот и админка) — unique по login тут не помогает
+Index("ix_users_login_lower", func.lower(User.login))
@@ -0,0 +1,143 @@
+# checklist/passwords.py
+# Хеширование паролей (bcrypt) и ограничение попыток входа — общее для бота и админки.
+#
+#   BCRYPT_ROUNDS           = cost factor новых хешей (по умолчанию 12, как bcrypt.gensalt());
+#                             хеши с другим cost пересчитываются при следующем успешном входе
+#   LOGIN_MAX_FAILURES      = неудачных попыток на логин за окно, дальше — пауза
+#   LOGIN_CHAT_MAX_FAILURES = неудачных попыток из одного чата (перебор разных логинов)
+#   LOGIN_THROTTLE_WINDOW   = окно подсчёта, сек
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "5"))
+LOGIN_CHAT_MAX_FAILURES = int(os.getenv("LOGIN_CHAT_MAX_FAILURES", "10"))
+LOGIN_THROTTLE_WINDOW = float(os.getenv("LOGIN_THROTTLE_WINDOW", "300"))
+
+
+class LoginThrottled(Exception):
+    """Слишком много неудачных попыток входа; retry_after — через сколько секунд можно снова."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"too many login attempts, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor из хеша вида $2b$12$..."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    return hash_rounds(hashed_password) != rounds
+
+
+def verify_password(password: str, hashed_password: Optional[str]) -> bool:
+    if not password or not hashed_password:
+        return False
+    try:
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    except ValueError:
+        # некорректный hash
+        return False
+
+
+def verify_and_upgrade(
+    password: str,
+    hashed_password: Optional[str],
+    rounds: int = BCRYPT_ROUNDS,
+) -> Tuple[bool, Optional[str]]:
+    """
+    (пароль верный, новый хеш или None). Новый хеш считается сразу, пока пароль на руках,
+    если cost factor старого отличается от настроенного. Функция верхнего уровня —
+    её можно отдавать в ProcessPoolExecutor.
+    """
+    if not verify_password(password, hashed_password):
+        return False, None
+    if needs_rehash(hashed_password, rounds):  # type: ignore[arg-type]
+        return True, hash_password(password, rounds)
+    return True, None
+
+
+class LoginThrottle:
+    """
+    Скользящее окно неудачных попыток по ключам (логин, чат). Успешный вход
+    сбрасывает счётчик логина. Потокобезопасен: админка дергает его из потоков Streamlit.
+    """
+
+    def __init__(self, window: float = LOGIN_THROTTLE_WINDOW, max_keys: int = 100_000) -> None:
+        self.window = window
+        self.max_keys = max_keys
+        self._failures: Dict[Any, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._blocked = 0
+
+    def _trim(self, key: Any, now: float) -> Optional[Deque[float]]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def check(self, limits: Iterable[Tuple[Any, int]]) -> None:
+        """limits — пары (ключ, лимит). Бросает LoginThrottled, если хоть один ключ исчерпан."""
+        now = time.monotonic()
+        retry_after = 0.0
+        with self._lock:
+            for key, limit in limits:
+                if key is None or limit <= 0:
+                    continue
+                failures = self._trim(key, now)
+                if failures is not None and len(failures) >= limit:
+                    retry_after = max(retry_after, failures[-limit] + self.window - now)
+            if retry_after > 0:
+                self._blocked += 1
+        if retry_after > 0:
+            raise LoginThrottled(retry_after)
+
+    def failure(self, keys: Iterable[Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._failures) >= self.max_keys:
+                for key in list(self._failures):
+                    self._trim(key, now)
+            for key in keys:
+                if key is not None:
+                    self._failures.setdefault(key, deque(maxlen=64)).append(now)
+
+    def success(self, key: Any) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"tracked": len(self._failures), "blocked": self._blocked}
+
+
+def login_limits(login: str, chat_id: Any = None) -> Tuple[Tuple[Any, int], ...]:
+    """Ключи и лимиты для LoginThrottle: логин без учёта регистра + чат (если есть)."""
+    return (
+        (("login", login.strip().lower()), LOGIN_MAX_FAILURES),
+        (("chat", chat_id) if chat_id is not None else None, LOGIN_CHAT_MAX_FAILURES),
+    )
+
+
+login_throttle = LoginThrottle()
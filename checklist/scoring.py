@@ -0,0 +1,295 @@
+# checklist/scoring.py
+# Подсчёт баллов — общий для бота (итог попытки, PDF/Excel, превью) и админки (отчёты).
+#
+# Вес и границы шкалы лежат в ChecklistQuestion.weight и в JSON meta под разными ключами.
+# Раньше их разбирали на каждой строке каждой попытки, а админка считала по-своему (шкала
+# 1–5, вес по умолчанию 1). Теперь meta разбирается один раз на версию чек-листа в
+# ScoringPlan: qid → (тип, вес, min/max шкалы), а балл ответа — поиск в словаре и умножение.
+#
+#   SCORING_PLAN_CACHE_SIZE = сколько версий планов держим в памяти
+#
+# Правила (как в выгрузках бота):
+#   - yes/no:  ответ из YES_TOKENS → вес, иначе 0
+#   - шкала:   вес * (значение - min) / (max - min), с обрезкой в [0, 1]; min=0, max=5 по умолчанию;
+#              пустой ответ или его отсутствие — 0
+#   - прочие и вопросы без веса — без балла; без веса вопрос не входит и в максимум
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+SCORING_PLAN_CACHE_SIZE = int(os.getenv("SCORING_PLAN_CACHE_SIZE", "256"))
+
+# коды типов вопросов в плане
+OTHER = 0
+YESNO = 1
+SCALE = 2
+
+YESNO_TYPES = {"yesno", "boolean", "bool", "yn"}
+SCALE_TYPES = {"scale", "rating"}
+YES_TOKENS: FrozenSet[str] = frozenset({
+    "yes", "да", "true", "1", "y", "ok", "✔", "✅", "пройдено", "завершено",
+})
+
+DEFAULT_SCALE_MIN = 0.0
+DEFAULT_SCALE_MAX = 5.0
+
+Totals = Tuple[Optional[float], Optional[float], Optional[float]]  # (набрано, максимум, %)
+
+
+# ---------------- разбор meta ----------------
+
+def meta_dict(raw: Any) -> dict:
+    if isinstance(raw, dict):
+        return raw
+    if isinstance(raw, str) and raw.strip():
+        try:
+            return json.loads(raw)
+        except Exception:
+            return {}
+    return {}
+
+
+def _first_present(d: dict, keys: List[str]):
+    for k in keys:
+        if k in d and d[k] is not None:
+            return d[k]
+    return None
+
+
+def _to_float(v) -> Optional[float]:
+    try:
+        if v is None:
+            return None
+        return float(v)
+    except Exception:
+        return None
+
+
+def extract_weight(meta: dict) -> Optional[float]:
+    candidate = _first_present(meta, [
+        # англ варианты
+        "weight", "score_weight", "points", "max_points", "max_score", "score", "weight_value",
+        # русские
+        "вес", "балл", "баллы",
+    ])
+    return _to_float(candidate)
+
+
+_RANGE_RE = re.compile(r"\s*(-?\d+(?:\.\d+)?)\s*-\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def extract_scale_max(meta: dict) -> Optional[float]:
+    # прямые ключи
+    direct = _first_present(meta, ["max", "scale_max", "max_value", "upper", "upper_bound"])
+    mx = _to_float(direct)
+    if mx:
+        return mx
+
+    # options: len / max(value)
+    opts = meta.get("options")
+    if isinstance(opts, (list, tuple)) and len(opts) > 0:
+        if not isinstance(opts[0], dict):
+            return _to_float(len(opts)) or None
+        vals = []
+        for it in opts:
+            if isinstance(it, dict):
+                cand = _first_present(it, ["value", "val", "score", "points"])
+                f = _to_float(cand)
+                if f is not None:
+                    vals.append(f)
+        if vals:
+            return max(vals)
+        return _to_float(len(opts)) or None
+
+    # values / choices
+    for key in ["values", "choices"]:
+        seq = meta.get(key)
+        if isinstance(seq, (list, tuple)) and len(seq) > 0:
+            return _to_float(len(seq)) or None
+
+    # range "1-5"
+    rng = meta.get("range")
+    if isinstance(rng, str):
+        m = _RANGE_RE.match(rng)
+        if m:
+            return _to_float(m.group(2))
+
+    return None
+
+
+def extract_scale_min(meta: dict) -> Optional[float]:
+    """Нижняя граница шкалы: {"min": 1, "max": 10} из админки или range "1-5"; иначе None (= 0)."""
+    mn = _to_float(_first_present(meta, ["min", "scale_min", "min_value", "lower", "lower_bound"]))
+    if mn is not None:
+        return mn
+    rng = meta.get("range")
+    if isinstance(rng, str):
+        m = _RANGE_RE.match(rng)
+        if m:
+            return _to_float(m.group(1))
+    return None
+
+
+# ---------------- план ----------------
+
+@dataclass(frozen=True)
+class QuestionScoring:
+    code: int                   # OTHER | YESNO | SCALE
+    weight: Optional[float]     # None — вопрос без балла
+    scale_min: float = DEFAULT_SCALE_MIN
+    scale_max: float = DEFAULT_SCALE_MAX
+
+
+_UNSCORED = QuestionScoring(code=OTHER, weight=None)
+
+
+@dataclass(frozen=True)
+class ScoringPlan:
+    """Скомпилированные правила подсчёта одной версии чек-листа. Общий объект — не изменять."""
+    checklist_id: int
+    version: str
+    is_scored: bool
+    questions: Dict[int, QuestionScoring]
+    yes_tokens: FrozenSet[str] = field(default=YES_TOKENS)
+
+    def question(self, qid: int) -> QuestionScoring:
+        return self.questions.get(qid, _UNSCORED)
+
+    def score(self, qid: int, answer: Any) -> Tuple[Optional[float], Optional[float]]:
+        """(балл, вес) ответа на вопрос qid; для вопроса без веса — (None, None)."""
+        q = self.question(qid)
+        if q.weight is None:
+            return None, None
+        if q.code == YESNO:
+            value = "" if answer is None else str(answer).strip().lower()
+            return (q.weight if value in self.yes_tokens else 0.0), q.weight
+        if q.code == SCALE:
+            # без ответа — 0 баллов, даже если шкала начинается ниже нуля
+            if answer is None or str(answer).strip() == "":
+                return 0.0, q.weight
+            try:
+                value = float(str(answer).replace(",", "."))
+            except ValueError:
+                value = 0.0
+            ratio = (value - q.scale_min) / (q.scale_max - q.scale_min)
+            return q.weight * max(0.0, min(1.0, ratio)), q.weight
+        return None, q.weight
+
+    def totals(self, answers: Mapping[int, Any]) -> Totals:
+        """Итог попытки по ответам {qid: значение}; вопросы без ответа дают 0 из своего веса."""
+        total_score = total_max = 0.0
+        for qid in self.questions:
+            score, weight = self.score(qid, answers.get(qid))
+            if weight is not None:
+                total_max += weight
+                total_score += max(0.0, score or 0.0)
+        return summarize(self.is_scored, total_score, total_max)
+
+
+def summarize(is_scored: bool, total_score: float, total_max: float) -> Totals:
+    """Округлённые (набрано, максимум, %) — или (None, None, None), если баллы не считаются."""
+    if not is_scored or total_max <= 0:
+        return None, None, None
+    return round(total_score, 2), round(total_max, 2), round(total_score / total_max * 100, 2)
+
+
+def _compile_question(qtype: Optional[str], meta: Any, weight_column: Optional[float]) -> QuestionScoring:
+    meta = meta_dict(meta)
+    # столбец weight приоритетнее meta — как было при слиянии meta со столбцами
+    weight = _to_float(weight_column) if weight_column is not None else extract_weight(meta)
+    if weight is None:
+        return _UNSCORED
+
+    normalized = (qtype or "").lower().strip()
+    if normalized in YESNO_TYPES:
+        return QuestionScoring(code=YESNO, weight=weight)
+    if normalized in SCALE_TYPES:
+        scale_max = extract_scale_max(meta) or DEFAULT_SCALE_MAX
+        if scale_max <= 0:
+            scale_max = DEFAULT_SCALE_MAX
+        scale_min = extract_scale_min(meta)
+        if scale_min is None or scale_min >= scale_max:
+            scale_min = DEFAULT_SCALE_MIN
+        return QuestionScoring(code=SCALE, weight=weight, scale_min=scale_min, scale_max=scale_max)
+    return QuestionScoring(code=OTHER, weight=weight)
+
+
+PlanInputs = List[Tuple[int, Optional[str], str, Any]]
+
+
+def _plan_inputs(questions: Iterable[Any]) -> PlanInputs:
+    """Строки с полями qid, qtype, qmeta, qweight → отсортированные кортежи (meta — в JSON)."""
+    inputs = {
+        (q.qid, q.qtype, json.dumps(meta_dict(q.qmeta), sort_keys=True, default=str, ensure_ascii=False), q.qweight)
+        for q in questions
+    }
+    return sorted(inputs, key=lambda item: item[0])
+
+
+def _plan_version(is_scored: bool, inputs: PlanInputs) -> str:
+    payload = json.dumps([bool(is_scored), inputs], default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _build_plan(checklist_id: int, is_scored: bool, inputs: PlanInputs, version: str) -> ScoringPlan:
+    return ScoringPlan(
+        checklist_id=checklist_id,
+        version=version,
+        is_scored=bool(is_scored),
+        questions={
+            qid: _compile_question(qtype, json.loads(meta), weight)
+            for qid, qtype, meta, weight in inputs
+        },
+    )
+
+
+def compile_plan(checklist_id: int, is_scored: bool, questions: Iterable[Any]) -> ScoringPlan:
+    """questions — строки с полями qid, qtype, qmeta, qweight (повторы и порядок не важны)."""
+    inputs = _plan_inputs(questions)
+    return _build_plan(checklist_id, is_scored, inputs, _plan_version(is_scored, inputs))
+
+
+class ScoringPlanCache:
+    """
+    LRU по (checklist_id, версия). Версия — хеш входных данных подсчёта (типы, веса, meta,
+    is_scored), поэтому правка чек-листа из любого процесса просто даёт новый ключ.
+    """
+
+    def __init__(self, max_size: int = SCORING_PLAN_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._plans: "OrderedDict[Tuple[int, str], ScoringPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, checklist_id: int, is_scored: bool, questions: Iterable[Any]) -> ScoringPlan:
+        """План для структуры questions (см. compile_plan) — из кэша или скомпилированный."""
+        inputs = _plan_inputs(questions)
+        key = (checklist_id, _plan_version(is_scored, inputs))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self._hits += 1
+                return plan
+            self._misses += 1
+
+        plan = _build_plan(checklist_id, is_scored, inputs, key[1])
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self) -> Dict[str, Any]:
+        return {"plans": len(self._plans), "hits": self._hits, "misses": self._misses}
+
+
+scoring_plans = ScoringPlanCache()
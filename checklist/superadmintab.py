@@ -1,4 +1,3 @@
-import bcrypt
 import streamlit as st
 import pandas as pd
 from sqlalchemy.exc import IntegrityError
@@ -6,6 +5,7 @@ from sqlalchemy.orm import joinedload
 
 from checklist.db.db import SessionLocal
 from checklist.db.models import Company, User, Role, Position
+from checklist.passwords import hash_password
 
 MAIN_ROLE_NAME = "Главный администратор"
 MAIN_POSITION_NAME = "Главный администратор"
@@ -124,7 +124,7 @@ def main_superadmin():
                     st.error("Не удалось создать компанию.")
                     return
 
-                hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+                hashed = hash_password(password)
 
                 try:
                     role = _ensure_main_role(db)